@@ -1,11 +1,13 @@
 import random
-import uuid
 import os
+from array import array
+from collections.abc import Sequence
+from functools import partial
+import numpy as np
 import pandas as pd
-from faker import Faker
-from utils.helpers import generate_card_number
-
-faker = Faker()
+from utils.helpers import generate_card_number, generate_uuid, fake as faker
+from utils.entry_store import Vocabulary
+from generator.profiles import ProfileBook
 
 # === Constants ===
 CURRENCIES = ["USD"]
@@ -14,85 +16,370 @@ VISIBILITY_OPTIONS = ["sender", "receiver", "both"]
 
 # === Entity Types ===
 class Bank:
+    __slots__ = ("id", "name", "code", "swift_code", "aba_routing_number")
+
     def __init__(self, name, code=None, swift_code="", aba_routing_number=""):
-        self.id = str(uuid.uuid4())[:8]
+        self.id = generate_uuid(8)
         self.name = name
         self.code = str(code) if code is not None else str(random.randint(100, 999))
         # Wire metadata comes from profile data if available
         self.swift_code = swift_code
         self.aba_routing_number = aba_routing_number
 
-class Account:
-    def __init__(
-        self,
-        owner_id,
-        owner_type,
-        bank_id,
-        currency="USD",
-        bank_code="000",
-        account_number=None,
-        owner_name=None,
-        bank_name=None,
-        country="United States",
-        swift_code=None,
-        routing_number=None,
-        credit_card_number=None,
-        debit_card_number=None,
-        receiving_method=None,
-        launderer=False,
-    ):
-        if account_number is not None:
-            self.id = str(account_number)
-        else:
-            serial = random.randint(10**8, 10**9 - 1)
-            self.id = f"{bank_code}{serial}"
-        self.owner_id = owner_id
-        self.owner_type = owner_type
-        self.bank_id = bank_id
-        self.bank_code = bank_code
-        # Alias for backward compatibility
-        self.bank = bank_code
-        self.currency = currency
-        self.account_number = self.id
-        # Optional context for downstream transaction rows
-        self.owner_name = owner_name
-        self.bank_name = bank_name
-        self.country = country
-        self.swift_code = swift_code
-        self.routing_number = routing_number
-        self.credit_card_number = credit_card_number
-        self.debit_card_number = debit_card_number
-        self.receiving_method = receiving_method
-        self.launderer = launderer
+# === Compact Tables ===
+class _Table(Sequence):
+    """Struct-of-arrays storage shared by ``EntityTable`` and ``AccountTable``.
+
+    ``TEXT`` columns keep one string per row in a list, ``CODED`` columns
+    keep ``array("i")`` codes into a per-column ``Vocabulary`` (so repeated
+    values such as countries or bank codes are stored once), ``FLAGS`` are
+    ``array("b")`` and ``ROWS`` are ``array("i")`` row ids into another
+    table. Indexing or iterating a table yields light view objects for code
+    that needs attribute access; views read and write the arrays directly.
+    """
+
+    TEXT = ()
+    CODED = ()
+    FLAGS = ()
+    ROWS = ()
 
-# === Base Entity ===
-class Entity:
     def __init__(self):
-        self.id = str(uuid.uuid4())[:8]
-        self.accounts = []
-        self.address = faker.address()
-        self.phone = faker.phone_number()
-        self.bank = None  # Assigned via account generation
-        # Majority of entities are US based
-        self.country = "United States" if random.random() < 0.8 else faker.country()
-        # Accounts will be flagged as laundering participants after
-        # laundering transactions are generated
-        self.launderer = False
-        self.visibility = random.choices(
-            VISIBILITY_OPTIONS,
-            weights=[0.25, 0.25, 0.5]  # Bias toward 'both'
-        )[0]
+        self.vocabularies = {col: Vocabulary() for col in self.CODED}
+        self._columns = {}
+        for col in self.TEXT:
+            self._columns[col] = []
+        for col in self.CODED + self.ROWS:
+            self._columns[col] = array("i")
+        for col in self.FLAGS:
+            self._columns[col] = array("b")
+        self._row_of = None
+        self._build_readers()
+
+    def _build_readers(self):
+        # Per-column ``row -> value`` functions bound to the column storage,
+        # so view attributes decode a cell without dispatching on its kind
+        self._readers = {}
+        for col, column in self._columns.items():
+            if col in self.vocabularies:
+                self._readers[col] = partial(_decode, column, self.vocabularies[col].values)
+            elif col in self.FLAGS:
+                self._readers[col] = partial(_flag, column)
+            else:
+                self._readers[col] = column.__getitem__
+
+    def _append(self, **values) -> int:
+        row = len(self)
+        for col, column in self._columns.items():
+            value = values.get(col)
+            if col in self.vocabularies:
+                column.append(self.vocabularies[col].encode(value))
+            elif col in self.FLAGS:
+                column.append(1 if value else 0)
+            elif col in self.ROWS:
+                column.append(-1 if value is None else value)
+            else:
+                column.append(value)
+        if self._row_of is not None:
+            self._row_of.setdefault(values.get("id"), row)
+        return row
+
+    def get(self, name, row):
+        """Return the value of column ``name`` in ``row``."""
+        return self._readers[name](row)
+
+    def set(self, name, row, value):
+        """Set column ``name`` of ``row`` to ``value``."""
+        if name in self.vocabularies:
+            value = self.vocabularies[name].encode(value)
+        elif name in self.FLAGS:
+            value = 1 if value else 0
+        elif name == "id":
+            self._row_of = None
+        self._columns[name][row] = value
+
+    def fill(self, name, rows, value):
+        """Set a coded, flag or row column to ``value`` at ``rows``."""
+        if name in self.vocabularies:
+            value = self.vocabularies[name].encode(value)
+        elif name in self.FLAGS:
+            value = 1 if value else 0
+        column = self._columns[name]
+        dtype = np.int32 if column.typecode == "i" else np.int8
+        np.frombuffer(column, dtype=dtype)[rows] = value
+
+    def array(self, name) -> np.ndarray:
+        """Return a copy of a coded, flag or row column as a numpy array."""
+        column = self._columns[name]
+        return np.array(column, dtype=np.int32 if column.typecode == "i" else np.int8)
+
+    def row_of(self, item_id, default=-1) -> int:
+        """Return the row of ``item_id`` (the first one when ids repeat)."""
+        if self._row_of is None:
+            self._row_of = {}
+            for row, value in enumerate(self._columns["id"]):
+                self._row_of.setdefault(value, row)
+        return self._row_of.get(item_id, default)
+
+    def lookup(self, item_id):
+        """Return the view for ``item_id``, or ``None`` when it is unknown."""
+        row = self.row_of(item_id)
+        return None if row < 0 else self[row]
+
+    def view(self, row):
+        raise NotImplementedError("Override this in subclass.")
+
+    def __len__(self):
+        return len(self._columns["id"])
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self.view(i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("table row out of range")
+        return self.view(row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.view(row)
+
+    def __getstate__(self):
+        # The id lookup is rebuilt on demand and the readers on load
+        state = {**self.__dict__, "_row_of": None}
+        del state["_readers"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_readers()
+
+
+def _decode(column, values, row):
+    code = column[row]
+    return None if code < 0 else values[code]
+
+
+def _flag(column, row):
+    return column[row] != 0
+
+
+class _View:
+    """Attribute access to one row of a ``_Table``."""
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, _View) and other.table is self.table and other.row == self.row
+        )
+
+    def __hash__(self):
+        return hash((id(self.table), self.row))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(id={self.id!r})"
+
+
+def _column(name):
+    """Property reading and writing column ``name`` of the view's row."""
+    return property(
+        lambda self: self.table._readers[name](self.row),
+        lambda self, value: self.table.set(name, self.row, value),
+    )
+
+
+def _owner_column(name):
+    """Property reading column ``name`` of the row owning the view's account.
+
+    Reads the owner table by row id, without building an owner view.
+    """
+    return property(
+        lambda self: self.table.owners._readers[name](self.table._columns["owner"][self.row])
+    )
+
+
+class EntityTable(_Table):
+    """Persons and companies, one row each.
+
+    ``new`` draws a random entity (consuming the random streams in the same
+    order the per-object classes always have); profile data overrides the
+    drawn fields afterwards. ``accounts`` is the ``AccountTable`` built over
+    this table, if any.
+    """
+
+    TEXT = ("id", "name", "address", "phone", "credit_card_number", "debit_card_number")
+    CODED = ("kind", "country", "visibility", "receiving_method")
+    FLAGS = ("launderer",)
+
+    def __init__(self):
+        super().__init__()
+        self.accounts = None
+
+    def new(self, kind) -> int:
+        """Append a randomly generated ``"Person"`` or ``"Company"`` and return its row."""
+        values = {
+            "kind": kind,
+            "id": generate_uuid(8),
+            "address": faker.address(),
+            "phone": faker.phone_number(),
+            # Majority of entities are US based
+            "country": "United States" if random.random() < 0.8 else faker.country(),
+            # Accounts will be flagged as laundering participants after
+            # laundering transactions are generated
+            "launderer": False,
+            # Bias toward 'both'
+            "visibility": random.choices(VISIBILITY_OPTIONS, weights=[0.25, 0.25, 0.5])[0],
+        }
+        values["name"] = faker.name() if kind == "Person" else faker.company()
+        values["credit_card_number"] = generate_card_number()
+        values["debit_card_number"] = generate_card_number()
+        if kind == "Company":
+            values["receiving_method"] = random.choice([
+                "CARD PAYMENT",
+                "ONLINE PAYMENT",
+                "PHONE PAYMENT AUTHORIZED",
+            ])
+        return self._append(**values)
+
+    def view(self, row):
+        return ENTITY_KINDS[self.vocabularies["kind"].decode(self._columns["kind"][row])](self, row)
+
+
+class AccountTable(_Table):
+    """Accounts, one row each, owned by rows of an ``EntityTable``.
+
+    Owner details (name, type, country, cards, receiving method) are read
+    from the owning entity's row and bank details from ``banks``, so an
+    account only stores its id, the two row ids and a few coded fields.
+    """
+
+    TEXT = ("id",)
+    CODED = ("currency", "swift_code", "routing_number")
+    FLAGS = ("launderer",)
+    ROWS = ("owner", "bank")
+
+    def __init__(self, owners, banks):
+        super().__init__()
+        self.owners = owners
+        self.banks = list(banks)
+        self._by_owner = None
+        owners.accounts = self
+
+    def add(self, owner, bank, account_id, currency="USD", swift_code=None, routing_number=None,
+            launderer=False) -> int:
+        """Append an account for entity row ``owner`` at bank row ``bank``."""
+        self._by_owner = None
+        return self._append(
+            id=str(account_id),
+            owner=owner,
+            bank=bank,
+            currency=currency,
+            swift_code=swift_code,
+            routing_number=routing_number,
+            launderer=launderer,
+        )
+
+    def rows_of_owner(self, owner) -> np.ndarray:
+        """Return the account rows of entity row ``owner`` in creation order."""
+        if self._by_owner is None:
+            owners = self.array("owner")
+            order = np.argsort(owners, kind="stable")
+            starts = np.searchsorted(owners[order], np.arange(len(self.owners) + 1))
+            self._by_owner = (order, starts)
+        order, starts = self._by_owner
+        return order[starts[owner]:starts[owner + 1]]
+
+    def view(self, row):
+        return Account(self, row)
+
+    def __getstate__(self):
+        return {**super().__getstate__(), "_by_owner": None}
+
+
+# === Views ===
+class Account(_View):
+    """View of one ``AccountTable`` row."""
+
+    __slots__ = ()
+
+    id = _column("id")
+    currency = _column("currency")
+    swift_code = _column("swift_code")
+    routing_number = _column("routing_number")
+    launderer = _column("launderer")
+
+    @property
+    def account_number(self):
+        return self.id
+
+    @property
+    def owner_row(self):
+        return self.table._columns["owner"][self.row]
+
+    @property
+    def _bank(self):
+        return self.table.banks[self.table._columns["bank"][self.row]]
+
+    owner_id = _owner_column("id")
+    owner_type = _owner_column("kind")
+    owner_name = _owner_column("name")
+    country = _owner_column("country")
+    credit_card_number = _owner_column("credit_card_number")
+    debit_card_number = _owner_column("debit_card_number")
+    # Only companies have one; the column is empty for persons
+    receiving_method = _owner_column("receiving_method")
+    bank_id = property(lambda self: self._bank.id)
+    bank_code = property(lambda self: self._bank.code)
+    # Alias for backward compatibility
+    bank = bank_code
+    bank_name = property(lambda self: self._bank.name)
+
+
+# === Base Entity ===
+class Entity(_View):
+    """View of one ``EntityTable`` row.
+
+    Called without a ``row`` a subclass draws a new random entity into
+    ``table`` (or into a table of its own).
+    """
+
+    __slots__ = ()
+    bank = None  # Assigned via account generation
+
+    id = _column("id")
+    name = _column("name")
+    address = _column("address")
+    phone = _column("phone")
+    country = _column("country")
+    launderer = _column("launderer")
+    visibility = _column("visibility")
+    credit_card_number = _column("credit_card_number")
+    debit_card_number = _column("debit_card_number")
+
+    def __init__(self, table=None, row=None):
+        if row is None:
+            table = EntityTable() if table is None else table
+            row = table.new(self.__class__.__name__)
+        super().__init__(table, row)
+
+    @property
+    def accounts(self) -> list:
+        accounts = self.table.accounts
+        if accounts is None:
+            return []
+        return [accounts.view(int(row)) for row in accounts.rows_of_owner(self.row)]
 
     def get_allowed_transactions(self):
         raise NotImplementedError("Override this in subclass.")
 
 # === Person Entity ===
 class Person(Entity):
-    def __init__(self):
-        super().__init__()
-        self.name = faker.name()
-        self.credit_card_number = generate_card_number()
-        self.debit_card_number = generate_card_number()
+    __slots__ = ()
 
     def get_allowed_transactions(self):
         return {
@@ -104,16 +391,9 @@ class Person(Entity):
 
 # === Company Entity ===
 class Company(Entity):
-    def __init__(self):
-        super().__init__()
-        self.name = faker.company()
-        self.credit_card_number = generate_card_number()
-        self.debit_card_number = generate_card_number()
-        self.receiving_method = random.choice([
-            "CARD PAYMENT",
-            "ONLINE PAYMENT",
-            "PHONE PAYMENT AUTHORIZED",
-        ])
+    __slots__ = ()
+
+    receiving_method = _column("receiving_method")
 
     def get_allowed_transactions(self):
         return {
@@ -124,19 +404,96 @@ class Company(Entity):
             "Cash": ["Deposit", "Withdrawal"]
         }
 
+ENTITY_KINDS = {"Person": Person, "Company": Company}
+
+# === Ownership Index ===
+class OwnershipIndex:
+    """Constant-time lookups between accounts and their owning entities.
+
+    Built once by ``generate_entities`` and shared by every downstream stage
+    instead of scanning the entity list per lookup. Entities are also given
+    integer row numbers so owners can be resolved for whole arrays of
+    accounts at once.
+
+    When ``entities`` is an ``EntityTable`` the lookups read its
+    ``AccountTable`` directly and no per-account dictionaries are built.
+    """
+
+    def __init__(self, entities, accounts=None):
+        if isinstance(entities, EntityTable):
+            self.entities = entities
+            self.accounts = entities.accounts
+            return
+        self.accounts = None
+        self.entities = list(entities)
+        self.entity_by_id = {e.id: e for e in self.entities}
+        self.entity_row = {e.id: i for i, e in enumerate(self.entities)}
+        self.entity_by_account = {}
+        self.accounts_by_entity = {}
+        for ent in self.entities:
+            self.accounts_by_entity[ent.id] = list(getattr(ent, "accounts", []))
+            for acct in self.accounts_by_entity[ent.id]:
+                self.entity_by_account[acct.id] = ent
+        for acct in accounts or []:
+            if acct.id not in self.entity_by_account:
+                owner = self.entity_by_id.get(acct.owner_id)
+                if owner is not None:
+                    self.entity_by_account[acct.id] = owner
+
+    def _account_row(self, account) -> int:
+        if isinstance(account, Account) and account.table is self.accounts:
+            return account.row
+        return self.accounts.row_of(getattr(account, "id", account))
+
+    def owner(self, account):
+        """Return the entity owning ``account`` (an account or account id)."""
+        if self.accounts is not None:
+            row = self._account_row(account)
+            return None if row < 0 else self.entities[self.accounts.get("owner", row)]
+        acct_id = getattr(account, "id", account)
+        return self.entity_by_account.get(acct_id)
+
+    def accounts_of(self, entity) -> list:
+        """Return the accounts owned by ``entity`` (an entity or entity id)."""
+        if self.accounts is not None:
+            if not isinstance(entity, Entity):
+                entity = self.entities.lookup(entity)
+            return [] if entity is None else entity.accounts
+        return self.accounts_by_entity.get(getattr(entity, "id", entity), [])
+
+    def owner_rows(self, accounts) -> np.ndarray:
+        """Return the owner's row in ``entities`` for each account (-1 if unknown)."""
+        if self.accounts is not None:
+            if accounts is self.accounts:
+                return self.accounts.array("owner").astype(np.int64)
+            owners = self.accounts.array("owner")
+            rows = np.fromiter((self._account_row(a) for a in accounts), dtype=np.int64, count=len(accounts))
+            return np.where(rows >= 0, owners[np.maximum(rows, 0)], -1)
+        rows = np.full(len(accounts), -1, dtype=np.int64)
+        for i, acct in enumerate(accounts):
+            owner = self.entity_by_account.get(acct.id)
+            if owner is not None:
+                rows[i] = self.entity_row[owner.id]
+        return rows
+
 # === Generators ===
-def create_banks(n=3, profiles_path=None):
+def create_banks(n=3, profiles_path=None, banks_df=None):
     """Create ``Bank`` objects.
 
-    If ``profiles_path`` is provided and points to an Excel file with a
-    ``banks`` sheet, use that metadata (including SWIFT and routing numbers).
-    Otherwise fall back to simple placeholder banks without wire details.
+    If ``banks_df`` is given, or ``profiles_path`` points to an Excel file
+    with a ``banks`` sheet, use that metadata (including SWIFT and routing
+    numbers). Otherwise fall back to simple placeholder banks without wire
+    details.
     """
-    if profiles_path and os.path.exists(profiles_path):
+    if banks_df is None and profiles_path and os.path.exists(profiles_path):
+        try:
+            banks_df = ProfileBook(profiles_path).sheet("banks")
+        except Exception:
+            banks_df = None
+    if banks_df is not None:
         try:
-            banks_df = pd.read_excel(profiles_path, sheet_name="banks")
             if not banks_df.empty:
-                sample_df = banks_df.sample(min(n, len(banks_df)))
+                sample_df = banks_df.sample(min(n, len(banks_df)), random_state=random.getrandbits(32))
                 return [
                     Bank(
                         name=row.get("name", ""),
@@ -152,103 +509,98 @@ def create_banks(n=3, profiles_path=None):
     names = random.sample(BANK_NAMES, min(n, len(BANK_NAMES)))
     return [Bank(name=name) for name in names]
 
-def create_individuals(n=10, profiles_df=None):
+def create_individuals(n=10, profiles_df=None, table=None):
     """Return a list of ``Person`` objects.
 
     When ``profiles_df`` is provided it should contain the columns
     ``entity_id`` and ``name`` at minimum. The dataframe will be sampled
     to the requested ``n`` and the data used to populate the objects.
+    The persons are appended to ``table`` (a new ``EntityTable`` if omitted).
     """
+    table = EntityTable() if table is None else table
     if profiles_df is not None and not profiles_df.empty:
-        sample_df = profiles_df.sample(min(n, len(profiles_df)))
+        sample_df = profiles_df.sample(min(n, len(profiles_df)), random_state=random.getrandbits(32))
         people = []
         for _, row in sample_df.iterrows():
-            p = Person()
+            p = Person(table)
             p.id = str(row.get("entity_id", p.id))
             p.name = row.get("name", p.name)
             p.address = row.get("address", p.address)
             p.phone = row.get("phone_number", p.phone)
             people.append(p)
         if len(people) < n:
-            people.extend(Person() for _ in range(n - len(people)))
+            people.extend(Person(table) for _ in range(n - len(people)))
         return people
-    return [Person() for _ in range(n)]
+    return [Person(table) for _ in range(n)]
 
-def create_companies(n=5, profiles_df=None):
-    """Return a list of ``Company`` objects."""
+def create_companies(n=5, profiles_df=None, table=None):
+    """Return a list of ``Company`` objects appended to ``table``."""
+    table = EntityTable() if table is None else table
     if profiles_df is not None and not profiles_df.empty:
-        sample_df = profiles_df.sample(min(n, len(profiles_df)))
+        sample_df = profiles_df.sample(min(n, len(profiles_df)), random_state=random.getrandbits(32))
         comps = []
         for _, row in sample_df.iterrows():
-            c = Company()
+            c = Company(table)
             c.id = str(row.get("entity_id", c.id))
             c.name = row.get("name", c.name)
             c.address = row.get("address", c.address)
             c.phone = row.get("phone_number", c.phone)
             comps.append(c)
         if len(comps) < n:
-            comps.extend(Company() for _ in range(n - len(comps)))
+            comps.extend(Company(table) for _ in range(n - len(comps)))
         return comps
-    return [Company() for _ in range(n)]
+    return [Company(table) for _ in range(n)]
 
 def assign_accounts(entities, banks, accounts_per_entity=(1, 3), profiles_df=None):
-    all_accounts = []
+    """Open accounts for ``entities`` and return them as an ``AccountTable``.
+
+    ``entities`` is an ``EntityTable`` or a list of views into one. Accounts
+    start with their owner's ``launderer`` flag.
+    """
+    table = entities if isinstance(entities, EntityTable) else (entities[0].table if entities else EntityTable())
+    all_accounts = AccountTable(table, banks)
     bank_lookup = {str(b.code): b for b in banks}
+    bank_rows = {b.id: i for i, b in enumerate(banks)}
 
     if profiles_df is not None and not profiles_df.empty:
+        profile_rows = {}
+        for rec in profiles_df.to_dict("records"):
+            profile_rows.setdefault(rec["entity_id"], rec)
         for entity in entities:
-            rows = profiles_df[profiles_df["entity_id"] == entity.id]
-            if rows.empty:
+            row = profile_rows.get(entity.id)
+            if row is None:
                 continue
-            row = rows.iloc[0]
             bank_code = str(row.get("bank")) if not pd.isna(row.get("bank")) else random.choice(list(bank_lookup.keys()))
             bank = bank_lookup.get(bank_code, random.choice(banks))
             acct_num = row.get("account_number")
             if pd.isna(acct_num):
                 acct_num = faker.unique.random_number(digits=9, fix_len=True)
-            account = Account(
-                owner_id=entity.id,
-                owner_type=entity.__class__.__name__,
-                bank_id=bank.id,
+            all_accounts.add(
+                entity.row,
+                bank_rows[bank.id],
+                acct_num,
                 currency=random.choice(CURRENCIES),
-                bank_code=bank.code,
-                account_number=acct_num,
-                owner_name=entity.name,
-                bank_name=bank.name,
-                country=entity.country,
                 swift_code=bank.swift_code or faker.swift8(),
                 routing_number=bank.aba_routing_number or faker.aba(),
-                credit_card_number=getattr(entity, "credit_card_number", None),
-                debit_card_number=getattr(entity, "debit_card_number", None),
-                receiving_method=getattr(entity, "receiving_method", None),
                 launderer=entity.launderer,
             )
-            entity.accounts.append(account)
-            all_accounts.append(account)
         return all_accounts
 
     for entity in entities:
         num_accounts = random.randint(*accounts_per_entity)
         for _ in range(num_accounts):
             bank = random.choice(banks)
-            account = Account(
-                owner_id=entity.id,
-                owner_type=entity.__class__.__name__,
-                bank_id=bank.id,
-                currency=random.choice(CURRENCIES),
-                bank_code=bank.code,
-                owner_name=entity.name,
-                bank_name=bank.name,
-                country=entity.country,
+            currency = random.choice(CURRENCIES)
+            serial = random.randint(10**8, 10**9 - 1)
+            all_accounts.add(
+                entity.row,
+                bank_rows[bank.id],
+                f"{bank.code}{serial}",
+                currency=currency,
                 swift_code=bank.swift_code,
                 routing_number=bank.aba_routing_number,
-                credit_card_number=getattr(entity, "credit_card_number", None),
-                debit_card_number=getattr(entity, "debit_card_number", None),
-                receiving_method=getattr(entity, "receiving_method", None),
                 launderer=entity.launderer,
             )
-            entity.accounts.append(account)
-            all_accounts.append(account)
     return all_accounts
 
 # === Top-level function ===
@@ -257,78 +609,83 @@ def generate_entities(
     n_individuals: int = 10,
     n_companies: int = 5,
     profile_path: str | None = None,
+    profiles: ProfileBook | None = None,
 ):
     """Generate banks, individuals and companies.
 
-    When ``profile_path`` is supplied the Excel file will be used to
-    populate the agent names and metadata. Regardless of the source,
+    When ``profile_path`` (or an already loaded ``profiles`` book) is
+    supplied the workbook will be used to populate the agent names and
+    metadata. Regardless of the source,
     persons and companies are randomly flagged as laundering agents so
     that some accounts will later participate in laundering flows.
-    """
 
-    if profile_path and os.path.exists(profile_path):
-        try:
-            banks_df_full = pd.read_excel(profile_path, sheet_name="banks")
-            n_banks = max(n_banks, len(banks_df_full))
-        except Exception:
-            banks_df_full = None
-    else:
-        banks_df_full = None
+    ``"entities"`` and ``"accounts"`` are an ``EntityTable`` and an
+    ``AccountTable``; indexing or iterating them yields ``Person``,
+    ``Company`` and ``Account`` views. The result also carries an
+    ``"index"`` (:class:`OwnershipIndex`) for resolving account owners
+    without scanning ``entities``.
+    """
 
-    banks = create_banks(n_banks, profiles_path=profile_path)
+    if profiles is None and profile_path and os.path.exists(profile_path):
+        profiles = ProfileBook(profile_path)
 
+    banks_df = None
     people_df = None
     company_df = None
-    if profile_path and os.path.exists(profile_path):
-        try:
-            people_df = pd.read_excel(profile_path, sheet_name="People")
-        except Exception:
-            people_df = None
+    if profiles is not None:
         try:
-            company_df = pd.read_excel(profile_path, sheet_name="Companies1")
+            banks_df = profiles.sheet("banks")
+            people_df = profiles.sheet("People")
+            company_df = profiles.sheet("Companies1")
         except Exception:
-            company_df = None
+            pass
+    if banks_df is not None:
+        n_banks = max(n_banks, len(banks_df))
+
+    banks = create_banks(n_banks, banks_df=banks_df)
+    table = EntityTable()
 
     sample_people_df = people_df
     sample_company_df = company_df
     if people_df is not None and not people_df.empty:
-        sample_people_df = people_df.sample(min(n_individuals, len(people_df)))
+        sample_people_df = people_df.sample(min(n_individuals, len(people_df)), random_state=random.getrandbits(32))
         individuals = []
         for _, row in sample_people_df.iterrows():
-            p = Person()
+            p = Person(table)
             p.id = str(row.get("entity_id", p.id))
             p.name = row.get("name") if pd.notna(row.get("name")) else faker.name()
             p.address = row.get("address") if pd.notna(row.get("address")) else faker.address()
             p.phone = row.get("phone_number") if pd.notna(row.get("phone_number")) else faker.phone_number()
             individuals.append(p)
         if len(individuals) < n_individuals:
-            individuals.extend(Person() for _ in range(n_individuals - len(individuals)))
+            individuals.extend(Person(table) for _ in range(n_individuals - len(individuals)))
     else:
-        individuals = create_individuals(n_individuals)
+        individuals = create_individuals(n_individuals, table=table)
         sample_people_df = None
 
     if company_df is not None and not company_df.empty:
-        sample_company_df = company_df.sample(min(n_companies, len(company_df)))
+        sample_company_df = company_df.sample(min(n_companies, len(company_df)), random_state=random.getrandbits(32))
         companies = []
         for _, row in sample_company_df.iterrows():
-            c = Company()
+            c = Company(table)
             c.id = str(row.get("entity_id", c.id))
             c.name = row.get("name") if pd.notna(row.get("name")) else faker.company()
             c.address = row.get("address") if pd.notna(row.get("address")) else faker.address()
             c.phone = row.get("phone_number") if pd.notna(row.get("phone_number")) else faker.phone_number()
             companies.append(c)
         if len(companies) < n_companies:
-            companies.extend(Company() for _ in range(n_companies - len(companies)))
+            companies.extend(Company(table) for _ in range(n_companies - len(companies)))
     else:
-        companies = create_companies(n_companies)
+        companies = create_companies(n_companies, table=table)
         sample_company_df = None
 
-    all_entities = individuals + companies
+    # Individuals then companies, as they were appended to the table
+    all_entities = table
     # Randomly flag entities as laundering participants
     for ent in all_entities:
         ent.launderer = random.choice([True, False])
 
-    if profile_path and (sample_people_df is not None or sample_company_df is not None):
+    if profiles is not None and (sample_people_df is not None or sample_company_df is not None):
         account_df_list = []
         if sample_people_df is not None:
             account_df_list.append(sample_people_df[["entity_id", "bank", "account_number"]])
@@ -344,6 +701,7 @@ def generate_entities(
         "companies": companies,
         "entities": all_entities,
         "accounts": accounts,
+        "index": OwnershipIndex(all_entities),
     }
 
 def get_known_accounts(accounts, n_known=100):
@@ -1,19 +1,254 @@
 import os
+import uuid
+from datetime import datetime
+
 import pandas as pd
 
+from utils.entry_store import EntryStore, ENTRY_COLUMNS, TIME_COLUMNS
+from utils.helpers import format_timestamps
+from utils.logger import log
+
 def ensure_directory_exists(filepath):
     directory = os.path.dirname(filepath)
     if directory and not os.path.exists(directory):
         os.makedirs(directory)
 
-def export_to_csv(transactions, filepath):
+def format_time_columns(df):
+    """Format datetime columns as ``YYYY-MM-DD HH:MM:SS`` strings in place."""
+    for col in TIME_COLUMNS:
+        if col in df and pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = format_timestamps(df[col].to_numpy())
+    return df
+
+def to_dataframe(transactions):
+    """Return ``transactions`` (an ``EntryStore`` or list of dicts) as a DataFrame."""
+    if isinstance(transactions, EntryStore):
+        df = transactions.to_frame()
+    else:
+        df = pd.DataFrame(transactions)
+    return format_time_columns(df)
+
+def _has_rows(filepath):
+    return os.path.exists(filepath) and os.path.getsize(filepath) > 0
+
+def export_to_csv(transactions, filepath, append=False):
     ensure_directory_exists(filepath)
-    df = pd.DataFrame(transactions)
-    df.to_csv(filepath, index=False)
+    df = to_dataframe(transactions)
+    if append:
+        df = df.reindex(columns=ENTRY_COLUMNS)
+        header = not _has_rows(filepath)
+        df.to_csv(filepath, mode="a", header=header, index=False)
+    else:
+        df.to_csv(filepath, index=False)
     print(f"[✔] Exported {len(df)} transactions to {filepath}")
 
 def export_to_excel(transactions, filepath):
+    return export_chunks_to_excel([transactions], filepath)
+
+def export_chunks_to_csv(chunks, filepath, progress_every=1_000_000, append=False):
+    """Stream entry chunks to ``filepath`` as they are produced.
+
+    ``chunks`` is any iterable of ``EntryStore`` objects (or lists of entry
+    dicts). Each chunk is appended to the file and dropped before the next
+    one is pulled, so memory stays bounded by the chunk size. Progress is
+    logged every ``progress_every`` rows. With ``append`` the rows are added
+    to an existing file (the header is only written to a new one). Returns
+    the number of rows written.
+    """
     ensure_directory_exists(filepath)
-    df = pd.DataFrame(transactions)
-    df.to_excel(filepath, index=False, engine='openpyxl')
-    print(f"[✔] Exported {len(df)} transactions to {filepath}")
+    written = 0
+    next_report = progress_every
+    header = not (append and _has_rows(filepath))
+    with open(filepath, "a" if append else "w", newline="", encoding="utf-8") as f:
+        if header:
+            pd.DataFrame(columns=ENTRY_COLUMNS).to_csv(f, index=False)
+        for chunk in chunks:
+            df = to_dataframe(chunk).reindex(columns=ENTRY_COLUMNS)
+            df.to_csv(f, header=False, index=False)
+            written += len(df)
+            if written >= next_report:
+                log(f"💾 {written:,} rows written to {filepath}")
+                next_report = (written // progress_every + 1) * progress_every
+    print(f"[✔] Exported {written} transactions to {filepath}")
+    return written
+
+# Excel's hard limit, including the header row
+EXCEL_MAX_ROWS = 1_048_576
+
+
+def _excel_rows(df):
+    """Return ``df`` as lists of plain Python values openpyxl can write."""
+    df = df.astype(object)
+    df = df.where(df.notna(), None)
+    if "wire_details" in df:
+        df["wire_details"] = [None if v is None else str(v) for v in df["wire_details"]]
+    return df.values.tolist()
+
+
+def export_chunks_to_excel(chunks, filepath, sheet_name="transactions", max_rows_per_sheet=EXCEL_MAX_ROWS - 1):
+    """Stream entry chunks into an xlsx workbook with constant memory.
+
+    The workbook is written with openpyxl's write-only mode, so rows go
+    straight to disk. When a sheet reaches ``max_rows_per_sheet`` data rows
+    (the Excel limit by default) writing continues on ``transactions_2``,
+    ``transactions_3`` and so on, each with its own header row. Returns the
+    number of rows written.
+    """
+    from openpyxl import Workbook
+
+    ensure_directory_exists(filepath)
+    wb = Workbook(write_only=True)
+    sheet = None
+    sheet_rows = 0
+    written = 0
+
+    def new_sheet():
+        index = len(wb.worksheets) + 1
+        ws = wb.create_sheet(sheet_name if index == 1 else f"{sheet_name}_{index}")
+        ws.append(ENTRY_COLUMNS)
+        return ws
+
+    sheet = new_sheet()
+    for chunk in chunks:
+        df = to_dataframe(chunk).reindex(columns=ENTRY_COLUMNS)
+        for row in _excel_rows(df):
+            if sheet_rows >= max_rows_per_sheet:
+                sheet = new_sheet()
+                sheet_rows = 0
+            sheet.append(row)
+            sheet_rows += 1
+        written += len(df)
+        log(f"💾 {written:,} rows written to {filepath}")
+    wb.save(filepath)
+    print(f"[✔] Exported {written} transactions to {filepath}")
+    return written
+
+
+def _parquet_partitioning(partition_by_bank=False):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    fields = [pa.field("txn_date", pa.date32())]
+    if partition_by_bank:
+        fields.append(pa.field("bank", pa.string()))
+    return ds.partitioning(pa.schema(fields), flavor="hive")
+
+
+def _parquet_schema(partition_by_bank=False):
+    import pyarrow as pa
+    from utils.entry_store import arrow_schema
+
+    schema = arrow_schema()
+    if partition_by_bank:
+        schema = schema.set(schema.get_field_index("bank"), pa.field("bank", pa.string()))
+    return schema.append(pa.field("txn_date", pa.date32()))
+
+
+def _clear_parquet_dataset(dirpath):
+    """Remove partition files left by a previous export to ``dirpath``."""
+    for root, dirs, files in os.walk(dirpath, topdown=False):
+        if root == dirpath or "txn_date=" not in os.path.relpath(root, dirpath):
+            continue
+        for name in files:
+            if name.startswith("part-") and name.endswith(".parquet"):
+                os.remove(os.path.join(root, name))
+        if not os.listdir(root):
+            os.rmdir(root)
+
+
+def _parquet_batches(chunks, schema):
+    """Yield Arrow record batches for each chunk, with a ``txn_date`` column."""
+    import pyarrow as pa
+
+    for chunk in chunks:
+        if not isinstance(chunk, EntryStore):
+            chunk = EntryStore.from_rows(chunk)
+        if not len(chunk):
+            continue
+        table = chunk.to_arrow()
+        txn_date = table.column("timestamp").cast(pa.date32())
+        table = table.append_column("txn_date", txn_date).cast(schema)
+        yield from table.to_batches()
+
+
+def export_chunks_to_parquet(chunks, dirpath, partition_by_bank=False, max_rows_per_file=5_000_000,
+                             append=False):
+    """Write entry chunks to a hive-partitioned Parquet dataset at ``dirpath``.
+
+    Rows are partitioned by ``txn_date`` (``txn_date=YYYY-MM-DD``) and,
+    when ``partition_by_bank`` is set, by ``bank`` below it. Chunks are
+    consumed one at a time, so this composes with streamed generation.
+    Files written by a previous export to the same directory are removed
+    first unless ``append`` is set, in which case new files are added
+    next to them. Requires pyarrow. Returns the number of rows written.
+    """
+    import pyarrow.dataset as ds
+
+    os.makedirs(dirpath, exist_ok=True)
+    basename = "part-{i}.parquet"
+    if append:
+        # A fresh prefix keeps new files from replacing earlier ones
+        basename = f"part-{uuid.uuid4().hex[:8]}-{{i}}.parquet"
+    else:
+        _clear_parquet_dataset(dirpath)
+    schema = _parquet_schema(partition_by_bank)
+    written = 0
+
+    def counted(batches):
+        nonlocal written
+        for batch in batches:
+            written += batch.num_rows
+            yield batch
+
+    ds.write_dataset(
+        counted(_parquet_batches(chunks, schema)),
+        dirpath,
+        schema=schema,
+        format="parquet",
+        partitioning=_parquet_partitioning(partition_by_bank),
+        basename_template=basename,
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_file=max_rows_per_file,
+        max_rows_per_group=min(max_rows_per_file, 1_000_000),
+    )
+    print(f"[✔] Exported {written} transactions to {dirpath}")
+    return written
+
+
+def export_to_parquet(transactions, dirpath, partition_by_bank=False, append=False):
+    return export_chunks_to_parquet([transactions], dirpath, partition_by_bank, append=append)
+
+
+def read_parquet_slice(dirpath, start_date=None, end_date=None, banks=None, columns=None):
+    """Read the entries between ``start_date`` and ``end_date`` (inclusive).
+
+    Only the ``txn_date`` (and ``bank``) partitions matching the filter are
+    opened. Dates may be ``YYYY-MM-DD`` strings or dates; ``banks`` is an
+    optional list of bank codes for datasets partitioned by bank.
+    """
+    import pyarrow.dataset as ds
+
+    # Datasets partitioned by bank have ``bank=`` directories under each date
+    date_dirs = sorted(d for d in os.listdir(dirpath) if d.startswith("txn_date="))
+    partition_by_bank = bool(date_dirs) and any(
+        name.startswith("bank=") for name in os.listdir(os.path.join(dirpath, date_dirs[0]))
+    )
+    dataset = ds.dataset(
+        dirpath,
+        format="parquet",
+        partitioning=_parquet_partitioning(partition_by_bank),
+    )
+
+    def as_date(value):
+        return datetime.strptime(value, "%Y-%m-%d").date() if isinstance(value, str) else value
+
+    expr = None
+    if start_date is not None:
+        expr = ds.field("txn_date") >= as_date(start_date)
+    if end_date is not None:
+        cond = ds.field("txn_date") <= as_date(end_date)
+        expr = cond if expr is None else expr & cond
+    if banks is not None:
+        cond = ds.field("bank").isin([str(b) for b in banks])
+        expr = cond if expr is None else expr & cond
+    return dataset.to_table(columns=columns, filter=expr).to_pandas()
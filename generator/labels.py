@@ -1,85 +1,236 @@
-from collections import defaultdict
+import heapq
 
-def flag_laundering_accounts(entries, accounts, entities=None):
+import numpy as np
+
+from utils.entry_store import EntryStore, Vocabulary, to_epoch
+from generator.entities import AccountTable, OwnershipIndex
+
+def flag_laundering_accounts(entries, accounts, entities=None, index=None):
     """Mark Account and Entity objects participating in laundering.
 
     In addition to flagging the ``Account`` and ``Entity`` instances, any
     transaction entry whose ``account_id`` matches a flagged account will have
     ``"laundering_account"`` set to ``"Yes"``. This ensures that both the debit
     and credit sides of the transaction reflect the updated status.
-    """
 
-    laundering_ids = {e["account_id"] for e in entries if e.get("is_laundering")}
-    acct_map = {a.id: a for a in accounts}
+    ``entries`` may be a list of entry dicts or an ``EntryStore``. For a
+    store the flagged accounts and rows are found with array lookups over
+    the account codes, and for an ``AccountTable`` the account and owner
+    flags are set through their row ids, so the cost is linear in the
+    number of entries plus flagged accounts. Otherwise owning entities are
+    resolved through ``index`` (an ``OwnershipIndex``), which is built from
+    ``entities`` when not supplied.
+    """
 
-    for acct_id in laundering_ids:
-        acct = acct_map.get(acct_id)
-        if not acct:
-            continue
-        acct.launderer = True
-        if entities is not None:
-            for ent in entities:
-                if acct in getattr(ent, "accounts", []):
-                    ent.launderer = True
+    if isinstance(entries, EntryStore):
+        account_codes = entries.array("account_id")
+        vocab = entries.vocabulary("account_id")
+        # One slot per code plus a trailing slot for missing (-1) accounts
+        flagged = np.zeros(len(vocab) + 1, dtype=bool)
+        flagged[account_codes[entries.array("is_laundering")]] = True
+        flagged[-1] = False
+        laundering_ids = vocab.decode_array(np.flatnonzero(flagged)).tolist()
+    else:
+        laundering_ids = {e["account_id"] for e in entries if e.get("is_laundering")}
+
+    if isinstance(accounts, AccountTable):
+        rows = np.fromiter(
+            (accounts.row_of(acct_id) for acct_id in laundering_ids), dtype=np.int64, count=len(laundering_ids)
+        )
+        rows = rows[rows >= 0]
+        accounts.fill("launderer", rows, True)
+        owners = accounts.array("owner")[rows]
+        accounts.owners.fill("launderer", owners[owners >= 0], True)
+    else:
+        acct_map = {a.id: a for a in accounts}
+        if index is None and entities is not None:
+            index = OwnershipIndex(entities, accounts)
+        for acct_id in laundering_ids:
+            acct = acct_map.get(acct_id)
+            if not acct:
+                continue
+            acct.launderer = True
+            owner = index.owner(acct) if index is not None else None
+            if owner is not None:
+                owner.launderer = True
 
     # Update all entries to reflect flagged accounts
+    if isinstance(entries, EntryStore):
+        if laundering_ids:
+            entries.fill("laundering_account", flagged[account_codes], "Yes")
+        return
     for entry in entries:
         if entry.get("account_id") in laundering_ids:
             entry["laundering_account"] = "Yes"
 
-def propagate_laundering(entries):
-    """Propagate laundering labels based on transaction chronology.
-
-    Only transactions that occur **after** an account's first laundering event
-    are marked. Entries are processed in timestamp order to ensure proper
-    propagation.
+def taint_state():
+    """Return an empty taint state for ``propagate_laundering``."""
+    return {"tainted": set(), "first_seen": {}, "hops": {}}
+
+# Taint time of accounts that are not tainted
+CLEAN = np.iinfo(np.int64).max
+
+
+def taint_labels(times, accounts, counterparties, debits, labels, n_accounts,
+                 taint_time=None, taint_hops=None, max_hops=None, window=None):
+    """Propagate laundering labels over time-sorted entry arrays.
+
+    ``times`` (epoch seconds, ascending), ``accounts`` and ``counterparties``
+    (account codes below ``n_accounts``, -1 when missing), ``debits``
+    (booleans) and ``labels`` (the generated ``is_laundering`` flags)
+    describe one entry per row. Money moves from the source account (the
+    account of a debit, the counterparty of a credit) to the target.
+
+    Accounts of laundering entries are tainted from their first one, at hop
+    0. An entry is labelled when its source account is tainted at or before
+    its time, and it taints its target at that time one hop further out.
+    ``max_hops`` stops propagation from accounts that many hops out and
+    ``window`` (seconds) ends an account's taint that long after it was
+    first tainted. Entries with the same timestamp see each other's taint
+    whatever their order.
+
+    Each account is tainted once, at its earliest time, so the accounts are
+    settled in time order from a heap and only the outgoing entries of
+    tainted accounts are scanned. ``taint_time`` and ``taint_hops`` (int64
+    arrays over account codes, ``CLEAN`` for untainted accounts) seed the
+    taint from earlier windows and are updated in place. Returns the new
+    label array.
     """
+    times = np.asarray(times, dtype=np.int64)
+    accounts = np.asarray(accounts, dtype=np.int64)
+    counterparties = np.asarray(counterparties, dtype=np.int64)
+    debits = np.asarray(debits, dtype=bool)
+    labels = np.asarray(labels, dtype=bool)
+    if taint_time is None:
+        taint_time = np.full(n_accounts, CLEAN, dtype=np.int64)
+    if taint_hops is None:
+        taint_hops = np.zeros(n_accounts, dtype=np.int64)
+
+    seeds = labels & (accounts >= 0)
+    seed_time = np.full(n_accounts, CLEAN, dtype=np.int64)
+    np.minimum.at(seed_time, accounts[seeds], times[seeds])
+    earlier = (seed_time < taint_time) | ((seed_time == taint_time) & (seed_time != CLEAN))
+    taint_time[earlier] = seed_time[earlier]
+    taint_hops[earlier] = 0
+
+    source = np.where(debits, accounts, counterparties)
+    target = np.where(debits, counterparties, accounts)
+
+    # Transfers grouped by source account; the stable sort keeps them in time order
+    edges = np.flatnonzero((source >= 0) & (target >= 0))
+    edges = edges[np.argsort(source[edges], kind="stable")]
+    edge_time = times[edges]
+    edge_target = target[edges]
+    starts = np.searchsorted(source[edges], np.arange(n_accounts + 1))
+
+    heap = [(t, h, a) for a, t, h in _tainted(taint_time, taint_hops)]
+    heapq.heapify(heap)
+    while heap:
+        t_u, h_u, u = heapq.heappop(heap)
+        if t_u != taint_time[u] or h_u != taint_hops[u]:
+            continue
+        if max_hops is not None and h_u >= max_hops:
+            continue
+        lo, hi = starts[u], starts[u + 1]
+        out_times = edge_time[lo:hi]
+        first = lo + np.searchsorted(out_times, t_u, "left")
+        last = hi if window is None else lo + np.searchsorted(out_times, t_u + window, "right")
+        if first >= last:
+            continue
+        # Targets in time order, so the first hit per target is its earliest
+        reached, pos = np.unique(edge_target[first:last], return_index=True)
+        reached_time = edge_time[first:last][pos]
+        better = (reached_time < taint_time[reached]) | (
+            (reached_time == taint_time[reached]) & (h_u + 1 < taint_hops[reached])
+        )
+        for v, t in zip(reached[better].tolist(), reached_time[better].tolist()):
+            taint_time[v] = t
+            taint_hops[v] = h_u + 1
+            heapq.heappush(heap, (t, h_u + 1, v))
 
-    from datetime import datetime
+    src_time = taint_time[np.maximum(source, 0)]
+    active = (source >= 0) & (times >= src_time)
+    if window is not None:
+        active &= (times - src_time) <= window
+    if max_hops is not None:
+        active &= taint_hops[np.maximum(source, 0)] < max_hops
+    return labels | active
 
-    # Sort entries chronologically to track first laundering occurrence
-    sorted_entries = sorted(
-        entries, key=lambda e: e.get("timestamp")
-    )
 
-    tainted_accounts: set[str] = set()
-    first_seen: dict[str, datetime] = {}
-    updated: list[dict] = []
+def _tainted(taint_time, taint_hops):
+    """Yield ``(code, time, hops)`` for every tainted account code."""
+    codes = np.flatnonzero(taint_time != CLEAN)
+    return zip(codes.tolist(), taint_time[codes].tolist(), taint_hops[codes].tolist())
 
-    for entry in sorted_entries:
-        ts_raw = entry.get("timestamp")
-        ts = (
-            datetime.strptime(ts_raw, "%Y-%m-%d %H:%M:%S")
-            if isinstance(ts_raw, str)
-            else ts_raw
-        )
-        acct = entry.get("account_id")
-        counterparty = entry.get("counterparty")
-        direction = entry.get("direction")
-
-        if entry.get("is_laundering", False):
-            tainted_accounts.add(acct)
-            first_seen.setdefault(acct, ts)
-
-        if (
-            direction == "credit"
-            and counterparty in tainted_accounts
-            and ts >= first_seen[counterparty]
-        ):
-            entry["is_laundering"] = True
-            tainted_accounts.add(acct)
-            first_seen.setdefault(acct, ts)
-
-        if (
-            direction == "debit"
-            and acct in tainted_accounts
-            and ts >= first_seen[acct]
-        ):
-            entry["is_laundering"] = True
-            tainted_accounts.add(counterparty)
-            first_seen.setdefault(counterparty, ts)
 
-        updated.append(entry)
+def propagate_laundering(entries, state=None, max_hops=None, window=None):
+    """Propagate laundering labels based on transaction chronology.
 
-    # Return entries sorted to maintain chronological order
-    return sorted(updated, key=lambda e: e.get("timestamp"))
+    Only transactions that occur **after** an account's first laundering event
+    are marked. Labels are computed by ``taint_labels`` over the entries'
+    time-sorted account, counterparty and direction arrays; ``max_hops`` and
+    ``window`` (seconds) are passed through to it.
+
+    ``entries`` may be a list of entry dicts or an ``EntryStore``; a store is
+    returned as a new, chronologically ordered store and a list as the same
+    dicts in chronological order, with ``is_laundering`` set on the newly
+    labelled ones.
+
+    ``state`` (see ``taint_state``) carries the tainted accounts, the epoch
+    second each was first tainted and its hop count. It is updated in place,
+    so passing the state from an earlier window continues propagation from
+    there.
+    """
+    if isinstance(entries, EntryStore):
+        # Epoch-second timestamps sort as integers; a stable sort keeps
+        # same-second entries in insertion order
+        order = np.argsort(entries.array("timestamp"), kind="stable")
+        store = entries.take(order)
+        vocab = store.vocabulary("account_id")
+        times = store.array("timestamp")
+        accounts = store.array("account_id")
+        counterparties = store.array("counterparty")
+        debits = store.array("direction") == store.vocabulary("direction").codes.get("debit", -2)
+        labels = store.array("is_laundering")
+    else:
+        store = None
+        vocab = Vocabulary()
+        times = np.array([to_epoch(e.get("timestamp")) for e in entries], dtype=np.int64)
+        order = np.argsort(times, kind="stable")
+        entries = [entries[i] for i in order]
+        times = times[order]
+        accounts = np.array([vocab.encode(e.get("account_id")) for e in entries], dtype=np.int64)
+        counterparties = np.array([vocab.encode(e.get("counterparty")) for e in entries], dtype=np.int64)
+        debits = np.array([e.get("direction") == "debit" for e in entries], dtype=bool)
+        labels = np.array([bool(e.get("is_laundering", False)) for e in entries], dtype=bool)
+
+    if state is None:
+        state = taint_state()
+    first_seen = state["first_seen"]
+    hops = state.setdefault("hops", {})
+    taint_time = np.full(len(vocab), CLEAN, dtype=np.int64)
+    taint_hops = np.zeros(len(vocab), dtype=np.int64)
+    for acct_id, ts in first_seen.items():
+        code = vocab.codes.get(acct_id)
+        if code is not None:
+            taint_time[code] = ts
+            taint_hops[code] = hops.get(acct_id, 0)
+
+    result = taint_labels(
+        times, accounts, counterparties, debits, labels, len(vocab),
+        taint_time=taint_time, taint_hops=taint_hops, max_hops=max_hops, window=window,
+    )
+
+    for code, ts, hop in _tainted(taint_time, taint_hops):
+        acct_id = vocab.values[code]
+        state["tainted"].add(acct_id)
+        first_seen.setdefault(acct_id, ts)
+        hops.setdefault(acct_id, hop)
+
+    if store is not None:
+        store.fill("is_laundering", result, True)
+        return store
+    for entry, labelled in zip(entries, result.tolist()):
+        if labelled:
+            entry["is_laundering"] = True
+    return entries
@@ -7,29 +7,35 @@ from utils.helpers import (
     split_transaction,
     describe_transaction,
 )
+from utils.entry_store import EntryStore
+from generator.entities import OwnershipIndex
 
 def generate_laundering_chains(
-    entities, accounts, known_accounts, start_date, end_date, n_chains=10, min_start_time=None
+    entities, accounts, known_accounts, start_date, end_date, n_chains=10, min_start_time=None, store=None,
+    index=None,
 ):
     """Generate laundering transactions after legitimate activity."""
+    transactions = EntryStore() if store is None else store
+    if index is None:
+        index = OwnershipIndex(entities, accounts)
     if min_start_time:
-        accounts = [
-            a
-            for a in accounts
-            if a.id in min_start_time and min_start_time[a.id] <= end_date
-        ]
+        # Only accounts whose history starts inside the window can take
+        # part, as origins or as intermediaries
+        min_start_time = {
+            acct_id: ts for acct_id, ts in min_start_time.items() if ts <= end_date
+        }
+        accounts = [a for a in accounts if a.id in min_start_time]
 
     # Prefer accounts already marked as laundering agents
     launderer_accounts = [a for a in accounts if getattr(a, "launderer", False)]
     if launderer_accounts:
         accounts = launderer_accounts
-    transactions = []
     for _ in range(n_chains):
         if not accounts:
             break
 
         origin_acct = random.choice(accounts)
-        origin = next((e for e in entities if origin_acct in e.accounts), None)
+        origin = index.owner(origin_acct)
         if origin is None:
             continue
 
@@ -42,21 +48,25 @@ def generate_laundering_chains(
             continue
 
         chain_start = generate_transaction_timestamp(start_date, end_date, override_hours=True)
-        txns = []
         if pattern_type == "layering":
-            txns = generate_layering(origin_acct, intermediaries, chain_start, end_date, known_accounts, min_start_time)
+            generate_layering(origin_acct, intermediaries, chain_start, end_date, known_accounts, min_start_time, store=transactions)
 
         elif pattern_type == "circular":
-            txns = generate_circular(origin_acct, intermediaries, chain_start, end_date, known_accounts, min_start_time)
+            generate_circular(origin_acct, intermediaries, chain_start, end_date, known_accounts, min_start_time, store=transactions)
 
         elif pattern_type == "burst":
-            txns = generate_burst(origin_acct, chain_start, end_date, known_accounts, min_start_time=min_start_time)
-
-        transactions.extend(txns)
+            generate_burst(origin_acct, chain_start, end_date, known_accounts, min_start_time=min_start_time, store=transactions)
 
     return transactions
 
 
+def _history_accounts(entity, valid_map=None):
+    """Return the entity's accounts, limited to those in ``valid_map`` when given."""
+    if not valid_map:
+        return entity.accounts
+    return [a for a in entity.accounts if a.id in valid_map] or entity.accounts
+
+
 def get_intermediaries(origin, entities, min_count=2, valid_map=None):
     potential = [
         e
@@ -73,9 +83,9 @@ def get_intermediaries(origin, entities, min_count=2, valid_map=None):
     return random.sample(potential, min_count)
 
 
-def generate_layering(origin_acct, intermediaries, start, end, known_accounts, min_start_time=None):
-    txns = []
-    chain = [origin_acct] + [random.choice(e.accounts) for e in intermediaries]
+def generate_layering(origin_acct, intermediaries, start, end, known_accounts, min_start_time=None, store=None):
+    txns = EntryStore() if store is None else store
+    chain = [origin_acct] + [random.choice(_history_accounts(e, min_start_time)) for e in intermediaries]
     base_time = generate_transaction_timestamp(start, end, override_hours=True)
     for i in range(len(chain) - 1):
         src, tgt = chain[i], chain[i + 1]
@@ -88,8 +98,8 @@ def generate_layering(origin_acct, intermediaries, start, end, known_accounts, m
         if txn_start > end:
             continue
         ts_dt = generate_transaction_timestamp(txn_start, end, override_hours=True)
-        timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-        post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = ts_dt
+        post_date = generate_post_date(ts_dt)
         amount = round(random.uniform(1000, 5000), 2)
         payment_type = random.choice(["wire", "ach"])
         purpose = "Layering"
@@ -100,7 +110,7 @@ def generate_layering(origin_acct, intermediaries, start, end, known_accounts, m
             else ""
         )
 
-        entries = split_transaction(
+        split_transaction(
             txn_id=txn_id,
             timestamp=timestamp,
             src=src,
@@ -111,9 +121,9 @@ def generate_layering(origin_acct, intermediaries, start, end, known_accounts, m
             is_laundering=True,
             source_description=sd,
             known_accounts=known_accounts,
-            post_date=post_date
+            post_date=post_date,
+            store=txns,
         )
-        txns.extend(entries)
         # Move base_time forward slightly so events are not all at the same moment
         base_time = ts_dt + timedelta(minutes=random.randint(5, 120))
         if base_time > end:
@@ -121,9 +131,9 @@ def generate_layering(origin_acct, intermediaries, start, end, known_accounts, m
     return txns
 
 
-def generate_circular(origin_acct, intermediaries, start, end, known_accounts, min_start_time=None):
-    txns = generate_layering(origin_acct, intermediaries, start, end, known_accounts, min_start_time)
-    final = intermediaries[-1].accounts[0]
+def generate_circular(origin_acct, intermediaries, start, end, known_accounts, min_start_time=None, store=None):
+    txns = generate_layering(origin_acct, intermediaries, start, end, known_accounts, min_start_time, store=store)
+    final = _history_accounts(intermediaries[-1], min_start_time)[0]
     # Return to origin
     txn_id = generate_uuid()
     txn_start = start
@@ -134,8 +144,8 @@ def generate_circular(origin_acct, intermediaries, start, end, known_accounts, m
     if txn_start > end:
         return txns
     ts_dt = generate_transaction_timestamp(txn_start, end, override_hours=True)
-    timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-    post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = ts_dt
+    post_date = generate_post_date(ts_dt)
     amount = round(random.uniform(900, 3000), 2)
     payment_type = random.choice(["wire", "ach"])
     purpose = "Circular Flow"
@@ -146,7 +156,7 @@ def generate_circular(origin_acct, intermediaries, start, end, known_accounts, m
         else ""
     )
 
-    entries = split_transaction(
+    split_transaction(
         txn_id=txn_id,
         timestamp=timestamp,
         src=final,
@@ -157,14 +167,14 @@ def generate_circular(origin_acct, intermediaries, start, end, known_accounts, m
         is_laundering=True,
         source_description=sd,
         known_accounts=known_accounts,
-        post_date=post_date
+        post_date=post_date,
+        store=txns,
     )
-    txns.extend(entries)
     return txns
 
 
-def generate_burst(origin_acct, start, end, known_accounts, n_bursts=5, min_start_time=None):
-    txns = []
+def generate_burst(origin_acct, start, end, known_accounts, n_bursts=5, min_start_time=None, store=None):
+    txns = EntryStore() if store is None else store
     base_time = generate_transaction_timestamp(start, end, override_hours=True)
     for _ in range(n_bursts):
         txn_id = generate_uuid()
@@ -174,8 +184,8 @@ def generate_burst(origin_acct, start, end, known_accounts, n_bursts=5, min_star
         if txn_start > end:
             continue
         ts_dt = generate_transaction_timestamp(txn_start, end, override_hours=True)
-        timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-        post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = ts_dt
+        post_date = generate_post_date(ts_dt)
         amount = round(random.uniform(100, 500), 2)
         payment_type = "ach"
         purpose = "Burst Structuring"
@@ -187,7 +197,7 @@ def generate_burst(origin_acct, start, end, known_accounts, n_bursts=5, min_star
             else ""
         )
 
-        entries = split_transaction(
+        split_transaction(
             txn_id=txn_id,
             timestamp=timestamp,
             src=origin_acct,
@@ -198,9 +208,9 @@ def generate_burst(origin_acct, start, end, known_accounts, n_bursts=5, min_star
             is_laundering=True,
             source_description=sd,
             known_accounts=known_accounts,
-            post_date=post_date
+            post_date=post_date,
+            store=txns,
         )
-        txns.extend(entries)
         base_time = ts_dt + timedelta(minutes=random.randint(5, 120))
         if base_time > end:
             base_time = end
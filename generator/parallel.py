@@ -0,0 +1,239 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from generator.transactions import iter_legit_transactions, legit_engine
+from generator.patterns import inject_pattern_instance
+from utils.entry_store import EntryStore
+from utils.helpers import fake_pool, CHECK_COUNTERS, CHECK_RANGE
+from utils import rng
+
+# Shared world installed in each worker by ``_init_worker``
+_CONTEXT = None
+
+
+def shard_seeds(seed: int, n_shards: int) -> list[int]:
+    """Derive ``n_shards`` independent 64-bit seeds from ``seed``."""
+    children = np.random.SeedSequence(seed).spawn(n_shards)
+    return [int(child.generate_state(1, dtype=np.uint64)[0]) for child in children]
+
+
+def _init_worker(context):
+    global _CONTEXT
+    _CONTEXT = context
+    fake_pool.resize(context.get("faker_pool_size", fake_pool.size))
+    fake_pool.reseed(context.get("faker_pool_seed"))
+
+
+def _run_isolated(fn, context, task):
+    """Run one shard from its own seed with fresh per-shard check counters.
+
+    ``random``, the ID stream and Faker are all reseeded from the task
+    seed (see ``utils.rng.reseed``). Checks are numbered from the range
+    the task reserves with ``check_offset`` (0 when absent). The caller's
+    streams and check counters are restored afterwards, so a shard's
+    output never depends on which process ran it or on what ran before
+    it. Returns the shard's result and the last check number it issued
+    per payor, for ``_merge_check_counters``.
+    """
+    state = rng.get_state()
+    counters = dict(CHECK_COUNTERS)
+    offset = CHECK_RANGE["offset"]
+    CHECK_COUNTERS.clear()
+    CHECK_RANGE["offset"] = task.get("check_offset", 0)
+    rng.reseed(task["seed"])
+    try:
+        return fn(context, task), dict(CHECK_COUNTERS)
+    finally:
+        rng.set_state(state)
+        CHECK_COUNTERS.clear()
+        CHECK_COUNTERS.update(counters)
+        CHECK_RANGE["offset"] = offset
+
+
+def _run_shard(fn, task):
+    return _run_isolated(fn, _CONTEXT, task)
+
+
+def _merge_check_counters(result, shard_counters):
+    """Record the last check number a shard issued per payor; return its result.
+
+    Shards of one stage issue checks from increasing, disjoint ranges, so
+    merged in task order ``CHECK_COUNTERS`` ends up holding every payor's
+    highest number.
+    """
+    CHECK_COUNTERS.update(shard_counters)
+    return result
+
+
+class ShardPool:
+    """Run shard functions in a process pool and yield results in task order.
+
+    ``context`` holds the data every shard needs (accounts, entities, the
+    ownership index, known accounts); it is sent to each worker once when
+    the pool starts. Every task carries its own ``seed`` and runs isolated
+    (see ``_run_isolated``), so a shard produces the same entries whether
+    it runs in a worker or in-process. With ``workers <= 1`` shards run
+    in-process. The parent's check counters are updated as results come
+    back in task order (see ``_merge_check_counters``).
+
+    At most ``prefetch`` shards are in flight at once, which keeps memory
+    bounded when results are streamed to an exporter.
+    """
+
+    def __init__(self, context, workers=1, prefetch=None):
+        self.context = context
+        self.workers = max(1, workers)
+        self.prefetch = prefetch or 2 * self.workers
+        self.executor = None
+        if self.workers > 1:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(context,),
+            )
+
+    def map(self, fn, tasks):
+        if self.executor is None:
+            for task in tasks:
+                yield _merge_check_counters(*_run_isolated(fn, self.context, task))
+            return
+
+        tasks = iter(tasks)
+        pending = deque()
+        for task in tasks:
+            pending.append(self.executor.submit(_run_shard, fn, task))
+            if len(pending) >= self.prefetch:
+                break
+        while pending:
+            result = _merge_check_counters(*pending.popleft().result())
+            task = next(tasks, None)
+            if task is not None:
+                pending.append(self.executor.submit(_run_shard, fn, task))
+            yield result
+
+    def share(self, **values):
+        """Add ``values`` to the context every shard sees.
+
+        Workers only receive the context when they start, so a running
+        pool is restarted with the updated context. Use this for data that
+        is known only after earlier stages ran and is the same for every
+        task of a stage, instead of sending it with each task.
+        """
+        self.context.update(values)
+        if self.executor is not None:
+            self.close()
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.context,),
+            )
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _legit_engine(context):
+    """Return the context's ``legit_engine``, building it on first use.
+
+    Each worker holds its own copy of the context, so the tables and pools
+    are built once per worker and reused by every shard it runs.
+    """
+    engine = context.get("legit_engine")
+    if engine is None:
+        engine = legit_engine(context["accounts"], context["index"], context["known_accounts"])
+        context["legit_engine"] = engine
+    return engine
+
+
+def legit_shard(context, task) -> EntryStore:
+    """Generate one shard of legitimate transactions."""
+    store = EntryStore()
+    if not context["accounts"] or task["n"] <= 0:
+        return store
+    for chunk in iter_legit_transactions(
+        accounts=context["accounts"],
+        entities=context["entities"],
+        n=task["n"],
+        start_date=task["start_date"],
+        end_date=task["end_date"],
+        batch_size=task["n"],
+        engine=_legit_engine(context),
+    ):
+        store.extend(chunk)
+    return store
+
+
+def legit_tasks(n, shard_size, seed, start_date, end_date, check_offset=0):
+    """Split ``n`` transactions into fixed-size shards with their own seeds.
+
+    Shard boundaries depend only on ``n`` and ``shard_size``, never on the
+    number of workers, so the output is the same for any ``--workers``.
+    A shard writes at most one check per transaction, so each one reserves
+    the next ``n`` check numbers per payor from ``check_offset`` on (see
+    ``utils.helpers.next_check_offset``).
+    """
+    sizes = [shard_size] * (n // shard_size)
+    if n % shard_size:
+        sizes.append(n % shard_size)
+    offsets = check_offset + np.cumsum([0] + sizes[:-1])
+    return [
+        {
+            "n": size,
+            "seed": shard_seed,
+            "start_date": start_date,
+            "end_date": end_date,
+            "check_offset": int(offset),
+        }
+        for size, shard_seed, offset in zip(sizes, shard_seeds(seed, len(sizes)), offsets)
+    ]
+
+
+def pattern_shard(context, task) -> EntryStore:
+    """Inject one instance of a laundering pattern."""
+    accounts = [context["accounts"].lookup(acct_id) for acct_id in context["pattern_account_ids"]]
+    return inject_pattern_instance(
+        accounts,
+        task["pattern"],
+        context["known_accounts"],
+        context["min_start_time"],
+    )
+
+
+def pattern_context(accounts, min_start_time):
+    """Return the context entries ``pattern_shard`` reads, for ``ShardPool.share``.
+
+    Only accounts with a ``min_start_time`` take part when one is given.
+    """
+    if min_start_time:
+        accounts = [a for a in accounts if a.id in min_start_time]
+    return {
+        "pattern_account_ids": [a.id for a in accounts],
+        "min_start_time": min_start_time,
+    }
+
+
+def pattern_tasks(pattern_config, seed):
+    """Return one task per pattern instance in ``pattern_config``.
+
+    Tasks carry only the pattern and a seed; the accounts and start times
+    come from the pool's context (see ``pattern_context``).
+    """
+    instances = [
+        pattern
+        for pattern in pattern_config.get("patterns", [])
+        for _ in range(pattern["instances"])
+    ]
+    return [
+        {"pattern": pattern, "seed": instance_seed}
+        for pattern, instance_seed in zip(instances, shard_seeds(seed, len(instances)))
+    ]
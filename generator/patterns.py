@@ -11,37 +11,34 @@ from utils.helpers import (
     generate_post_date,
     safe_sample,
 )
+from utils.entry_store import EntryStore
 
-def inject_patterns(accounts, pattern_config, known_accounts=None, min_start_time=None):
+def inject_patterns(accounts, pattern_config, known_accounts=None, min_start_time=None, store=None):
+    laundering_transactions = EntryStore() if store is None else store
     if min_start_time:
         accounts = [a for a in accounts if a.id in min_start_time]
     if not accounts:
-        return []
-    laundering_transactions = []
+        return laundering_transactions
 
     for pattern in pattern_config.get("patterns", []):
-        pattern_type = pattern["type"]
         for _ in range(pattern["instances"]):
-            if pattern_type == "cycle":
-                txns = inject_cycle_pattern(accounts, pattern, known_accounts, min_start_time)
-            elif pattern_type == "fan_out":
-                txns = inject_fan_out_pattern(accounts, pattern, known_accounts, min_start_time)
-            elif pattern_type == "scatter_gather":
-                txns = inject_scatter_gather_pattern(accounts, pattern, known_accounts, min_start_time)
-            elif pattern_type == "fan_in":
-                txns = inject_fan_in_pattern(accounts, pattern, known_accounts, min_start_time)
-            elif pattern_type == "cash_structuring":
-                txns = inject_cash_structuring_pattern(accounts, pattern, known_accounts, min_start_time)
-            else:
-                print(f"Unsupported pattern type: {pattern_type}")
-                continue
-
-            laundering_transactions.extend(txns)
+            inject_pattern_instance(accounts, pattern, known_accounts, min_start_time, store=laundering_transactions)
 
     return laundering_transactions
 
 
-def inject_cycle_pattern(accounts, pattern, known_accounts, min_start_time=None):
+def inject_pattern_instance(accounts, pattern, known_accounts=None, min_start_time=None, store=None):
+    """Inject a single instance of ``pattern`` using the injector for its type."""
+    transactions = EntryStore() if store is None else store
+    injector = PATTERN_INJECTORS.get(pattern["type"])
+    if injector is None:
+        print(f"Unsupported pattern type: {pattern['type']}")
+        return transactions
+    return injector(accounts, pattern, known_accounts, min_start_time, store=transactions)
+
+
+def inject_cycle_pattern(accounts, pattern, known_accounts, min_start_time=None, store=None):
+    transactions = EntryStore() if store is None else store
     count = pattern.get("accounts_per_cycle", 3)
     amount = pattern.get("amount", 1000)
     currency = pattern.get("currency", "USD")
@@ -56,9 +53,8 @@ def inject_cycle_pattern(accounts, pattern, known_accounts, min_start_time=None)
     selected = safe_sample(eligible, count)
     actual_count = len(selected)
     if actual_count < 2:
-        return []
+        return transactions
 
-    transactions = []
     safe_payment_types = [p for p in PAYMENT_TYPES if p != "cash"]
 
     for i in range(actual_count):
@@ -73,10 +69,10 @@ def inject_cycle_pattern(accounts, pattern, known_accounts, min_start_time=None)
         if txn_start > end_dt:
             continue
         ts_dt = generate_transaction_timestamp(txn_start, end_dt, override_hours=True)
-        timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-        post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = ts_dt
+        post_date = generate_post_date(ts_dt)
 
-        entries = split_transaction(
+        split_transaction(
             txn_id=txn_id,
             timestamp=timestamp,
             src=src,
@@ -86,14 +82,15 @@ def inject_cycle_pattern(accounts, pattern, known_accounts, min_start_time=None)
             payment_type=random.choice(safe_payment_types),
             is_laundering=True,
             known_accounts=known_accounts,
-            post_date=post_date
+            post_date=post_date,
+            store=transactions,
         )
-        transactions.extend(entries)
 
     return transactions
 
 
-def inject_fan_out_pattern(accounts, pattern, known_accounts, min_start_time=None):
+def inject_fan_out_pattern(accounts, pattern, known_accounts, min_start_time=None, store=None):
+    transactions = EntryStore() if store is None else store
     num_targets = pattern.get("targets_per_source", 3)
     amount = pattern.get("amount_per_target", 500)
     currency = pattern.get("currency", "USD")
@@ -108,12 +105,11 @@ def inject_fan_out_pattern(accounts, pattern, known_accounts, min_start_time=Non
         if not min_start_time or min_start_time.get(a.id, start_dt) <= end_dt
     ]
     if len(eligible) < 2:
-        return []
+        return transactions
 
     source = random.choice(eligible)
     targets = safe_sample([a for a in eligible if a.id != source.id], num_targets)
 
-    transactions = []
     for tgt in targets:
         txn_id = generate_uuid()
         txn_start = start_dt
@@ -124,10 +120,10 @@ def inject_fan_out_pattern(accounts, pattern, known_accounts, min_start_time=Non
         if txn_start > end_dt:
             continue
         ts_dt = generate_transaction_timestamp(txn_start, end_dt, override_hours=True)
-        timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-        post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = ts_dt
+        post_date = generate_post_date(ts_dt)
 
-        entries = split_transaction(
+        split_transaction(
             txn_id=txn_id,
             timestamp=timestamp,
             src=source,
@@ -137,14 +133,15 @@ def inject_fan_out_pattern(accounts, pattern, known_accounts, min_start_time=Non
             payment_type=random.choice(safe_payment_types),
             is_laundering=True,
             known_accounts=known_accounts,
-            post_date=post_date
+            post_date=post_date,
+            store=transactions,
         )
-        transactions.extend(entries)
 
     return transactions
 
 
-def inject_scatter_gather_pattern(accounts, pattern, known_accounts, min_start_time=None):
+def inject_scatter_gather_pattern(accounts, pattern, known_accounts, min_start_time=None, store=None):
+    transactions = EntryStore() if store is None else store
     sources = pattern.get("sources", 1)
     intermediates = pattern.get("intermediates", 3)
     sinks = pattern.get("sinks", 1)
@@ -168,9 +165,7 @@ def inject_scatter_gather_pattern(accounts, pattern, known_accounts, min_start_t
     sink_accounts = [accounts_pool.pop() for _ in range(min(sinks, len(accounts_pool)))]
 
     if not src_accounts or not int_accounts or not sink_accounts:
-        return []
-
-    transactions = []
+        return transactions
 
     # Scatter: sources → intermediates
     for src in src_accounts:
@@ -184,10 +179,10 @@ def inject_scatter_gather_pattern(accounts, pattern, known_accounts, min_start_t
             if txn_start > end_dt:
                 continue
             ts_dt = generate_transaction_timestamp(txn_start, end_dt, override_hours=True)
-            timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-            post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
+            timestamp = ts_dt
+            post_date = generate_post_date(ts_dt)
 
-            entries = split_transaction(
+            split_transaction(
                 txn_id=txn_id,
                 timestamp=timestamp,
                 src=src,
@@ -197,9 +192,9 @@ def inject_scatter_gather_pattern(accounts, pattern, known_accounts, min_start_t
                 payment_type=random.choice(safe_payment_types),
                 is_laundering=True,
                 known_accounts=known_accounts,
-                post_date=post_date
+                post_date=post_date,
+                store=transactions,
             )
-            transactions.extend(entries)
 
     # Gather: intermediates → sinks
     for int_acct in int_accounts:
@@ -213,10 +208,10 @@ def inject_scatter_gather_pattern(accounts, pattern, known_accounts, min_start_t
             if txn_start > end_dt:
                 continue
             ts_dt = generate_transaction_timestamp(txn_start, end_dt, override_hours=True)
-            timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-            post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
+            timestamp = ts_dt
+            post_date = generate_post_date(ts_dt)
 
-            entries = split_transaction(
+            split_transaction(
                 txn_id=txn_id,
                 timestamp=timestamp,
                 src=int_acct,
@@ -226,13 +221,14 @@ def inject_scatter_gather_pattern(accounts, pattern, known_accounts, min_start_t
                 payment_type=random.choice(safe_payment_types),
                 is_laundering=True,
                 known_accounts=known_accounts,
-                post_date=post_date
+                post_date=post_date,
+                store=transactions,
             )
-            transactions.extend(entries)
 
     return transactions
 
-def inject_fan_in_pattern(accounts, pattern, known_accounts, min_start_time=None):
+def inject_fan_in_pattern(accounts, pattern, known_accounts, min_start_time=None, store=None):
+    transactions = EntryStore() if store is None else store
     sources_per_target = pattern.get("sources_per_target", 5)
     amount_per_source = pattern.get("amount_per_source", 200)
     currency = pattern.get("currency", "USD")
@@ -241,15 +237,13 @@ def inject_fan_in_pattern(accounts, pattern, known_accounts, min_start_time=None
 
     safe_payment_types = [p for p in PAYMENT_TYPES if p != "cash"]
 
-    transactions = []
-
     eligible = [
         a
         for a in accounts
         if not min_start_time or min_start_time.get(a.id, start_dt) <= end_dt
     ]
     if len(eligible) < 2:
-        return []
+        return transactions
 
     target = random.choice(eligible)
     sources = safe_sample([a for a in eligible if a.id != target.id], sources_per_target)
@@ -264,8 +258,8 @@ def inject_fan_in_pattern(accounts, pattern, known_accounts, min_start_time=None
         if txn_start > end_dt:
             continue
         ts_dt = generate_transaction_timestamp(txn_start, end_dt, override_hours=True)
-        timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-        post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = ts_dt
+        post_date = generate_post_date(ts_dt)
         payment_type = random.choice(safe_payment_types)
 
         sd = (
@@ -274,7 +268,7 @@ def inject_fan_in_pattern(accounts, pattern, known_accounts, min_start_time=None
             else ""
         )
 
-        entries = split_transaction(
+        split_transaction(
             txn_id=txn_id,
             timestamp=timestamp,
             src=src,
@@ -285,15 +279,15 @@ def inject_fan_in_pattern(accounts, pattern, known_accounts, min_start_time=None
             is_laundering=True,
             source_description=sd,
             known_accounts=known_accounts,
-            post_date=post_date
+            post_date=post_date,
+            store=transactions,
         )
 
-        transactions.extend(entries)
-
     return transactions
 
 
-def inject_cash_structuring_pattern(accounts, pattern, known_accounts, min_start_time=None):
+def inject_cash_structuring_pattern(accounts, pattern, known_accounts, min_start_time=None, store=None):
+    transactions = EntryStore() if store is None else store
     accounts_per_pattern = pattern.get("accounts", 1)
     txns_per_account = pattern.get("transactions_per_account", 5)
     max_deposit = pattern.get("max_deposit", 10000)
@@ -309,7 +303,6 @@ def inject_cash_structuring_pattern(accounts, pattern, known_accounts, min_start
     ]
     selected = safe_sample(eligible, accounts_per_pattern)
 
-    transactions = []
     for acct in selected:
         for _ in range(txns_per_account):
             deposit = random.choice([True, False])
@@ -325,14 +318,14 @@ def inject_cash_structuring_pattern(accounts, pattern, known_accounts, min_start
             if txn_start > end_dt:
                 continue
             ts_dt = generate_transaction_timestamp(txn_start, end_dt, override_hours=True)
-            timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-            post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
+            timestamp = ts_dt
+            post_date = generate_post_date(ts_dt)
             txn_id = generate_uuid()
 
             src = None if deposit else acct
             tgt = acct if deposit else None
 
-            entries = split_transaction(
+            split_transaction(
                 txn_id=txn_id,
                 timestamp=timestamp,
                 src=src,
@@ -344,7 +337,17 @@ def inject_cash_structuring_pattern(accounts, pattern, known_accounts, min_start
                 known_accounts=known_accounts,
                 post_date=post_date,
                 channel=channel,
+                store=transactions,
             )
-            transactions.extend(entries)
 
     return transactions
+
+
+# Pattern ``type`` values understood by ``inject_pattern_instance``
+PATTERN_INJECTORS = {
+    "cycle": inject_cycle_pattern,
+    "fan_out": inject_fan_out_pattern,
+    "scatter_gather": inject_scatter_gather_pattern,
+    "fan_in": inject_fan_in_pattern,
+    "cash_structuring": inject_cash_structuring_pattern,
+}
@@ -0,0 +1,78 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from utils.logger import log
+
+# Sheets of the agent profiles workbook used by the generator
+PROFILE_SHEETS = ("banks", "People", "Companies1", "Combined_Data")
+
+
+def _cache_paths(path, cache_dir):
+    """Return the cache file prefix for ``path``, keyed on its path, mtime and size."""
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}-{digest}")
+
+
+class ProfileBook:
+    """Sheets of an agent profiles workbook, parsed once per run.
+
+    Every sheet in ``PROFILE_SHEETS`` is read in a single pass over the
+    workbook the first time any of them is requested and shared by
+    ``generate_entities`` and ``generate_profile_transactions``. When
+    ``cache_dir`` is set the parsed frames are also written there as
+    Parquet, keyed on the workbook's path, modification time and size, so
+    later runs skip openpyxl entirely until the workbook changes.
+    """
+
+    def __init__(self, path, cache_dir=None):
+        self.path = path
+        self.cache_dir = cache_dir
+        self._frames = None
+
+    @property
+    def frames(self) -> dict:
+        if self._frames is None:
+            self._frames = self._load()
+        return self._frames
+
+    def sheet(self, name):
+        """Return the parsed sheet ``name``, or ``None`` when the workbook lacks it."""
+        return self.frames.get(name)
+
+    def _load(self) -> dict:
+        prefix = _cache_paths(self.path, self.cache_dir) if self.cache_dir else None
+        # The manifest lists the sheets the workbook had; it is written last
+        manifest = prefix and f"{prefix}.sheets"
+        if manifest and os.path.exists(manifest):
+            with open(manifest) as f:
+                present = f.read().split()
+            try:
+                return {sheet: pd.read_parquet(f"{prefix}-{sheet}.parquet") for sheet in present}
+            except Exception:
+                pass
+
+        with pd.ExcelFile(self.path) as book:
+            present = [s for s in PROFILE_SHEETS if s in book.sheet_names]
+            frames = {sheet: book.parse(sheet) for sheet in present}
+
+        if manifest:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                for sheet, df in frames.items():
+                    df.to_parquet(f"{prefix}-{sheet}.parquet")
+                with open(manifest, "w") as f:
+                    f.write("\n".join(present))
+            except Exception as exc:
+                # Caching is an optimisation; the frames are already parsed
+                log(f"⚠️  Could not cache agent profiles in {self.cache_dir}: {exc}")
+        return frames
+
+
+def default_cache_dir(path):
+    """Return the cache directory used for ``path`` when none is given."""
+    return os.path.join(os.path.dirname(os.path.abspath(path)), ".profile_cache")
@@ -1,17 +1,27 @@
 import random
+from itertools import accumulate
 from datetime import datetime, timedelta
 
+import numpy as np
+
 from utils.helpers import (
     generate_uuid,
-    generate_transaction_timestamp,
-    generate_post_date,
     to_datetime,
     split_transaction,
     describe_transaction,
     suggest_transaction_type,
-    fake,
+    suggest_transaction_types,
+    fake_pool,
     generate_card_number,
+    generate_transaction_timestamps,
+    business_hours_sampler,
+    generate_post_dates,
+    generate_uuids,
+    next_check_number,
+    numpy_rng,
 )
+from utils.entry_store import EntryStore
+from generator.entities import OwnershipIndex
 import pandas as pd
 
 # Common payment types
@@ -29,6 +39,12 @@ ATM_LIMIT = 500  # Max cash that can be dispensed at an ATM
 class ProfileAccount:
     """Lightweight account object used for profile-driven transactions."""
 
+    __slots__ = (
+        "id", "owner_id", "owner_type", "owner_name", "bank_name", "address", "swift_code",
+        "routing_number", "country", "credit_card_number", "debit_card_number",
+        "receiving_method", "bank_code", "launderer",
+    )
+
     def __init__(
         self,
         id,
@@ -59,13 +75,240 @@ class ProfileAccount:
         self.debit_card_number = debit_card_number
         self.receiving_method = receiving_method
         self.bank_code = bank_code
-        # Alias for backward compatibility
-        self.bank = bank_code
         self.launderer = launderer
 
+    @property
+    def bank(self):
+        # Alias for backward compatibility
+        return self.bank_code
+
+
+class ProfileAccountRegistry:
+    """One ``ProfileAccount`` per profile entity, shared by every transaction.
+
+    Accounts are built from the entity's profile row and ``bank_lookup`` the
+    first time they are requested; later requests return the same object.
+    Merchants get the ``Merchant`` owner type and persons and companies
+    their card numbers from ``card_numbers``.
+    """
+
+    def __init__(self, profile_df, bank_lookup=None, card_numbers=None, recv_methods=None):
+        self.rows = {}
+        for row in profile_df.to_dict("records"):
+            self.rows.setdefault(row.get("entity_id"), row)
+        self.bank_lookup = bank_lookup or {}
+        self.card_numbers = card_numbers or {}
+        self.recv_methods = recv_methods or {}
+        self._accounts = {}
+
+    def get(self, entity_id) -> ProfileAccount:
+        acct = self._accounts.get(entity_id)
+        if acct is None:
+            acct = self._accounts[entity_id] = self._build(self.rows[entity_id])
+        return acct
+
+    def _build(self, row) -> ProfileAccount:
+        entity_id = row["entity_id"]
+        acct_id = row.get("account_number")
+        if pd.isna(acct_id):
+            acct_id = entity_id
+        bank_code = str(row.get("bank"))
+        bank_data = self.bank_lookup.get(bank_code, {})
+        ent_type = str(row.get("type"))
+        cards = self.card_numbers.get(entity_id, {})
+        return ProfileAccount(
+            id=acct_id,
+            owner_id=entity_id,
+            owner_type="Merchant" if ent_type == "merchant" else ent_type.capitalize(),
+            owner_name=row.get("name", ""),
+            bank_name=bank_data.get("name", ""),
+            bank_code=bank_code,
+            address=row.get("address", ""),
+            swift_code=bank_data.get("swift_code"),
+            routing_number=bank_data.get("routing_number"),
+            credit_card_number=cards.get("credit"),
+            debit_card_number=cards.get("debit"),
+            receiving_method=self.recv_methods.get(entity_id),
+            launderer=False,
+        )
+
+
+def _naics_prefix(code) -> str:
+    """Return a merchant-pattern code as the NAICS prefix it matches."""
+    code = str(code)
+    if code.strip().replace('.', '', 1).isdigit():
+        return str(int(float(code)))
+    return code
+
+
+def _payment_options(merchant):
+    """Return the payment types a merchant accepts and their cumulative weights.
+
+    The weights are ``None`` unless a probability is given for every type.
+    """
+    pay_opts = (
+        merchant.get("accepted_payment_methods")
+        or merchant.get("accepted_payment_types")
+    )
+    if isinstance(pay_opts, str) and pay_opts.strip():
+        raw_types = [p.strip().lower() for p in pay_opts.split(',') if p.strip()]
+        payment_types = ["check" if pt == "c_check" else pt for pt in raw_types]
+    else:
+        payment_types = PAYMENT_TYPES
+    prob_str = (
+        merchant.get("transaction_probability")
+        or merchant.get("payment_probabilities")
+    )
+    probabilities = None
+    if isinstance(prob_str, str) and prob_str.strip():
+        try:
+            probabilities = [float(x.strip()) for x in prob_str.split(',') if x.strip()]
+        except ValueError:
+            probabilities = None
+    if probabilities and len(probabilities) == len(payment_types):
+        return payment_types, list(accumulate(probabilities))
+    return payment_types, None
+
+
+class MerchantIndex:
+    """Merchant rows indexed by every prefix of their NAICS code.
+
+    ``lookup(code)`` returns the positions (into ``records``) of the
+    merchants whose ``naics_code`` starts with ``code``, so picking a
+    merchant for a pattern is a single random index instead of a scan of
+    the merchant frame. ``payment_options`` holds each merchant's parsed
+    payment types and cumulative weights (see ``_payment_options``).
+    """
+
+    def __init__(self, merchants: pd.DataFrame):
+        self.records = merchants.to_dict("records")
+        self.payment_options = [_payment_options(m) for m in self.records]
+        self.by_prefix: dict[str, list[int]] = {}
+        for pos, naics in enumerate(merchants["naics_code"].astype(str)):
+            for end in range(1, len(naics) + 1):
+                self.by_prefix.setdefault(naics[:end], []).append(pos)
+
+    def lookup(self, code) -> list[int]:
+        prefix = _naics_prefix(code)
+        if not prefix:
+            return list(range(len(self.records)))
+        return self.by_prefix.get(prefix, [])
+
+    @property
+    def average_expense(self) -> np.ndarray:
+        """Each merchant's ``average_expense`` (100.0 where missing)."""
+        values = np.array([m.get("average_expense") for m in self.records], dtype=float)
+        return np.where(np.isnan(values), 100.0, values)
+
+    def draw(self, codes, rng: np.random.Generator) -> np.ndarray:
+        """Pick one merchant matching each NAICS code, uniformly at random.
+
+        Every code must match at least one merchant (see ``lookup``).
+        """
+        codes = np.asarray(codes, dtype=object)
+        picked = np.empty(len(codes), dtype=np.int64)
+        for code in dict.fromkeys(codes.tolist()):
+            rows = np.flatnonzero(codes == code)
+            positions = np.asarray(self.lookup(code), dtype=np.int64)
+            picked[rows] = positions[rng.integers(0, len(positions), size=len(rows))]
+        return picked
+
+    def draw_payment_types(self, merchant_pos, rng: np.random.Generator) -> list[str]:
+        """Draw a payment type for each row from its merchant's options."""
+        merchant_pos = np.asarray(merchant_pos, dtype=np.int64)
+        picked = np.empty(len(merchant_pos), dtype=object)
+        for pos in np.unique(merchant_pos):
+            rows = np.flatnonzero(merchant_pos == pos)
+            payment_types, cum_weights = self.payment_options[pos]
+            if cum_weights:
+                u = rng.random(len(rows)) * cum_weights[-1]
+                choice = np.searchsorted(cum_weights, u, side="right")
+                choice = np.minimum(choice, len(payment_types) - 1)
+            else:
+                choice = rng.integers(0, len(payment_types), size=len(rows))
+            picked[rows] = np.asarray(payment_types, dtype=object)[choice]
+        return picked.tolist()
+
+
+def _split_list_column(values: pd.Series) -> pd.DataFrame:
+    """Explode comma-separated strings into (row, position, item) records.
+
+    Empty items are dropped before positions are assigned, matching
+    ``[x.strip() for x in value.split(',') if x.strip()]``.
+    """
+    items = values.str.split(",").explode().str.strip()
+    items = items[items.notna() & (items != "")]
+    return pd.DataFrame({
+        "payer": items.index.to_numpy(),
+        "k": items.groupby(level=0).cumcount().to_numpy(),
+        "item": items.to_numpy(),
+    })
+
+
+def _expand_payer_patterns(payers: pd.DataFrame, merchant_index: MerchantIndex) -> dict:
+    """Expand each payer's merchant patterns into one row per transaction.
+
+    ``merchant_patterns`` and ``merchant_frequency`` are parsed for all
+    payers at once and paired positionally (extra items on either side
+    are ignored). Each (payer, code) pair yields ``max(1, round(freq))``
+    rows. Pairs whose frequency is not a number or whose code matches no
+    merchant are dropped. Returns the row-wise ``payer`` positions (into
+    ``payers``) and NAICS ``code`` strings.
+    """
+    payers = payers.reset_index(drop=True)
+    is_text = (
+        payers["merchant_patterns"].map(lambda v: isinstance(v, str))
+        & payers["merchant_frequency"].map(lambda v: isinstance(v, str))
+    )
+    payers = payers[is_text]
+    codes = _split_list_column(payers["merchant_patterns"])
+    freqs = _split_list_column(payers["merchant_frequency"])
+    table = codes.merge(freqs, on=["payer", "k"], suffixes=("_code", "_freq"))
+
+    freq = pd.to_numeric(table["item_freq"], errors="coerce").to_numpy()
+    matches = {code: bool(merchant_index.lookup(code)) for code in table["item_code"].unique()}
+    has_merchant = table["item_code"].map(matches).to_numpy(dtype=bool)
+    keep = ~np.isnan(freq) & has_merchant
+    counts = np.maximum(1, np.round(freq[keep]).astype(np.int64))
+    return {
+        "payer": np.repeat(table["payer"].to_numpy()[keep], counts),
+        "code": np.repeat(table["item_code"].to_numpy(dtype=object)[keep], counts),
+    }
+
+
+# Supported pay schedules and how many paychecks each gives per year
+PAY_PERIODS_PER_YEAR = {"weekly": 52, "biweekly": 26, "semimonthly": 24}
+PAY_FREQUENCIES = tuple(PAY_PERIODS_PER_YEAR)
+DEFAULT_PAY_FREQUENCY = "semimonthly"
+# Semimonthly paycheck before the employee's transaction scaler
+BASE_PAYCHECK = 5000
+# Monday that biweekly schedules count from, so they line up across runs
+BIWEEKLY_ANCHOR = datetime(2024, 1, 1)
+
+
+def get_payroll_dates(start_dt: datetime, end_dt: datetime,
+                      frequency: str = DEFAULT_PAY_FREQUENCY) -> list[datetime]:
+    """Return payroll dates within range for a pay ``frequency``.
+
+    ``semimonthly`` pays on the 1st and 3rd Monday of each month,
+    ``weekly`` on every Monday and ``biweekly`` on every other Monday
+    counted from ``BIWEEKLY_ANCHOR``.
+    """
+    if frequency in ("weekly", "biweekly"):
+        current = start_dt + timedelta(days=(0 - start_dt.weekday()) % 7)
+        step = 7
+        if frequency == "biweekly":
+            step = 14
+            if (current - BIWEEKLY_ANCHOR).days % 14:
+                current += timedelta(days=7)
+        dates = []
+        while current <= end_dt:
+            dates.append(current)
+            current += timedelta(days=step)
+        return dates
+    if frequency != "semimonthly":
+        raise ValueError(f"Unknown pay frequency: {frequency}")
 
-def get_payroll_dates(start_dt: datetime, end_dt: datetime) -> list[datetime]:
-    """Return payroll dates (1st and 3rd Monday) within range."""
     dates = []
     current = start_dt.replace(day=1)
     while current <= end_dt:
@@ -83,97 +326,651 @@ def get_payroll_dates(start_dt: datetime, end_dt: datetime) -> list[datetime]:
     return dates
 
 
-def generate_legit_transactions(accounts, entities, n=1000, start_date="2025-01-01", end_date="2025-01-31", known_accounts=None):
-    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-    known_accounts = set(known_accounts) if known_accounts else set()
+# How often merchants take accumulated cash to the bank
+CASH_DEPOSIT_FREQUENCIES = ("daily", "weekly")
+DEFAULT_CASH_DEPOSIT_FREQUENCY = "daily"
+# Largest single teller entry when a merchant deposits held cash
+TELLER_DEPOSIT_LIMIT = 5000
+# Most ATM entries a merchant makes per cash deposit
+MAX_ATM_DEPOSITS = 3
+
+
+def _hold_cash(pending, merchant_pos, amount, timestamp):
+    """Record a cash sale the merchant will deposit later."""
+    pending[0].append(int(merchant_pos))
+    pending[1].append(amount)
+    pending[2].append(int(timestamp))
+
+
+def _cash_deposit_plan(merchants, amounts, timestamps, end_dt, frequency, rng):
+    """Group held cash into one deposit per merchant per day or week.
+
+    Each deposit carries the full amount held in its period and is made
+    30 minutes to 4 hours after the period's last cash sale, rolled to the
+    next banking window (Company business hours) when that falls outside
+    one. A deposit with no banking window left before ``end_dt`` falls
+    after the dataset and is dropped. Weeks start on Monday. Returns
+    row-wise ``merchant`` positions, ``amount`` totals and
+    ``datetime64[s]`` ``timestamp`` arrays ordered by merchant and period,
+    or ``None`` when nothing is deposited.
+    """
+    if frequency not in CASH_DEPOSIT_FREQUENCIES:
+        raise ValueError(f"Unknown cash deposit frequency: {frequency}")
+    if not merchants:
+        return None
+    merchants = np.asarray(merchants, dtype=np.int64)
+    amounts = np.asarray(amounts, dtype=float)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+
+    period = timestamps // 86400
+    if frequency == "weekly":
+        # Day 0 (1970-01-01) was a Thursday
+        period = (period + 3) // 7
+    order = np.lexsort((timestamps, period, merchants))
+    merchants, amounts, timestamps, period = (
+        merchants[order], amounts[order], timestamps[order], period[order]
+    )
+    starts = np.flatnonzero(
+        np.r_[True, (merchants[1:] != merchants[:-1]) | (period[1:] != period[:-1])]
+    )
+    ends = np.r_[starts[1:], len(merchants)] - 1
+
+    delay = rng.integers(30 * 60, 4 * 3600, size=len(starts), endpoint=True)
+    opening_delay = rng.integers(0, 3600, size=len(starts))
+    start = int(timestamps.min()) // 86400 * 86400
+    sampler = business_hours_sampler(
+        np.datetime64(start, "s").astype(datetime), end_dt, "Company"
+    )
+    due = timestamps[ends] + delay - start
+    deposit_at = sampler.roll_forward(due)
+    # Deposits rolled to the next opening arrive within its first hour
+    rolled = (deposit_at != due) & (deposit_at >= 0)
+    deposit_at[rolled] = sampler.roll_forward(deposit_at[rolled] + opening_delay[rolled])
+    keep = deposit_at >= 0
+    if not keep.any():
+        return None
+    return {
+        "merchant": merchants[starts][keep],
+        "amount": np.add.reduceat(amounts, starts)[keep],
+        "timestamp": (deposit_at[keep] + start).astype("datetime64[s]"),
+    }
 
-    transactions = []
-    attempts = 0
-    skipped_visibility = 0
-    skipped_known = 0
-    skipped_payment_type = 0
-    success = 0
 
-    while success < n and attempts < n * 10:  # Avoid infinite loops
-        attempts += 1
+def _split_cash_deposits(totals, rng):
+    """Split each deposit total into ATM and teller entries that add up to it.
+
+    Up to ``MAX_ATM_DEPOSITS`` ATM entries of whole $20 notes (at most
+    ``ATM_LIMIT`` each) take part of the notes; the rest, coins included,
+    is paid in at the teller in equal entries of at most
+    ``TELLER_DEPOSIT_LIMIT``. Amounts are split in cents so the entries
+    of a deposit add up to its total rounded to the cent. Returns
+    row-wise ``deposit`` indices into ``totals``, ``amount`` and ``atm``
+    flags, ordered by deposit.
+    """
+    cents = np.round(np.asarray(totals, dtype=float) * 100).astype(np.int64)
+    atm_limit, teller_limit = ATM_LIMIT * 100, TELLER_DEPOSIT_LIMIT * 100
+    notes = cents // 2000 * 2000
+    atm_visits = rng.integers(0, MAX_ATM_DEPOSITS, size=len(cents), endpoint=True)
+    atm = np.minimum(notes, atm_visits * atm_limit)
+    teller = cents - atm
+    n_atm = -(-atm // atm_limit)
+    n_teller = -(-teller // teller_limit)
+
+    counts = n_atm + n_teller
+    deposit = np.repeat(np.arange(len(cents)), counts)
+    part = np.arange(len(deposit)) - np.repeat(np.cumsum(counts) - counts, counts)
+    n_atm, n_teller = n_atm[deposit], n_teller[deposit]
+    atm, teller = atm[deposit], teller[deposit]
+    is_atm = part < n_atm
+    teller_part = np.maximum(n_teller, 1)
+    share = teller // teller_part
+    amount = np.where(
+        is_atm,
+        np.where(part == n_atm - 1, atm - atm_limit * (n_atm - 1), atm_limit),
+        np.where(part - n_atm == n_teller - 1, teller - share * (n_teller - 1), share),
+    )
+    return {"deposit": deposit, "amount": amount / 100, "atm": is_atm}
+
+
+def _payroll_plan(profile_df, start_dt, end_dt, pay_frequency, rng):
+    """Cross join employees with their employer's pay dates.
+
+    Each company pays on its ``pay_frequency`` column when that holds a
+    known frequency, otherwise on ``pay_frequency``. Paychecks are scaled
+    so annual pay is the same for every schedule. Returns row-wise arrays
+    (ordered by pay date, then employee) of employee and employer ids,
+    amounts and ``datetime64[s]`` timestamps within company hours on
+    the pay date.
+    """
+    if pay_frequency not in PAY_PERIODS_PER_YEAR:
+        raise ValueError(f"Unknown pay frequency: {pay_frequency}")
+    employees = profile_df[(profile_df["type"] == "person") & profile_df["employer"].notna()]
+    companies = profile_df[profile_df["type"] == "company"].drop_duplicates("entity_id")
+    company_freq = {}
+    if "pay_frequency" in companies:
+        for ent_id, freq in zip(companies["entity_id"], companies["pay_frequency"]):
+            if isinstance(freq, str) and freq.strip().lower() in PAY_PERIODS_PER_YEAR:
+                company_freq[ent_id] = freq.strip().lower()
+    company_ids = set(companies["entity_id"])
+
+    emp_ids = []
+    employer_ids = []
+    scalers = []
+    freqs = []
+    for emp in employees.to_dict("records"):
+        employer_id = emp.get("employer")
+        if employer_id not in company_ids:
+            continue
+        emp_ids.append(emp["entity_id"])
+        employer_ids.append(employer_id)
+        scalers.append(float(emp.get("transaction_scaler") or 1))
+        freqs.append(company_freq.get(employer_id, pay_frequency))
+    freqs = np.array(freqs, dtype=object)
 
-        # Randomly choose a primary account and its owning entity
-        primary_acct = random.choice(accounts)
-        primary_entity = next((e for e in entities if e.id == primary_acct.owner_id), None)
-        if not primary_entity:
+    emp_pos = []
+    dates = []
+    for frequency in PAY_FREQUENCIES:
+        members = np.flatnonzero(freqs == frequency)
+        pay_dates = get_payroll_dates(start_dt, end_dt, frequency)
+        if not len(members) or not pay_dates:
             continue
+        days = np.array(pay_dates, dtype="datetime64[D]")
+        emp_pos.append(np.tile(members, len(days)))
+        dates.append(np.repeat(days, len(members)))
+    if not emp_pos:
+        return None
+    emp_pos = np.concatenate(emp_pos)
+    dates = np.concatenate(dates)
+    order = np.lexsort((emp_pos, dates))
+    emp_pos = emp_pos[order]
+    dates = dates[order]
+
+    periods = np.array([PAY_PERIODS_PER_YEAR[f] for f in freqs], dtype=float)
+    paycheck = BASE_PAYCHECK * PAY_PERIODS_PER_YEAR["semimonthly"] / periods[emp_pos]
+    amounts = rng.uniform(paycheck * 0.9, paycheck * 1.1) * np.array(scalers)[emp_pos]
+
+    timestamps = np.empty(len(dates), dtype="datetime64[s]")
+    for day in np.unique(dates):
+        rows = np.flatnonzero(dates == day)
+        pay_start = day.astype(datetime)
+        pay_start = datetime(pay_start.year, pay_start.month, pay_start.day, 8)
+        pay_end = pay_start.replace(hour=16, minute=59, second=59)
+        timestamps[rows] = business_hours_sampler(pay_start, pay_end, "Company").draw_many(len(rows), rng)
+
+    return {
+        "employee": [emp_ids[i] for i in emp_pos],
+        "employer": [employer_ids[i] for i in emp_pos],
+        "amount": amounts,
+        "timestamp": timestamps,
+    }
 
-        sender_rules = primary_entity.get_allowed_transactions()
-        if not sender_rules:
-            skipped_payment_type += 1
+
+def _legit_tables(accounts, index):
+    """Precompute the lookup arrays used by the legit batch engine.
+
+    Allowed payment types and purposes are flattened into tables keyed by a
+    rule-set id so a whole block of draws can be resolved with array indexing.
+    """
+    entities = index.entities
+    acct_entity = index.owner_rows(accounts)
+
+    rule_ids = {}
+    entity_rule = np.full(len(entities), -1, dtype=np.int64)
+    key_offset, key_count = [], []
+    pt_names, purpose_offset, purpose_count, purposes = [], [], [], []
+    for i, ent in enumerate(entities):
+        rules = ent.get_allowed_transactions()
+        if not rules:
             continue
+        sig = tuple((k, tuple(v)) for k, v in rules.items())
+        if sig not in rule_ids:
+            rule_ids[sig] = len(key_offset)
+            key_offset.append(len(pt_names))
+            key_count.append(len(sig))
+            for key, options in sig:
+                pt_names.append(key)
+                purpose_offset.append(len(purposes))
+                purpose_count.append(len(options))
+                purposes.extend(options)
+        entity_rule[i] = rule_ids[sig]
+
+    visibility = np.array([e.visibility for e in entities], dtype=object)
+    return {
+        "acct_entity": acct_entity,
+        "entity_rule": entity_rule,
+        "entity_is_company": np.array([e.__class__.__name__ == "Company" for e in entities], dtype=bool),
+        "entity_sends": np.isin(visibility, ["sender", "both"]),
+        "entity_receives": np.isin(visibility, ["receiver", "both"]),
+        "key_offset": np.array(key_offset, dtype=np.int64),
+        "key_count": np.array(key_count, dtype=np.int64),
+        "pt_names": np.array(pt_names, dtype=object),
+        "pt_is_cash": np.array([p.lower() == "cash" for p in pt_names], dtype=bool),
+        "purpose_offset": np.array(purpose_offset, dtype=np.int64),
+        "purpose_count": np.array(purpose_count, dtype=np.int64),
+        "purposes": np.array(purposes, dtype=object),
+        "purpose_is_deposit": np.array([str(p).lower() == "deposit" for p in purposes], dtype=bool),
+    }
+
+
+def _legit_pools(tables, known_mask):
+    """Build eligibility-aware sampling pools for the legit batch engine.
+
+    Accounts fall into classes keyed by (rule set, known, sends, receives).
+    Within a class every (payment type, purpose) pair gets the probability the
+    old draw-and-reject loop would have accepted it with, so sampling from
+    the pools gives the same mix of transactions without any wasted draws.
+    Targets are drawn from the receiver pool (or the known-receiver pool when
+    the sender is not a known account).
+    """
+    n_accounts = len(known_mask)
+    ent = tables["acct_entity"]
+    has_owner = ent >= 0
+    safe_ent = np.maximum(ent, 0)
+    rule = np.where(has_owner, tables["entity_rule"][safe_ent], -1)
+    sends = has_owner & tables["entity_sends"][safe_ent]
+    receives = has_owner & tables["entity_receives"][safe_ent]
+
+    receivers = np.flatnonzero(receives)
+    known_receivers = np.flatnonzero(receives & known_mask)
+    receiver_pos = np.full(n_accounts, -1, dtype=np.int64)
+    receiver_pos[receivers] = np.arange(len(receivers))
+    known_receiver_pos = np.full(n_accounts, -1, dtype=np.int64)
+    known_receiver_pos[known_receivers] = np.arange(len(known_receivers))
+
+    account_class = np.where(
+        rule >= 0,
+        rule * 8 + known_mask * 4 + sends * 2 + receives,
+        -1,
+    )
+    class_pairs = {}
+    class_weight = np.zeros(len(tables["key_offset"]) * 8, dtype=np.float64)
+    for cls in np.unique(account_class[account_class >= 0]).tolist():
+        r, flags = divmod(cls, 8)
+        known, can_send, can_receive = bool(flags & 4), bool(flags & 2), bool(flags & 1)
+        if known:
+            n_targets = len(receivers) - can_receive
+        else:
+            n_targets = len(known_receivers)
+        target_share = n_targets / (n_accounts - 1) if n_accounts > 1 else 0.0
+
+        keys, purposes, weights = [], [], []
+        first_key = tables["key_offset"][r]
+        n_keys = tables["key_count"][r]
+        for key in range(first_key, first_key + n_keys):
+            first_purpose = tables["purpose_offset"][key]
+            n_purposes = tables["purpose_count"][key]
+            base = 1.0 / (n_keys * n_purposes)
+            for purpose in range(first_purpose, first_purpose + n_purposes):
+                if tables["pt_is_cash"][key]:
+                    if tables["purpose_is_deposit"][purpose]:
+                        ok = known and can_receive
+                    else:
+                        ok = known and can_send
+                    weight = base if ok else 0.0
+                else:
+                    weight = base * target_share if can_send else 0.0
+                keys.append(key)
+                purposes.append(purpose)
+                weights.append(weight)
+        cdf = np.cumsum(weights)
+        class_weight[cls] = cdf[-1]
+        class_pairs[cls] = (np.array(keys), np.array(purposes), cdf)
+
+    account_weight = np.where(account_class >= 0, class_weight[np.maximum(account_class, 0)], 0.0)
+    return {
+        "account_cdf": np.cumsum(account_weight),
+        "account_class": account_class,
+        "class_pairs": class_pairs,
+        "receivers": receivers,
+        "known_receivers": known_receivers,
+        "receiver_pos": receiver_pos,
+        "known_receiver_pos": known_receiver_pos,
+    }
+
+
+def _draw_from_pool(pool, pos, exclude, rng):
+    """Draw one member of ``pool`` per row, never returning ``exclude``."""
+    excluded = pos[exclude] >= 0
+    size = len(pool) - excluded
+    pick = (rng.random(len(exclude)) * size).astype(np.int64)
+    pick += excluded & (pick >= pos[exclude])
+    return pool[np.minimum(pick, len(pool) - 1)]
+
+
+def _draw_legit_batch(tables, pools, known_mask, size, rng):
+    """Draw ``size`` valid transactions from the eligibility pools."""
+    account_cdf = pools["account_cdf"]
+    primary = np.searchsorted(account_cdf, rng.random(size) * account_cdf[-1], side="right")
+    cls = pools["account_class"][primary]
+
+    key = np.empty(size, dtype=np.int64)
+    purpose = np.empty(size, dtype=np.int64)
+    u = rng.random(size)
+    for c in np.unique(cls).tolist():
+        rows = np.flatnonzero(cls == c)
+        keys, purposes, cdf = pools["class_pairs"][c]
+        pick = np.searchsorted(cdf, u[rows] * cdf[-1], side="right")
+        key[rows] = keys[pick]
+        purpose[rows] = purposes[pick]
+
+    is_cash = tables["pt_is_cash"][key]
+    target = np.full(size, -1, dtype=np.int64)
+    transfer = np.flatnonzero(~is_cash)
+    if len(transfer):
+        src = primary[transfer]
+        src_known = known_mask[src]
+        for known, pool, pos in (
+            (True, pools["receivers"], pools["receiver_pos"]),
+            (False, pools["known_receivers"], pools["known_receiver_pos"]),
+        ):
+            rows = transfer[src_known == known]
+            if len(rows):
+                target[rows] = _draw_from_pool(pool, pos, primary[rows], rng)
+
+    amount = np.round(rng.uniform(50, 5000, size=size), 2)
+    divisor = rng.integers(2, 6, size=size)
+    amount = np.where(is_cash, np.round(amount / divisor, 2), amount)
+
+    return {
+        "primary": primary,
+        "target": target,
+        "key": key,
+        "purpose": purpose,
+        "is_cash": is_cash,
+        "deposit": tables["purpose_is_deposit"][purpose],
+        "is_company": tables["entity_is_company"][tables["acct_entity"][primary]],
+        "amount": amount,
+        "atm_split": rng.random(size) < 0.05,
+    }
+
+
+# Payment types described as card payments, and those paid by debit card
+_CARD_PAYMENT_TYPES = ("credit card", "ccard", "credit", "debit card", "debit", "pos")
+_DEBIT_CARD_PAYMENT_TYPES = ("debit card", "debit")
+
+
+def _append_transfers(store, accounts, src, tgt, payment_types, amounts, timestamps,
+                      post_dates, txn_ids, known, rng, purposes=None, check_types=None,
+                      descriptions=None):
+    """Append the entries of non-cash transfers column-wise.
+
+    Transfer ``i`` moves ``amounts[i]`` from ``accounts[src[i]]`` to
+    ``accounts[tgt[i]]``; ``payment_types`` is a ``(values, codes)`` pair
+    and ``known`` flags the accounts whose side of a transfer is recorded.
+    Writes what ``split_transaction`` would for each transfer (a debit for
+    a known sender, a credit for a known receiver and a fee for wires from
+    a known sender, in that order per transfer), but builds each column for
+    the whole block and stores it with one ``EntryStore.append_columns``.
+    Account fields are read once per distinct account in the block.
+
+    ``purposes`` describe transfers whose payment type has no format of
+    its own, ``check_types`` are the purposes written on checks
+    (``suggest_transaction_type`` when omitted) and ``descriptions`` is an
+    optional ``(debit, credit)`` pair replacing the generated descriptions.
+    """
+    n = len(src)
+    if not n:
+        return
+    uniq, pos = np.unique(np.concatenate([src, tgt]), return_inverse=True)
+    src, tgt = pos[:n], pos[n:]
+    views = [accounts[i] for i in uniq.tolist()]
+    known = np.asarray(known, dtype=bool)[uniq]
+    ids = [a.id for a in views]
+    owner_names = [a.owner_name for a in views]
+    owner_types = np.array([a.owner_type for a in views], dtype=object)
+    names = np.array([
+        name or (fake_pool.company() if a.owner_type in ["Company", "Merchant"] else fake_pool.name())
+        for a, name in zip(views, owner_names)
+    ], dtype=object)
+
+    pt_names, codes = payment_types
+    pt_names = list(pt_names)
+    codes = np.asarray(codes, dtype=np.int64)
+    kind = np.array([p.lower() for p in pt_names], dtype=object)[codes]
+    card_kind = np.array([p.lower().replace("_", " ") for p in pt_names], dtype=object)[codes]
+    amounts = np.asarray(amounts, dtype=np.float64)
+    timestamps = np.asarray(timestamps)
+    amount_text = [f"{a:.2f}" for a in amounts.tolist()]
+    src_name = np.array(owner_names, dtype=object)[src].tolist()
+    tgt_name = names[tgt].tolist()
+    debit = np.empty(n, dtype=object)
+    credit = np.empty(n, dtype=object)
+    details = np.full(n, None, dtype=object)
+
+    is_card = np.isin(card_kind, _CARD_PAYMENT_TYPES)
+    is_wire = kind == "wire"
+    other = np.flatnonzero(~is_card & ~np.isin(kind, ["ach", "wire", "check"]))
+    for i in other.tolist():
+        described = describe_transaction(pt_names[codes[i]], purposes[i]) if purposes is not None else ""
+        debit[i] = credit[i] = described or f"{pt_names[codes[i]].upper()} - {tgt_name[i]}"
+
+    card = np.flatnonzero(is_card)
+    if len(card):
+        credit_cards = [getattr(a, "credit_card_number", None) for a in views]
+        debit_cards = [getattr(a, "debit_card_number", None) for a in views]
+        methods = [getattr(a, "receiving_method", "") for a in views]
+        by_debit = np.isin(card_kind[card], _DEBIT_CARD_PAYMENT_TYPES).tolist()
+        dates = timestamps[card].astype("datetime64[s]").astype("datetime64[D]").astype(str)
+        for i, date_str, debit_card in zip(card.tolist(), dates.tolist(), by_debit):
+            number = (debit_cards if debit_card else credit_cards)[src[i]]
+            method = methods[tgt[i]]
+            debit[i] = f"{method} - {tgt_name[i]}, {number}, {date_str}, {amount_text[i]}"
+            credit[i] = f"{method} - {src_name[i]}, {number}, {date_str}, {amount_text[i]}"
+
+    ach = np.flatnonzero(kind == "ach")
+    if len(ach):
+        ccd = (owner_types[src[ach]] == "Company") & np.isin(owner_types[tgt[ach]], ["Company", "Merchant"])
+        sec = np.where(ccd, "CCD", "PPD").tolist()
+        debit[ach] = [
+            f"ACH Debit - Bill Payment, {tgt_name[i]}, SEC-Code: {c}, Settled" for i, c in zip(ach.tolist(), sec)
+        ]
+        credit[ach] = [
+            f"ACH Credit - Originator: {src_name[i]}, SEC-Code: {c}, Settled" for i, c in zip(ach.tolist(), sec)
+        ]
+
+    wire = np.flatnonzero(is_wire)
+    if len(wire):
+        abroad = np.array([a.country != "United States" for a in views], dtype=bool)
+        international = (abroad[src[wire]] | abroad[tgt[wire]]).tolist()
+        rates = np.round(rng.uniform(0.8, 1.2, size=len(wire)), 4).tolist()
+        for i, foreign, rate in zip(wire.tolist(), international, rates):
+            debit[i] = credit[i] = f"WIRE - Originator: {src_name[i]} Beneficiary: {tgt_name[i]}"
+            sender = views[src[i]]
+            details[i] = {
+                "swift_code": sender.swift_code,
+                "routing_number": sender.routing_number,
+                "is_international": foreign,
+            }
+            if foreign:
+                details[i]["exchange_rate"] = rate
+
+    check = np.flatnonzero(kind == "check")
+    for i in check.tolist():
+        sender = views[src[i]]
+        check_num = next_check_number(sender.id)
+        if check_types is None:
+            txn_type = suggest_transaction_type(None, sender.owner_type)
+        else:
+            txn_type = check_types[i]
+        debit[i] = f"Check - {tgt_name[i]}, {check_num:04d}, {txn_type}, {amount_text[i]}, Settled"
+        credit[i] = f"Check - {src_name[i]}, {sender.id}, {sender.routing_number}, {amount_text[i]}, Settled"
+
+    if descriptions is not None:
+        debit, credit = (np.asarray(d, dtype=object) for d in descriptions)
+
+    # One entry per (transfer, part): 0 debit, 1 credit, 2 wire fee
+    parts = [np.flatnonzero(known[src]), np.flatnonzero(known[tgt]), np.flatnonzero(is_wire & known[src])]
+    at = np.concatenate(parts)
+    part = np.repeat(np.arange(3), [len(p) for p in parts])
+    order = np.lexsort((part, at))
+    at, part = at[order], part[order]
+    is_credit, is_fee = part == 1, part == 2
+    acct = np.where(is_credit, tgt[at], src[at])
+    counterparty = np.where(is_fee, len(ids), np.where(is_credit, src[at], tgt[at]))
+    txn = [txn_ids[r] for r in at.tolist()]
+    suffix = np.array(["D", "C", "F"])[part].tolist()
+    launderer = np.array([bool(a.launderer) for a in views], dtype=np.int64)
+
+    store.append_columns(
+        len(at),
+        transaction_id=txn,
+        entry_id=[f"{t}-{x}" for t, x in zip(txn, suffix)],
+        timestamp=timestamps[at],
+        account_id=(ids, acct),
+        counterparty=(ids + [""], counterparty),
+        amount=np.where(is_fee, 25.0, amounts[at]),
+        direction=(["debit", "credit"], is_credit.astype(np.int64)),
+        currency="USD",
+        bank_name=([a.bank_name for a in views], acct),
+        owner_name=(owner_names, acct),
+        type=(owner_types.tolist(), acct),
+        bank=([a.bank_code for a in views], acct),
+        laundering_account=(["No", "Yes"], launderer[acct]),
+        payment_type=(pt_names + ["fee"], np.where(is_fee, len(pt_names), codes[at])),
+        is_laundering=False,
+        source_description=np.where(
+            is_fee, "Wire Transfer Fee", np.where(is_credit, credit[at], debit[at])
+        ).tolist(),
+        post_date=np.asarray(post_dates)[at],
+        wire_details=np.where(is_fee, None, details[at]).tolist(),
+    )
+
+
+def generate_legit_transactions(
+    accounts,
+    entities,
+    n=1000,
+    start_date="2025-01-01",
+    end_date="2025-01-31",
+    known_accounts=None,
+    store=None,
+    batch_size=50_000,
+    index=None,
+):
+    """Generate ``n`` legitimate transactions between random accounts.
+
+    Transactions are drawn ``batch_size`` at a time with NumPy from
+    eligibility pools that only contain valid sender/receiver combinations
+    for the known accounts and entity visibility settings, so every draw
+    yields a transaction. A cash withdrawal split across several ATM visits
+    counts as one transaction. ``index`` is the ``OwnershipIndex`` from
+    ``generate_entities``; one is built from ``entities`` when omitted.
+    """
+    transactions = EntryStore() if store is None else store
+    for chunk in iter_legit_transactions(
+        accounts,
+        entities,
+        n=n,
+        start_date=start_date,
+        end_date=end_date,
+        known_accounts=known_accounts,
+        batch_size=batch_size,
+        index=index,
+    ):
+        transactions.extend(chunk)
+    return transactions
+
+
+def legit_engine(accounts, index, known_accounts=None):
+    """Build the lookup tables and sampling pools the legit batch engine draws from.
+
+    They depend only on the population and the known accounts, so callers
+    generating many shards over the same world build them once and pass
+    the result to ``iter_legit_transactions`` as ``engine``.
+    """
+    known_accounts = set(known_accounts) if known_accounts else set()
+    tables = _legit_tables(accounts, index)
+    known_mask = np.array([a.id in known_accounts for a in accounts], dtype=bool)
+    return {
+        "tables": tables,
+        "known_mask": known_mask,
+        "pools": _legit_pools(tables, known_mask),
+        "known_accounts": known_accounts,
+    }
+
 
-        payment_type = random.choice(list(sender_rules.keys()))
-        purpose = random.choice(sender_rules[payment_type])
-        source_description = describe_transaction(payment_type, purpose)
-        trans_type = suggest_transaction_type(None, primary_entity.__class__.__name__)
+def iter_legit_transactions(
+    accounts,
+    entities,
+    n=1000,
+    start_date="2025-01-01",
+    end_date="2025-01-31",
+    known_accounts=None,
+    batch_size=50_000,
+    index=None,
+    engine=None,
+):
+    """Yield the entries of ``generate_legit_transactions`` one batch at a time.
+
+    Each batch of ``batch_size`` transactions is yielded as its own
+    ``EntryStore`` so callers can export and discard it before the next
+    one is generated. ``engine`` is a prebuilt ``legit_engine`` for
+    ``accounts`` and ``known_accounts``; one is built when omitted.
+    """
+    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+
+    if not accounts or n <= 0:
+        return
 
-        ts_dt = generate_transaction_timestamp(
-            start_dt,
-            end_dt,
-            entity_type=primary_entity.__class__.__name__,
+    if engine is None:
+        if index is None:
+            index = OwnershipIndex(entities, accounts)
+        engine = legit_engine(accounts, index, known_accounts)
+    tables, known_mask, pools = engine["tables"], engine["known_mask"], engine["pools"]
+    known_accounts = engine["known_accounts"]
+    if not len(pools["account_cdf"]) or pools["account_cdf"][-1] <= 0:
+        return
+    rng = numpy_rng()
+
+    success = 0
+    while success < n:
+        size = min(batch_size, n - success)
+        batch = _draw_legit_batch(tables, pools, known_mask, size, rng)
+        transactions = EntryStore()
+        success += size
+
+        ts = generate_transaction_timestamps(start_dt, end_dt, batch["is_company"], rng)
+        timestamps = ts.astype(np.int64)
+        post_dates = generate_post_dates(ts, rng).astype(np.int64)
+        txn_ids = generate_uuids(size)
+
+        # Transfers are written column-wise; cash keeps the per-row path for
+        # its ATM and teller splits
+        rows = np.flatnonzero(~batch["is_cash"])
+        _append_transfers(
+            transactions, accounts, batch["primary"][rows], batch["target"][rows],
+            (tables["pt_names"], batch["key"][rows]), batch["amount"][rows],
+            timestamps[rows], post_dates[rows], [txn_ids[r] for r in rows.tolist()],
+            known_mask, rng, purposes=tables["purposes"][batch["purpose"][rows]],
         )
-        timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-        post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
-        amount = round(random.uniform(50, 5000), 2)
-        if payment_type.lower() == "cash":
-            divisor = random.randint(2, 5)
-            amount = round(amount / divisor, 2)
-        txn_id = generate_uuid()
-
-        # Determine src/tgt accounts based on payment type
-        if payment_type.lower() == "cash":
-            deposit = purpose.lower() == "deposit" if purpose else random.choice([True, False])
-            if deposit:
-                src = None
-                tgt = primary_acct
-                if tgt.id not in known_accounts:
-                    skipped_known += 1
-                    continue
-                if primary_entity.visibility not in ["receiver", "both"]:
-                    skipped_visibility += 1
-                    continue
+        payment_types = tables["pt_names"][batch["key"]].tolist()
+        purposes = tables["purposes"][batch["purpose"]].tolist()
+        timestamps = timestamps.tolist()
+        post_dates = post_dates.tolist()
+
+        for row in np.flatnonzero(batch["is_cash"]).tolist():
+            payment_type = payment_types[row]
+            primary_acct = accounts[batch["primary"][row]]
+            timestamp = timestamps[row]
+            post_date = post_dates[row]
+            amount = float(batch["amount"][row])
+            txn_id = txn_ids[row]
+
+            if batch["deposit"][row]:
+                src, tgt = None, primary_acct
             else:
-                src = primary_acct
-                tgt = None
-                if src.id not in known_accounts:
-                    skipped_known += 1
-                    continue
-                if primary_entity.visibility not in ["sender", "both"]:
-                    skipped_visibility += 1
-                    continue
-        else:
-            # Non-cash transfers require two accounts
-            src = primary_acct
-            tgt = random.choice([a for a in accounts if a.id != src.id])
-            tgt_entity = next((e for e in entities if e.id == tgt.owner_id), None)
-            if not tgt_entity:
-                continue
-            if src.id not in known_accounts and tgt.id not in known_accounts:
-                skipped_known += 1
-                continue
-            if primary_entity.visibility not in ["sender", "both"] or tgt_entity.visibility not in ["receiver", "both"]:
-                skipped_visibility += 1
-                continue
-
-        sd = source_description if payment_type.lower() != "ach" else ""
-
-        if payment_type.lower() == "cash":
+                src, tgt = primary_acct, None
+            sd = describe_transaction(payment_type, purposes[row])
+
             if amount > ATM_LIMIT:
-                if random.random() < 0.05:
+                if batch["atm_split"][row]:
                     remaining = amount
                     part_idx = 0
                     while round(remaining, 2) > 0:
                         part = round(min(ATM_LIMIT, remaining), 2)
-                        part_id = f"{txn_id}-{part_idx}"
-                        entries = split_transaction(
-                            txn_id=part_id,
+                        split_transaction(
+                            txn_id=f"{txn_id}-{part_idx}",
                             timestamp=timestamp,
                             src=src,
                             tgt=tgt,
@@ -182,22 +979,19 @@ def generate_legit_transactions(accounts, entities, n=1000, start_date="2025-01-
                             payment_type=payment_type,
                             is_laundering=False,
                             source_description=sd,
-                            transaction_type=trans_type if payment_type.lower() == "check" else None,
                             known_accounts=known_accounts,
                             post_date=post_date,
                             channel="ATM",
+                            store=transactions,
                         )
-                        transactions.extend(entries)
-                        success += 1
                         remaining -= part
                         part_idx += 1
                     continue
-                else:
-                    channel = "Teller"
+                channel = "Teller"
             else:
                 channel = "ATM"
 
-            entries = split_transaction(
+            split_transaction(
                 txn_id=txn_id,
                 timestamp=timestamp,
                 src=src,
@@ -207,34 +1001,13 @@ def generate_legit_transactions(accounts, entities, n=1000, start_date="2025-01-
                 payment_type=payment_type,
                 is_laundering=False,
                 source_description=sd,
-                transaction_type=trans_type if payment_type.lower() == "check" else None,
                 known_accounts=known_accounts,
                 post_date=post_date,
                 channel=channel,
+                store=transactions,
             )
-            transactions.extend(entries)
-            success += 1
-        else:
-            entries = split_transaction(
-                txn_id=txn_id,
-                timestamp=timestamp,
-                src=src,
-                tgt=tgt,
-                amount=amount,
-                currency="USD",
-                payment_type=payment_type,
-                is_laundering=False,
-                source_description=sd,
-                transaction_type=trans_type if payment_type.lower() == "check" else None,
-                known_accounts=known_accounts,
-                post_date=post_date,
-            )
-            transactions.extend(entries)
-            success += 1
 
-
-
-    return transactions
+        yield transactions
 
 
 def generate_profile_transactions(
@@ -242,19 +1015,30 @@ def generate_profile_transactions(
     start_date: str,
     end_date: str,
     bank_lookup: dict | None = None,
-) -> list[dict]:
-    """Generate transactions using structured agent profiles."""
+    store: EntryStore | None = None,
+    pay_frequency: str = DEFAULT_PAY_FREQUENCY,
+    cash_deposit_frequency: str = DEFAULT_CASH_DEPOSIT_FREQUENCY,
+) -> EntryStore:
+    """Generate transactions using structured agent profiles.
+
+    Employees are paid by their employer on ``pay_frequency`` (see
+    ``PAY_FREQUENCIES``) unless the company's profile row sets its own
+    ``pay_frequency``. Cash a merchant receives without depositing it on
+    the spot is deposited in full once per day or week
+    (``cash_deposit_frequency``).
+    """
     start_dt = datetime.strptime(start_date, "%Y-%m-%d")
     end_dt = datetime.strptime(end_date, "%Y-%m-%d")
 
     known_accounts = set(profile_df["account_number"].dropna().astype(str))
 
     merchants = profile_df[profile_df["type"] == "merchant"].copy()
+    merchant_index = MerchantIndex(merchants)
     payers = profile_df[profile_df["type"].isin(["person", "company"])]
 
     card_numbers = {}
     recv_methods = {}
-    for _, row in profile_df.iterrows():
+    for row in profile_df.to_dict("records"):
         ent_id = row.get("entity_id")
         ent_type = str(row.get("type"))
         if ent_type in ["person", "company"]:
@@ -282,409 +1066,198 @@ def generate_profile_transactions(
         for bank, g in bent_df.groupby("bank")
     }
 
-    pending_deposits: dict[str, float] = {}
-
-    transactions = []
-
-    for _, payer in payers.iterrows():
-        patterns = payer.get("merchant_patterns")
-        freqs = payer.get("merchant_frequency")
-        if not isinstance(patterns, str) or not isinstance(freqs, str):
-            continue
-
-        pattern_list = [p.strip() for p in patterns.split(',') if p.strip()]
-        freq_list = [float(f.strip()) for f in freqs.split(',') if f.strip()]
-        if not pattern_list or not freq_list:
-            continue
-
-        txn_scaler = float(payer.get("transaction_scaler") or 1)
-        payer_acct_id = payer.get("account_number")
-        if pd.isna(payer_acct_id):
-            payer_acct_id = payer["entity_id"]
-
-        payer_bank_code = str(payer.get("bank"))
-        bank_data = bank_lookup.get(payer_bank_code, {}) if bank_lookup else {}
-
-        payer_acct = ProfileAccount(
-            id=payer_acct_id,
-            owner_id=payer["entity_id"],
-            owner_type=payer["type"].capitalize(),
-            owner_name=payer.get("name", ""),
-            bank_name=bank_data.get("name", ""),
-            bank_code=payer_bank_code,
-            address=payer.get("address", ""),
-            swift_code=bank_data.get("swift_code"),
-            routing_number=bank_data.get("routing_number"),
-            credit_card_number=card_numbers.get(payer["entity_id"], {}).get("credit"),
-            debit_card_number=card_numbers.get(payer["entity_id"], {}).get("debit"),
-            receiving_method=recv_methods.get(payer["entity_id"]),
-            launderer=False,
+    # Cash sales the merchant has not deposited yet, as (merchant, amount, time)
+    pending_cash = ([], [], [])
+
+    transactions = EntryStore() if store is None else store
+
+    plan = _expand_payer_patterns(payers, merchant_index)
+    payer_records = payers.to_dict("records")
+    registry = ProfileAccountRegistry(profile_df, bank_lookup, card_numbers, recv_methods)
+    rng = numpy_rng()
+    n_rows = len(plan["payer"])
+    merchant_pos = merchant_index.draw(plan["code"], rng)
+    payment_type_col = merchant_index.draw_payment_types(merchant_pos, rng)
+    scalers = np.array([
+        float(r.get("transaction_scaler") or 1) for r in payer_records
+    ])[plan["payer"]]
+    avg_exp = merchant_index.average_expense[merchant_pos]
+    amounts = rng.uniform(avg_exp * 0.85, avg_exp * 1.15) * scalers
+    is_company = np.array([r["type"] == "company" for r in payer_records], dtype=bool)[plan["payer"]]
+    ts_col = generate_transaction_timestamps(start_dt, end_dt, is_company, rng)
+    post_col = generate_post_dates(ts_col, rng).astype(np.int64)
+    ts_col = ts_col.astype(np.int64)
+    txn_ids = generate_uuids(n_rows)
+    amounts = np.round(amounts, 2)
+    is_cash = np.asarray(payment_type_col, dtype=object) == "cash"
+
+    def bent_at(bank, u):
+        # The BEnt of ``bank`` at fraction ``u`` of its list, or a made-up one
+        bents = bents_by_bank.get(str(bank), [])
+        if not bents:
+            return generate_uuid(8), fake_pool.address()
+        bent = bents[int(u * len(bents))]
+        return bent.get("name"), bent.get("address")
+
+    # Card, check, ACH, wire and other transfers are written column-wise
+    transfer = np.flatnonzero(~is_cash)
+    if len(transfer):
+        payer_pos, payer_at = np.unique(plan["payer"][transfer], return_inverse=True)
+        merchant_rows, merchant_at = np.unique(merchant_pos[transfer], return_inverse=True)
+        transfer_accounts = [
+            registry.get(payer_records[p]["entity_id"]) for p in payer_pos.tolist()
+        ] + [
+            registry.get(merchant_index.records[m]["entity_id"]) for m in merchant_rows.tolist()
+        ]
+        purposes = suggest_transaction_types(
+            [merchant_index.records[m].get("naics_code") for m in merchant_pos[transfer].tolist()], rng
+        )
+        pt_names, pt_codes = np.unique(
+            np.asarray(payment_type_col, dtype=object)[transfer].astype(str), return_inverse=True
+        )
+        _append_transfers(
+            transactions, transfer_accounts, payer_at, len(payer_pos) + merchant_at,
+            (pt_names.tolist(), pt_codes), amounts[transfer], ts_col[transfer],
+            post_col[transfer], [txn_ids[r] for r in transfer.tolist()],
+            [a.id in known_accounts for a in transfer_accounts], rng,
+            purposes=purposes, check_types=purposes,
         )
 
-        for code, freq in zip(pattern_list, freq_list):
-            try:
-                freq_val = float(freq)
-            except ValueError:
-                continue
-            num_txns = max(1, int(round(freq_val)))
-
-            eligible = merchants[merchants["naics_code"].astype(str).str.startswith(str(int(float(code)) if code.strip().replace('.', '', 1).isdigit() else code))]
-            if eligible.empty:
-                continue
-
-            for _ in range(num_txns):
-                merchant = eligible.sample(1).iloc[0]
-                tgt_acct_id = merchant.get("account_number")
-                if pd.isna(tgt_acct_id):
-                    tgt_acct_id = merchant["entity_id"]
-                merch_bank_code = str(merchant.get("bank"))
-                m_bank_data = bank_lookup.get(merch_bank_code, {}) if bank_lookup else {}
-
-                tgt_acct = ProfileAccount(
-                    id=tgt_acct_id,
-                    owner_id=merchant["entity_id"],
-                    owner_type="Merchant",
-                    owner_name=merchant.get("name", ""),
-                    bank_name=m_bank_data.get("name", ""),
-                    bank_code=merch_bank_code,
-                    address=merchant.get("address", ""),
-                    swift_code=m_bank_data.get("swift_code"),
-                    routing_number=m_bank_data.get("routing_number"),
-                    receiving_method=recv_methods.get(merchant["entity_id"]),
-                    launderer=False,
-                )
-
-                pay_opts = (
-                    merchant.get("accepted_payment_methods")
-                    or merchant.get("accepted_payment_types")
-                )
-                if isinstance(pay_opts, str) and pay_opts.strip():
-                    raw_types = [p.strip().lower() for p in pay_opts.split(',') if p.strip()]
-                    payment_types = []
-                    for pt in raw_types:
-                        if pt == "c_check":
-                            payment_types.append("check")
-                        else:
-                            payment_types.append(pt)
-                else:
-                    payment_types = PAYMENT_TYPES
-                prob_str = (
-                    merchant.get("transaction_probability")
-                    or merchant.get("payment_probabilities")
-                )
-                probabilities = None
-                if isinstance(prob_str, str) and prob_str.strip():
-                    try:
-                        probabilities = [float(x.strip()) for x in prob_str.split(',') if x.strip()]
-                    except ValueError:
-                        probabilities = None
-                if probabilities and len(probabilities) == len(payment_types):
-                    payment_type = random.choices(payment_types, weights=probabilities, k=1)[0]
-                else:
-                    payment_type = random.choice(payment_types)
-
-                avg_exp = merchant.get("average_expense")
-                if pd.isna(avg_exp):
-                    avg_exp = 100.0
-                amount = random.uniform(avg_exp * 0.85, avg_exp * 1.15)
-                amount *= txn_scaler
-
-                ts_dt = generate_transaction_timestamp(start_dt, end_dt, entity_type=payer_acct.owner_type)
-                timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-                post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
-                txn_id = generate_uuid()
-
-                amount = round(amount, 2)
-
-                if payment_type == "cash":
-                    divisor = random.randint(2, 5)
-                    amount = round(amount / divisor, 2)
-
-                    payer_bank = str(payer.get("bank"))
-                    payer_bents = bents_by_bank.get(payer_bank, [])
-                    if payer_bents:
-                        bent = random.choice(payer_bents)
-                        bent_id = bent.get("name")
-                        bent_loc = bent.get("address")
-                    else:
-                        bent_id = generate_uuid(8)
-                        bent_loc = fake.address().replace("\n", ", ")
-
-                    if amount > ATM_LIMIT:
-                        if random.random() < 0.05:
-                            remaining = amount
-                            idx = 0
-                            while round(remaining, 2) > 0:
-                                part = round(min(ATM_LIMIT, remaining), 2)
-                                w_id = f"{txn_id}W{idx}"
-                                entries = split_transaction(
-                                    txn_id=w_id,
-                                    timestamp=timestamp,
-                                    src=payer_acct,
-                                    tgt=None,
-                                    amount=part,
-                                    currency="USD",
-                                    payment_type="cash",
-                                    is_laundering=False,
-                                    known_accounts=known_accounts,
-                                    post_date=post_date,
-                                    atm_id=bent_id,
-                                    atm_location=bent_loc,
-                                    channel="ATM",
-                                )
-                                transactions.extend(entries)
-
-                                deposit_now = random.choice([True, False])
-                                if deposit_now:
-                                    merch_bank = str(merchant.get("bank"))
-                                    merch_bents = bents_by_bank.get(merch_bank, [])
-                                    if merch_bents:
-                                        bent2_rec = random.choice(merch_bents)
-                                        bent2 = bent2_rec.get("name")
-                                        bent2_loc = bent2_rec.get("address")
-                                    else:
-                                        bent2 = generate_uuid(8)
-                                        bent2_loc = fake.address().replace("\n", ", ")
-
-                                    d_id = f"{txn_id}D{idx}"
-                                    entries = split_transaction(
-                                        txn_id=d_id,
-                                        timestamp=timestamp,
-                                        src=None,
-                                        tgt=tgt_acct,
-                                        amount=part,
-                                        currency="USD",
-                                        payment_type="cash",
-                                        is_laundering=False,
-                                        known_accounts=known_accounts,
-                                        post_date=post_date,
-                                        atm_id=bent2,
-                                        atm_location=bent2_loc,
-                                        channel="ATM",
-                                    )
-                                    transactions.extend(entries)
-                                else:
-                                    pending_deposits[tgt_acct.id] = pending_deposits.get(tgt_acct.id, 0) + part
-
-                                remaining -= part
-                                idx += 1
-                            continue
-                        else:
-                            channel = "Teller"
-                    else:
-                        channel = "ATM"
-
-                    entries = split_transaction(
-                        txn_id=txn_id + "W",
-                        timestamp=timestamp,
-                        src=payer_acct,
-                        tgt=None,
-                        amount=amount,
-                        currency="USD",
-                        payment_type="cash",
-                        is_laundering=False,
-                        known_accounts=known_accounts,
-                        post_date=post_date,
-                        atm_id=bent_id,
-                        atm_location=bent_loc,
-                        channel=channel,
-                    )
-                    transactions.extend(entries)
-
-                    deposit_now = random.choice([True, False])
-                    if deposit_now:
-                        merch_bank = str(merchant.get("bank"))
-                        merch_bents = bents_by_bank.get(merch_bank, [])
-                        if merch_bents:
-                            bent2_rec = random.choice(merch_bents)
-                            bent2 = bent2_rec.get("name")
-                            bent2_loc = bent2_rec.get("address")
-                        else:
-                            bent2 = generate_uuid(8)
-                            bent2_loc = fake.address().replace("\n", ", ")
-
-                        entries = split_transaction(
-                            txn_id=txn_id + "D",
-                            timestamp=timestamp,
-                            src=None,
-                            tgt=tgt_acct,
-                            amount=amount,
-                            currency="USD",
-                            payment_type="cash",
-                            is_laundering=False,
-                            known_accounts=known_accounts,
-                            post_date=post_date,
-                            atm_id=bent2,
-                            atm_location=bent2_loc,
-                            channel=channel,
-                        )
-                        transactions.extend(entries)
-                    else:
-                        pending_deposits[tgt_acct.id] = pending_deposits.get(tgt_acct.id, 0) + amount
-                else:
-                    purpose = suggest_transaction_type(
-                        merchant.get("naics_code"), payer.get("type")
-                    )
-                    sd = (
-                        describe_transaction(payment_type, purpose)
-                        if payment_type.lower() != "ach"
-                        else ""
-                    )
-
-                    entries = split_transaction(
-                        txn_id=txn_id,
-                        timestamp=timestamp,
-                        src=payer_acct,
-                        tgt=tgt_acct,
-                        amount=amount,
-                        currency="USD",
-                        payment_type=payment_type,
-                        is_laundering=False,
-                        source_description=sd,
-                        transaction_type=purpose if payment_type.lower() == "check" else None,
-                        known_accounts=known_accounts,
-                        post_date=post_date
-                    )
-                    transactions.extend(entries)
-
-    # Generate payroll transactions
-    employees = profile_df[(profile_df["type"] == "person") & profile_df["employer"].notna()]
-    companies = profile_df[profile_df["type"] == "company"].set_index("entity_id")
-    payroll_dates = get_payroll_dates(start_dt, end_dt)
-
-    for pay_date in payroll_dates:
-        for _, emp in employees.iterrows():
-            employer_id = emp.get("employer")
-            if employer_id not in companies.index:
-                continue
-            comp = companies.loc[employer_id]
-
-            emp_scaler = float(emp.get("transaction_scaler") or 1)
-            amount = random.uniform(5000 * 0.9, 5000 * 1.1) * emp_scaler
-
-            emp_acct_id = emp.get("account_number")
-            if pd.isna(emp_acct_id):
-                emp_acct_id = emp["entity_id"]
-            comp_acct_id = comp.get("account_number")
-            if pd.isna(comp_acct_id):
-                comp_acct_id = comp["entity_id"]
-
-            emp_bank_code = str(emp.get("bank"))
-            emp_bank = bank_lookup.get(emp_bank_code, {}) if bank_lookup else {}
-            comp_bank_code = str(comp.get("bank"))
-            comp_bank = bank_lookup.get(comp_bank_code, {}) if bank_lookup else {}
-
-            emp_acct = ProfileAccount(
-                id=emp_acct_id,
-                owner_id=emp["entity_id"],
-                owner_type="Person",
-                owner_name=emp.get("name", ""),
-                bank_name=emp_bank.get("name", ""),
-                bank_code=emp_bank_code,
-                address=emp.get("address", ""),
-                swift_code=emp_bank.get("swift_code"),
-                routing_number=emp_bank.get("routing_number"),
-                credit_card_number=card_numbers.get(emp["entity_id"], {}).get("credit"),
-                debit_card_number=card_numbers.get(emp["entity_id"], {}).get("debit"),
-                launderer=False,
-            )
-            comp_acct = ProfileAccount(
-                id=comp_acct_id,
-                owner_id=comp.name,
-                owner_type="Company",
-                owner_name=comp.get("name", ""),
-                bank_name=comp_bank.get("name", ""),
-                bank_code=comp_bank_code,
-                address=comp.get("address", ""),
-                swift_code=comp_bank.get("swift_code"),
-                routing_number=comp_bank.get("routing_number"),
-                credit_card_number=card_numbers.get(comp.name, {}).get("credit"),
-                debit_card_number=card_numbers.get(comp.name, {}).get("debit"),
-                receiving_method=recv_methods.get(comp.name),
-                launderer=False,
-            )
-
-            pay_start = pay_date.replace(hour=8, minute=0, second=0, microsecond=0)
-            pay_end = pay_date.replace(hour=16, minute=59, second=59, microsecond=0)
-            ts_dt = generate_transaction_timestamp(pay_start, pay_end, entity_type="Company")
-            timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-            post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
-            txn_id = generate_uuid()
+    # Cash is withdrawn at one ATM or teller visit, or in ATM-sized parts,
+    # and the merchant deposits each part at once or holds it for the next
+    # batch deposit
+    cash = np.flatnonzero(is_cash)
+    cash_amounts = np.round(amounts[cash] / rng.integers(2, 6, size=len(cash)), 2)
+    atm_split = (cash_amounts > ATM_LIMIT) & (rng.random(len(cash)) < 0.05)
+    n_parts = np.where(atm_split, np.ceil(np.round(cash_amounts * 100) / (ATM_LIMIT * 100)), 1).astype(np.int64)
+    first_part = np.concatenate([[0], np.cumsum(n_parts)])
+    withdraw_at = rng.random(len(cash)).tolist()
+    deposit_now = (rng.random(first_part[-1]) < 0.5).tolist()
+    deposit_at = rng.random(first_part[-1]).tolist()
+    ts_list, post_list = ts_col.tolist(), post_col.tolist()
+
+    for i, row in enumerate(cash.tolist()):
+        payer = payer_records[int(plan["payer"][row])]
+        payer_acct = registry.get(payer["entity_id"])
+        merchant = merchant_index.records[merchant_pos[row]]
+        tgt_acct = registry.get(merchant["entity_id"])
+        timestamp = ts_list[row]
+        post_date = post_list[row]
+        txn_id = txn_ids[row]
+        amount = float(cash_amounts[i])
+        split = bool(atm_split[i])
+        count = int(n_parts[i])
+        channel = "ATM" if split or amount <= ATM_LIMIT else "Teller"
+        bent_id, bent_loc = bent_at(payer.get("bank"), withdraw_at[i])
+
+        for idx in range(count):
+            if split:
+                part = float(ATM_LIMIT) if idx < count - 1 else round(amount - ATM_LIMIT * (count - 1), 2)
+                w_id, d_id = f"{txn_id}W{idx}", f"{txn_id}D{idx}"
+            else:
+                part, w_id, d_id = amount, txn_id + "W", txn_id + "D"
 
-            entries = split_transaction(
-                txn_id=txn_id,
+            split_transaction(
+                txn_id=w_id,
                 timestamp=timestamp,
-                src=comp_acct,
-                tgt=emp_acct,
-                amount=round(amount, 2),
+                src=payer_acct,
+                tgt=None,
+                amount=part,
                 currency="USD",
-                payment_type="ach",
+                payment_type="cash",
                 is_laundering=False,
                 known_accounts=known_accounts,
-                post_date=post_date
+                post_date=post_date,
+                atm_id=bent_id,
+                atm_location=bent_loc,
+                channel=channel,
+                store=transactions,
             )
-            for e in entries:
-                if e["direction"] == "credit":
-                    e["source_description"] = f"ACH Direct Dep Payroll {comp_acct.owner_name} - {comp_acct.address}"
-                else:
-                    e["source_description"] = f"ACH Payroll {emp_acct.owner_name} - {emp_acct.id}"
-            transactions.extend(entries)
-
-    # Batch deposit accumulated cash for merchants/companies
-    for acct_id, amt in pending_deposits.items():
-        merchant_row = merchants[merchants["account_number"] == acct_id]
-        if merchant_row.empty:
-            continue
-        merchant = merchant_row.iloc[0]
-        merch_bank = str(merchant.get("bank"))
-        merch_bents = bents_by_bank.get(merch_bank, [])
-        if merch_bents:
-            bent_rec = random.choice(merch_bents)
-            bent_id = bent_rec.get("name")
-            bent_loc = bent_rec.get("address")
-        else:
-            bent_id = generate_uuid(8)
-            bent_loc = fake.address().replace("\n", ", ")
 
-        merch_bank_data = bank_lookup.get(merch_bank, {}) if bank_lookup else {}
+            j = first_part[i] + idx
+            if deposit_now[j]:
+                bent2, bent2_loc = bent_at(merchant.get("bank"), deposit_at[j])
+                split_transaction(
+                    txn_id=d_id,
+                    timestamp=timestamp,
+                    src=None,
+                    tgt=tgt_acct,
+                    amount=part,
+                    currency="USD",
+                    payment_type="cash",
+                    is_laundering=False,
+                    known_accounts=known_accounts,
+                    post_date=post_date,
+                    atm_id=bent2,
+                    atm_location=bent2_loc,
+                    channel=channel,
+                    store=transactions,
+                )
+            else:
+                _hold_cash(pending_cash, merchant_pos[row], part, timestamp)
 
-        tgt_acct = ProfileAccount(
-            id=acct_id,
-            owner_id=merchant["entity_id"],
-            owner_type="Merchant",
-            owner_name=merchant.get("name", ""),
-            bank_name=merch_bank_data.get("name", ""),
-            bank_code=merch_bank,
-            address=merchant.get("address", ""),
-            swift_code=merch_bank_data.get("swift_code"),
-            routing_number=merch_bank_data.get("routing_number"),
-            receiving_method=recv_methods.get(merchant["entity_id"]),
-            launderer=False,
+    # Generate payroll transactions
+    payroll = _payroll_plan(profile_df, start_dt, end_dt, pay_frequency, rng)
+    if payroll is not None:
+        # One account per distinct company and employee; entries are the
+        # ACH debit of the company then the credit of the employee
+        pay_ids = list(dict.fromkeys(payroll["employer"] + payroll["employee"]))
+        slot = {entity_id: i for i, entity_id in enumerate(pay_ids)}
+        pay_accounts = [registry.get(entity_id) for entity_id in pay_ids]
+        employer = np.array([slot[e] for e in payroll["employer"]], dtype=np.int64)
+        employee = np.array([slot[e] for e in payroll["employee"]], dtype=np.int64)
+        n_pay = len(employee)
+        _append_transfers(
+            transactions, pay_accounts, employer, employee,
+            (["ach"], np.zeros(n_pay, dtype=np.int64)), np.round(payroll["amount"], 2),
+            payroll["timestamp"].astype(np.int64),
+            generate_post_dates(payroll["timestamp"], rng).astype(np.int64),
+            generate_uuids(n_pay), [a.id in known_accounts for a in pay_accounts], rng,
+            descriptions=(
+                [
+                    f"ACH Payroll {pay_accounts[e].owner_name} - {pay_accounts[e].id}"
+                    for e in employee.tolist()
+                ],
+                [
+                    f"ACH Direct Dep Payroll {pay_accounts[c].owner_name} - {pay_accounts[c].address}"
+                    for c in employer.tolist()
+                ],
+            ),
         )
 
-        ts_dt = generate_transaction_timestamp(start_dt, end_dt, entity_type="Company")
-        timestamp = ts_dt.strftime("%Y-%m-%d %H:%M:%S")
-        post_date = generate_post_date(ts_dt).strftime("%Y-%m-%d %H:%M:%S")
-        txn_id = generate_uuid()
-
-        amount = round(min(amt, ATM_LIMIT), 2)
-        channel = "ATM" if amount <= ATM_LIMIT else "Teller"
-
-        entries = split_transaction(
-            txn_id=txn_id,
-            timestamp=timestamp,
-            src=None,
-            tgt=tgt_acct,
-            amount=amount,
-            currency="USD",
-            payment_type="cash",
-            is_laundering=False,
-            known_accounts=known_accounts,
-            post_date=post_date,
-            atm_id=bent_id,
-            atm_location=bent_loc,
-            channel=channel
-        )
-        transactions.extend(entries)
+    # Batch deposit accumulated cash for merchants/companies
+    deposits = _cash_deposit_plan(*pending_cash, end_dt, cash_deposit_frequency, rng)
+    if deposits is not None:
+        dep_posts = generate_post_dates(deposits["timestamp"], rng).astype(np.int64).tolist()
+        dep_times = deposits["timestamp"].astype(np.int64).tolist()
+        entries = _split_cash_deposits(deposits["amount"], rng)
+        dep_ids = generate_uuids(len(entries["deposit"]))
+        location_at = rng.random(len(dep_times)).tolist()
+        locations = {}
+        for row, (dep, amount, atm) in enumerate(zip(
+            entries["deposit"].tolist(), entries["amount"].tolist(), entries["atm"].tolist()
+        )):
+            merchant = merchant_index.records[deposits["merchant"][dep]]
+            if dep not in locations:
+                locations[dep] = bent_at(merchant.get("bank"), location_at[dep])
+            bent_id, bent_loc = locations[dep]
+
+            split_transaction(
+                txn_id=dep_ids[row],
+                timestamp=dep_times[dep],
+                src=None,
+                tgt=registry.get(merchant["entity_id"]),
+                amount=amount,
+                currency="USD",
+                payment_type="cash",
+                is_laundering=False,
+                known_accounts=known_accounts,
+                post_date=dep_posts[dep],
+                atm_id=bent_id,
+                atm_location=bent_loc,
+                # ATM entries are whole notes, so rounding leaves them unchanged
+                channel="ATM" if atm else "Teller",
+                store=transactions,
+            )
 
     return transactions
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import pickle
+
+from generator.labels import taint_state
+from utils.helpers import CHECK_COUNTERS
+
+# Bumped whenever the layout of the saved world changes
+WORLD_VERSION = 3
+
+# Taint tracking settings every window of a dataset has to share
+TAINT_SETTINGS = ("taint_max_hops", "taint_window_days")
+
+
+def new_world(entities_data, known_accounts, seed=None):
+    """Return the state that has to survive between runs of one dataset.
+
+    Besides the entities and accounts this holds everything later windows
+    depend on: the known accounts, the earliest activity per account (so
+    laundering can use accounts with earlier history), the taint state of
+    ``propagate_laundering`` and the settings it was built with, the check
+    counters and the output written so far. ``main.py`` fills in the window
+    fields after each run.
+    """
+    return {
+        "version": WORLD_VERSION,
+        "seed": seed,
+        "entities": entities_data,
+        "known_accounts": known_accounts,
+        "earliest": {},
+        "taint": taint_state(),
+        "propagate_laundering": False,
+        "taint_max_hops": None,
+        "taint_window_days": None,
+        "check_counters": {},
+        "start_date": None,
+        "end_date": None,
+        "output": None,
+        "format": None,
+        "partition_by_bank": False,
+    }
+
+
+def save_world(world, path):
+    """Pickle ``world`` (with the current check counters) to ``path``.
+
+    The file is written next to ``path`` and moved into place, so an
+    interrupted run never leaves a truncated world behind.
+    """
+    world["check_counters"] = dict(CHECK_COUNTERS)
+    _dump(world, path)
+
+
+def taint_settings(world, propagate_laundering=False, **settings):
+    """Return the taint settings for a window appended to ``world``.
+
+    Taint tracking stays on for every window once the world was built with
+    it, since a window without it would leave the taint state behind.
+    ``settings`` (see ``TAINT_SETTINGS``) left as ``None`` default to the
+    world's. Raises ``ValueError`` when tracking is turned on part-way or a
+    setting differs from the one the taint state was built with.
+    """
+    if propagate_laundering and not world["propagate_laundering"]:
+        raise ValueError(
+            "--propagate_laundering was off for the earlier windows of this world; "
+            "labels before this window would not be propagated"
+        )
+    resolved = {"propagate_laundering": world["propagate_laundering"]}
+    for name in TAINT_SETTINGS:
+        value = settings.get(name)
+        if value is None:
+            value = world[name]
+        elif value != world[name]:
+            raise ValueError(f"--{name} {value} does not match the world's ({world[name]})")
+        resolved[name] = value
+    return resolved
+
+
+def _dump(obj, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_world(path):
+    """Load a world saved by ``save_world`` and restore its check counters."""
+    with open(path, "rb") as f:
+        world = pickle.load(f)
+    if not isinstance(world, dict) or world.get("version") != WORLD_VERSION:
+        raise ValueError(f"{path} is not a world file from this version of the generator")
+    CHECK_COUNTERS.clear()
+    CHECK_COUNTERS.update(world["check_counters"])
+    return world
+
+
+def snapshot_key(**params) -> str:
+    """Return a digest of the parameters an entity snapshot was built from.
+
+    Files named in ``params`` (such as the agent profiles workbook) should
+    be passed together with their modification time so edits invalidate
+    the snapshot.
+    """
+    payload = json.dumps({"version": WORLD_VERSION, **params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def save_entities_snapshot(path, key, entities_data):
+    """Save the output of ``generate_entities`` to ``path`` under ``key``."""
+    _dump({"version": WORLD_VERSION, "key": key, "entities": entities_data}, path)
+
+
+def load_entities_snapshot(path, key):
+    """Return the entities saved at ``path``, or ``None`` when it is missing or stale."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("key") != key:
+        return None
+    return snapshot["entities"]
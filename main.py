@@ -5,17 +5,55 @@ import os
 from datetime import datetime, timedelta
 from random import sample
 import random
-import pandas as pd
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from generator.entities import generate_entities
-from generator.transactions import generate_legit_transactions, generate_profile_transactions
+from generator.transactions import (
+    generate_profile_transactions,
+    PAY_FREQUENCIES,
+    DEFAULT_PAY_FREQUENCY,
+    CASH_DEPOSIT_FREQUENCIES,
+    DEFAULT_CASH_DEPOSIT_FREQUENCY,
+)
+from generator.profiles import ProfileBook, default_cache_dir
+from generator.parallel import (
+    ShardPool,
+    legit_shard,
+    legit_tasks,
+    pattern_context,
+    pattern_shard,
+    pattern_tasks,
+)
 from generator.laundering import generate_laundering_chains
-from generator.exporter import export_to_csv, export_to_excel
+from generator.exporter import (
+    export_to_csv,
+    export_to_excel,
+    export_to_parquet,
+    export_chunks_to_csv,
+    export_chunks_to_excel,
+    export_chunks_to_parquet,
+)
 from generator.labels import propagate_laundering, flag_laundering_accounts
 from utils.logger import log
-from utils.helpers import earliest_timestamps_by_account
+from utils.helpers import (
+    earliest_timestamps_by_account,
+    fake_pool,
+    next_check_offset,
+    DEFAULT_FAKER_POOL_SIZE,
+)
+from utils.entry_store import EntryStore
+from utils.business_calendar import business_calendar
+from utils.rng import set_root_seed, seed_stage, stage_seed
+from generator.world import (
+    new_world,
+    load_world,
+    save_world,
+    taint_settings,
+    snapshot_key,
+    load_entities_snapshot,
+    save_entities_snapshot,
+)
 
 def main():
     parser = argparse.ArgumentParser(description="Synthetic AML Dataset Generator")
@@ -32,18 +70,220 @@ def main():
     )
     parser.add_argument("--patterns", type=str, default=None, help="Path to laundering patterns YAML file")
     parser.add_argument("--agent_profiles", type=str, default=None, help="Path to agent profiles Excel file")
-    parser.add_argument("--output", type=str, default="data/aml_dataset.xlsx", help="Output file path")
-    parser.add_argument("--format", type=str, choices=["csv", "xlsx"], default="xlsx", help="Export format")
+    parser.add_argument(
+        "--pay_frequency",
+        type=str,
+        choices=PAY_FREQUENCIES,
+        default=DEFAULT_PAY_FREQUENCY,
+        help="Payroll schedule for profile companies without their own pay_frequency",
+    )
+    parser.add_argument(
+        "--cash_deposit_frequency",
+        type=str,
+        choices=CASH_DEPOSIT_FREQUENCIES,
+        default=DEFAULT_CASH_DEPOSIT_FREQUENCY,
+        help="How often profile merchants deposit the cash they take in",
+    )
+    parser.add_argument(
+        "--profile_cache",
+        type=str,
+        default=None,
+        help="Directory for parsed agent profile sheets (default: .profile_cache next to the workbook)",
+    )
+    parser.add_argument("--output", type=str, default=None, help="Output file path (default: data/aml_dataset.xlsx)")
+    parser.add_argument("--format", type=str, choices=["csv", "xlsx", "parquet"], default=None, help="Export format (default: xlsx)")
+    parser.add_argument(
+        "--partition_by_bank",
+        action="store_true",
+        help="Partition Parquet output by bank as well as transaction date",
+    )
     parser.add_argument("--known_account_ratio", type=float, default=0.5, help="Fraction of accounts with full visibility")
     parser.add_argument("--start_date", type=str, default="2025-01-01", help="Start date for transaction range")
     parser.add_argument("--end_date", type=str, default="2025-01-31", help="End date for transaction range")
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=50_000,
+        help="Legitimate transactions generated (and streamed to CSV) per chunk",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for legitimate shards and pattern instances",
+    )
+    parser.add_argument(
+        "--faker_pool_size",
+        type=int,
+        default=DEFAULT_FAKER_POOL_SIZE,
+        help="Number of names, companies and addresses pre-generated per Faker pool",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for reproducible output (identical for any --workers)",
+    )
+    parser.add_argument(
+        "--world",
+        type=str,
+        default=None,
+        help="File the generated world (entities, accounts, counters, taint state) is saved to",
+    )
+    parser.add_argument(
+        "--world_cache",
+        "--world-cache",
+        type=str,
+        default=None,
+        help="Snapshot file for banks, entities and accounts, reused while the parameters and seed match",
+    )
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help="Load --world and append the --start_date/--end_date window to its output",
+    )
     parser.add_argument(
         "--propagate_laundering",
         action="store_true",
         help="Propagate laundering labels through taint tracking",
     )
+    parser.add_argument(
+        "--taint_max_hops",
+        type=int,
+        default=None,
+        help="Stop taint propagation this many transfers away from a laundering account",
+    )
+    parser.add_argument(
+        "--taint_window_days",
+        type=float,
+        default=None,
+        help="Days an account stays tainted after it is first tainted",
+    )
 
     args = parser.parse_args()
+    world = None
+    salt = None
+    if args.append:
+        if not args.world or not os.path.exists(args.world):
+            parser.error("--append needs an existing --world file")
+        world = load_world(args.world)
+        if args.start_date <= world["end_date"]:
+            parser.error(f"--start_date must be after the world's last day ({world['end_date']})")
+        args.output = args.output or world["output"]
+        args.format = args.format or world["format"]
+        args.partition_by_bank = args.partition_by_bank or world["partition_by_bank"]
+        try:
+            taint = taint_settings(
+                world,
+                propagate_laundering=args.propagate_laundering,
+                taint_max_hops=args.taint_max_hops,
+                taint_window_days=args.taint_window_days,
+            )
+        except ValueError as exc:
+            parser.error(str(exc))
+        if taint["propagate_laundering"] and not args.propagate_laundering:
+            log("🔍 Taint tracking stays on for this world (--propagate_laundering)")
+        vars(args).update(taint)
+        if args.seed is None:
+            args.seed = world["seed"]
+        # Each window gets its own streams instead of replaying the first run's
+        salt = datetime.strptime(args.start_date, "%Y-%m-%d").toordinal()
+    args.output = args.output or "data/aml_dataset.xlsx"
+    args.format = args.format or "xlsx"
+    if args.append and args.format == "xlsx":
+        parser.error("--append supports csv and parquet output")
+
+    set_root_seed(args.seed, salt)
+    fake_pool.resize(args.faker_pool_size)
+    faker_pool_seed = stage_seed("faker") if args.seed is not None else None
+    fake_pool.reseed(faker_pool_seed)
+
+    # Build the posting calendar once for every year in the run
+    business_calendar(
+        datetime.strptime(args.start_date, "%Y-%m-%d").year,
+        datetime.strptime(args.end_date, "%Y-%m-%d").year,
+    )
+
+    profiles = None
+    if args.agent_profiles:
+        profiles = ProfileBook(
+            args.agent_profiles,
+            cache_dir=args.profile_cache or default_cache_dir(args.agent_profiles),
+        )
+
+    if world is not None:
+        entities_data = world["entities"]
+        accounts = entities_data["accounts"]
+        known_accounts_set = world["known_accounts"]
+        log(
+            f"🌍 Loaded world from {args.world} ({len(accounts)} accounts, "
+            f"data through {world['end_date']})"
+        )
+    else:
+        entities_data = load_or_generate_entities(args, profiles)
+        accounts = entities_data["accounts"]
+
+        log(f"🔢 Total accounts generated: {len(accounts)}")
+
+        seed_stage("known_accounts")
+        n_known_accounts = max(1, int(len(accounts) * args.known_account_ratio))
+        known_accounts = sample(accounts, n_known_accounts)
+        known_accounts_set = set(a.id for a in known_accounts)
+
+        log(f"🔍 Selected known accounts: {len(known_accounts_set)}")
+        world = new_world(entities_data, known_accounts_set, seed=args.seed)
+
+    context = {
+        "accounts": accounts,
+        "entities": entities_data["entities"],
+        "index": entities_data["index"],
+        "known_accounts": known_accounts_set,
+        "faker_pool_size": args.faker_pool_size,
+        "faker_pool_seed": faker_pool_seed,
+    }
+    with ShardPool(context, workers=args.workers) as pool:
+        chunks = iter_entry_chunks(
+            args, entities_data, known_accounts_set, pool, earliest=world["earliest"], profiles=profiles
+        )
+        export_entries(args, chunks, taint=world["taint"])
+
+    if args.world:
+        if not args.append:
+            world["start_date"] = args.start_date
+        world.update(
+            end_date=args.end_date,
+            output=args.output,
+            format=args.format,
+            partition_by_bank=args.partition_by_bank,
+            propagate_laundering=args.propagate_laundering,
+            taint_max_hops=args.taint_max_hops,
+            taint_window_days=args.taint_window_days,
+        )
+        save_world(world, args.world)
+        log(f"🌍 World saved to {args.world}")
+
+
+def load_or_generate_entities(args, profiles=None):
+    """Generate the population, or load it from ``args.world_cache`` when current."""
+    seed_stage("entities")
+    if args.world_cache:
+        profile_path = args.agent_profiles
+        key = snapshot_key(
+            banks=args.banks,
+            individuals=args.individuals,
+            companies=args.companies,
+            agent_profiles=profile_path,
+            agent_profiles_mtime=(
+                os.path.getmtime(profile_path) if profile_path and os.path.exists(profile_path) else None
+            ),
+            seed=args.seed,
+        )
+        entities_data = load_entities_snapshot(args.world_cache, key)
+        if entities_data is not None:
+            log(f"🗄️  Loaded entities from {args.world_cache}")
+            return entities_data
+        if os.path.exists(args.world_cache):
+            log(f"⚠️  {args.world_cache} was built with other parameters; regenerating")
 
     log("🔧 Generating entities...")
     entities_data = generate_entities(
@@ -51,23 +291,92 @@ def main():
         n_individuals=args.individuals,
         n_companies=args.companies,
         profile_path=args.agent_profiles,
+        profiles=profiles,
     )
-    accounts = entities_data["accounts"]
-    entities = entities_data["entities"]
+    if args.world_cache:
+        save_entities_snapshot(args.world_cache, key, entities_data)
+        log(f"🗄️  Saved entities to {args.world_cache}")
+    return entities_data
+
+
+def export_entries(args, chunks, taint=None):
+    """Write ``chunks`` to ``args.output``, streaming unless taint tracking is on.
+
+    With ``args.append`` the rows are added to the existing output. ``taint``
+    is the taint state carried over from earlier windows (see
+    ``propagate_laundering``).
+    """
+    # Without taint tracking every chunk is final as soon as it is generated,
+    # so the output can be streamed with bounded memory.
+    if not args.propagate_laundering:
+        log(f"💾 Streaming transactions to {args.output}")
+        if args.format == "csv":
+            total = export_chunks_to_csv(chunks, args.output, append=args.append)
+        elif args.format == "parquet":
+            total = export_chunks_to_parquet(chunks, args.output, args.partition_by_bank, append=args.append)
+        else:
+            total = export_chunks_to_excel(chunks, args.output)
+        log(f"📦 Total transactions to export: {total}")
+        log("✅ Done.")
+        return
+
+    all_txns = EntryStore()
+    for chunk in chunks:
+        all_txns.extend(chunk)
+    log("🔍 Propagating laundering labels (taint tracking)...")
+    window = None if args.taint_window_days is None else int(args.taint_window_days * 86400)
+    all_txns = propagate_laundering(all_txns, state=taint, max_hops=args.taint_max_hops, window=window)
+
+    log(f"💾 Exporting {len(all_txns)} transactions to {args.output}")
+    if args.format == "csv":
+        export_to_csv(all_txns, args.output, append=args.append)
+    elif args.format == "parquet":
+        export_to_parquet(all_txns, args.output, args.partition_by_bank, append=args.append)
+    else:
+        export_to_excel(all_txns, args.output)
+
+    log(f"📦 Total transactions to export: {len(all_txns)}")
+    log("✅ Done.")
+
 
-    log(f"🔢 Total accounts generated: {len(accounts)}")
+def iter_entry_chunks(args, entities_data, known_accounts_set, pool, earliest=None, profiles=None):
+    """Yield the dataset's entries as ``EntryStore`` chunks, stage by stage.
 
-    n_known_accounts = max(1, int(len(accounts) * args.known_account_ratio))
-    known_accounts = sample(accounts, n_known_accounts)
-    known_accounts_set = set(a.id for a in known_accounts)
+    Legitimate activity is yielded ``args.chunk_size`` transactions at a
+    time while the earliest timestamp per account is folded in, followed by
+    any extra legitimate activity needed to reach ``args.laundering_ratio``
+    and finally the laundering entries. Legitimate shards and pattern
+    instances run on ``pool`` (a ``ShardPool``).
 
-    log(f"🔍 Selected known accounts: {len(known_accounts_set)}")
+    ``earliest`` maps account ids to their first activity in earlier
+    windows; it is updated in place with this window's activity.
+    ``profiles`` is the ``ProfileBook`` for ``args.agent_profiles``.
+    """
+    accounts = entities_data["accounts"]
+    entities = entities_data["entities"]
+    ownership = entities_data["index"]
+    earliest_map_all = {} if earliest is None else earliest
+    n_legit = 0
 
-    legit_txns = []
+    def legit_chunks(n, stage):
+        nonlocal n_legit
+        tasks = legit_tasks(
+            n, args.chunk_size, stage_seed(stage), args.start_date, args.end_date,
+            check_offset=next_check_offset(),
+        )
+        for chunk in pool.map(legit_shard, tasks):
+            earliest_timestamps_by_account(chunk, mins=earliest_map_all)
+            n_legit += len(chunk)
+            yield chunk
 
     if args.agent_profiles:
         log(f"📂 Loading agent profiles from {args.agent_profiles}")
-        profile_df = pd.read_excel(args.agent_profiles, sheet_name="Combined_Data")
+        if profiles is None:
+            profiles = ProfileBook(args.agent_profiles)
+        profile_df = profiles.sheet("Combined_Data")
+        if profile_df is None:
+            raise ValueError(f"{args.agent_profiles} has no Combined_Data sheet")
+        seed_stage("profile")
         bank_lookup = {
             str(b.code): {
                 "name": b.name,
@@ -81,34 +390,31 @@ def main():
             start_date=args.start_date,
             end_date=args.end_date,
             bank_lookup=bank_lookup,
+            pay_frequency=args.pay_frequency,
+            cash_deposit_frequency=args.cash_deposit_frequency,
         )
-        legit_txns.extend(profile_txns)
         log(f"✅ Profile-based transactions generated: {len(profile_txns)}")
+        earliest_timestamps_by_account(profile_txns, mins=earliest_map_all)
+        n_legit += len(profile_txns)
+        yield profile_txns
+        del profile_txns
 
     if args.legit_txns > 0:
         if args.agent_profiles:
             log("📊 Generating additional legitimate transactions...")
         else:
             log("📊 Generating legitimate transactions...")
-        base_txns = generate_legit_transactions(
-            accounts=accounts,
-            entities=entities,
-            n=args.legit_txns,
-            start_date=args.start_date,
-            end_date=args.end_date,
-            known_accounts=known_accounts_set
-        )
-        legit_txns.extend(base_txns)
-        log(f"✅ Legitimate transactions generated: {len(base_txns)}")
+        n_before = n_legit
+        yield from legit_chunks(args.legit_txns, "legit")
+        log(f"✅ Legitimate transactions generated: {n_legit - n_before}")
 
     # Determine earliest legitimate timestamp per account
     accounts_set = {a.id for a in accounts}
-    earliest_map_all = earliest_timestamps_by_account(legit_txns)
     earliest_map = {aid: ts for aid, ts in earliest_map_all.items() if aid in accounts_set}
     min_start_times = {aid: ts + timedelta(hours=1) for aid, ts in earliest_map.items()}
     accounts_with_history = [a for a in accounts if a.id in earliest_map]
 
-    laundering_txns = []
+    laundering_txns = EntryStore()
 
     if (args.patterns or args.laundering_chains > 0) and not accounts_with_history:
         log("⚠️  No legitimate transaction history; skipping laundering generation")
@@ -119,18 +425,16 @@ def main():
         with open(args.patterns, "r") as f:
             pattern_config = yaml.safe_load(f)
 
-        from generator.patterns import inject_patterns
-        laundering_txns = inject_patterns(
-            accounts=accounts_with_history,
-            pattern_config=pattern_config,
-            known_accounts=known_accounts_set,
-            min_start_time=min_start_times,
-        )
+        pool.share(**pattern_context(accounts_with_history, min_start_times))
+        tasks = pattern_tasks(pattern_config, stage_seed("patterns"))
+        for instance_txns in pool.map(pattern_shard, tasks):
+            laundering_txns.extend(instance_txns)
         log(f"✅ Laundering transactions generated (pattern-based): {len(laundering_txns)}")
 
     # Optional: Keep chain-based option active if needed
     elif args.laundering_chains > 0:
         log("💸 Generating laundering transaction chains...")
+        seed_stage("chains")
         laundering_txns = generate_laundering_chains(
             entities=entities,
             accounts=accounts_with_history,
@@ -139,44 +443,26 @@ def main():
             end_date=datetime.strptime(args.end_date, "%Y-%m-%d"),
             n_chains=args.laundering_chains,
             min_start_time=min_start_times,
+            index=ownership,
         )
         log(f"✅ Laundering transactions generated (chains): {len(laundering_txns)}")
 
-    if laundering_txns:
-        desired_legit = int(len(laundering_txns) / args.laundering_ratio)
-        if len(legit_txns) < desired_legit:
-            extra = desired_legit - len(legit_txns)
-            log(
-                f"⚖️  Generating {extra} additional legitimate transactions to maintain ratio {args.laundering_ratio}"
-            )
-            more_txns = generate_legit_transactions(
-                accounts=accounts,
-                entities=entities,
-                n=extra,
-                start_date=args.start_date,
-                end_date=args.end_date,
-                known_accounts=known_accounts_set,
-            )
-            legit_txns.extend(more_txns)
-            log(f"✅ Additional legitimate transactions generated: {len(more_txns)}")
+    if not laundering_txns:
+        return
 
-        flag_laundering_accounts(laundering_txns, accounts, entities)
+    desired_legit = int(len(laundering_txns) / args.laundering_ratio)
+    if n_legit < desired_legit:
+        extra = desired_legit - n_legit
+        log(
+            f"⚖️  Generating {extra} additional legitimate transactions to maintain ratio {args.laundering_ratio}"
+        )
+        n_before = n_legit
+        yield from legit_chunks(extra, "legit_topup")
+        log(f"✅ Additional legitimate transactions generated: {n_legit - n_before}")
 
-    all_txns = legit_txns + laundering_txns
-    if args.propagate_laundering:
-        log("🔍 Propagating laundering labels (taint tracking)...")
-        all_txns = propagate_laundering(all_txns)
-    else:
-        log("🔍 Skipping laundering propagation; using base labels.")
+    flag_laundering_accounts(laundering_txns, accounts, entities, index=ownership)
+    yield laundering_txns
 
-    log(f"💾 Exporting {len(all_txns)} transactions to {args.output}")
-    if args.format == "csv":
-        export_to_csv(all_txns, args.output)
-    else:
-        export_to_excel(all_txns, args.output)
-
-    log(f"📦 Total transactions to export: {len(all_txns)}")
-    log("✅ Done.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,47 @@
+import os
+import pickle
+import random
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from generator.entities import AccountTable, EntityTable, Company, Person, generate_entities
+
+
+def test_entities_and_accounts_are_table_views():
+    random.seed(0)
+    data = generate_entities(n_banks=2, n_individuals=4, n_companies=3)
+    entities, accounts = data["entities"], data["accounts"]
+
+    assert isinstance(entities, EntityTable) and isinstance(accounts, AccountTable)
+    assert [type(e) for e in entities] == [Person] * 4 + [Company] * 3
+    assert sum(len(e.accounts) for e in entities) == len(accounts)
+
+    # Accounts start with their owner's launderer flag
+    assert [a.launderer for a in accounts] == [data["index"].owner(a).launderer for a in accounts]
+    assert any(a.launderer for a in accounts) and not all(a.launderer for a in accounts)
+
+    acct = accounts[0]
+    owner = data["index"].owner(acct)
+    assert owner == entities[accounts.get("owner", 0)] == entities[acct.owner_row]
+    assert (acct.owner_id, acct.owner_name, acct.owner_type) == (owner.id, owner.name, owner.__class__.__name__)
+    assert acct.bank == acct.bank_code and acct.account_number == acct.id
+    assert accounts.lookup(acct.id) == acct and accounts.lookup("missing") is None
+
+    # Views write through to the table
+    acct.launderer = True
+    assert accounts[0].launderer is True and accounts.array("launderer")[0] == 1
+
+
+def test_tables_survive_pickling():
+    random.seed(1)
+    data = generate_entities(n_banks=2, n_individuals=3, n_companies=2)
+    loaded = pickle.loads(pickle.dumps(data))
+
+    assert [(a.id, a.owner_id, a.bank_name) for a in loaded["accounts"]] == [
+        (a.id, a.owner_id, a.bank_name) for a in data["accounts"]
+    ]
+    assert loaded["accounts"][0].owner_type == data["accounts"][0].owner_type
+    company = loaded["companies"][0]
+    assert company.table is loaded["entities"]
+    assert company.receiving_method and company.accounts[0].receiving_method == company.receiving_method
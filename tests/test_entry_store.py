@@ -0,0 +1,123 @@
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.entry_store import EntryStore, ENTRY_COLUMNS
+from utils.helpers import split_transaction
+
+
+def _account(acct_id, name):
+    return SimpleNamespace(
+        id=acct_id,
+        bank_name="Bank",
+        owner_name=name,
+        owner_type="Person",
+        bank="001",
+        bank_code="001",
+        launderer=False,
+        swift_code="SWIFT",
+        routing_number="123",
+        country="United States",
+    )
+
+
+def test_split_transaction_store_matches_dict_rows():
+    src = _account("A", "Alice")
+    tgt = _account("B", "Bob")
+    kwargs = dict(
+        txn_id="T1",
+        timestamp=datetime(2025, 1, 1, 10, 0),
+        src=src,
+        tgt=tgt,
+        amount=100.0,
+        currency="USD",
+        payment_type="wire",
+        is_laundering=True,
+        known_accounts={"A", "B"},
+        post_date=datetime(2025, 1, 2, 9, 0),
+    )
+
+    rows = split_transaction(**kwargs)
+    store = EntryStore()
+    written = split_transaction(store=store, **kwargs)
+
+    assert written == len(rows) == len(store) == 3
+    for row, stored in zip(rows, store):
+        for col in ENTRY_COLUMNS:
+            assert stored[col] == row.get(col)
+
+
+def test_extend_recodes_shared_vocabularies():
+    first = EntryStore()
+    second = EntryStore()
+    first.append_row({"transaction_id": "1", "account_id": "A", "counterparty": "B",
+                      "direction": "debit", "payment_type": "ach", "amount": 1.0})
+    second.append_row({"transaction_id": "2", "account_id": "B", "counterparty": "C",
+                       "direction": "credit", "payment_type": "wire", "amount": 2.0})
+
+    first.extend(second)
+
+    assert first.column("account_id") == ["A", "B"]
+    assert first.column("counterparty") == ["B", "C"]
+    assert first.column("direction") == ["debit", "credit"]
+    assert first.array("account_id")[1] == first.array("counterparty")[0]
+
+
+def test_to_frame_shares_numeric_buffers():
+    store = EntryStore()
+    for i in range(3):
+        store.append_row({"transaction_id": str(i), "account_id": "A", "amount": float(i)})
+
+    df = store.to_frame()
+
+    assert list(df.columns) == ENTRY_COLUMNS
+    assert df["amount"].tolist() == [0.0, 1.0, 2.0]
+    assert df["is_laundering"].dtype == bool
+    assert df["counterparty"].isna().all()
+
+
+def test_missing_fields_get_defaults():
+    store = EntryStore.from_rows([{"transaction_id": "1", "account_id": "A"}])
+    store.append_columns(2, transaction_id=["2", "3"], amount=[5.0, 6.0])
+
+    assert store.row(0)["amount"] == 0.0 and store.row(0)["is_laundering"] is False
+    assert store.row(0)["timestamp"] is None and store.row(0)["counterparty"] is None
+    assert store.row(1)["account_id"] is None and store.row(1)["is_laundering"] is False
+    assert store.column("amount") == [0.0, 5.0, 6.0]
+
+
+def test_time_columns_are_epoch_seconds_until_export():
+    from generator.exporter import to_dataframe
+
+    store = EntryStore()
+    store.append_row({"transaction_id": "1", "amount": 1.0,
+                      "timestamp": "2025-03-04 05:06:07", "post_date": datetime(2025, 3, 5, 9)})
+    store.append_row({"transaction_id": "2", "amount": 2.0, "timestamp": 0})
+
+    assert store.array("timestamp")[0] == 1741064767
+    assert store.get(0, "post_date") == datetime(2025, 3, 5, 9)
+    assert store.get(1, "post_date") is None
+
+    df = to_dataframe(store)
+    assert df["timestamp"].tolist() == ["2025-03-04 05:06:07", "1970-01-01 00:00:00"]
+    assert df["post_date"].tolist() == ["2025-03-05 09:00:00", None]
+
+
+def test_text_columns_are_coded_and_exported_as_categoricals():
+    store = EntryStore()
+    for i, name in enumerate(["Alice", "Bob", "Alice", float("nan")]):
+        store.append_row({"transaction_id": str(i), "account_id": "A", "amount": 1.0,
+                          "owner_name": name, "bank_name": "Bank", "channel": None})
+
+    assert store.array("owner_name").tolist() == [0, 1, 0, 2]
+    assert store.get(2, "owner_name") == "Alice"
+
+    df = store.to_frame()
+    assert df["bank_name"].dtype == "category"
+    assert df["owner_name"].tolist()[:3] == ["Alice", "Bob", "Alice"]
+    # NaN and None cannot be categories; both come back missing
+    assert df["owner_name"].isna().tolist() == [False, False, False, True]
+    assert df["channel"].isna().all()
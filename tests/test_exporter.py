@@ -0,0 +1,85 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from generator.exporter import (
+    export_chunks_to_csv,
+    export_chunks_to_excel,
+    export_chunks_to_parquet,
+    export_to_csv,
+    read_parquet_slice,
+)
+from utils.entry_store import EntryStore, ENTRY_COLUMNS
+
+
+def _chunk(start, n, step=1):
+    store = EntryStore()
+    for i in range(start, start + n):
+        store.append_row({"transaction_id": str(i), "account_id": "A", "amount": float(i),
+                          "timestamp": 1_735_725_600 + i * step, "bank": str(i % 2),
+                          "payment_type": "ach", "is_laundering": i % 3 == 0})
+    return store
+
+
+def test_streamed_csv_matches_in_memory_export(tmp_path):
+    chunks = [_chunk(0, 3), EntryStore(), _chunk(3, 2)]
+    whole = EntryStore()
+    for chunk in chunks:
+        whole.extend(chunk)
+
+    streamed = tmp_path / "streamed.csv"
+    in_memory = tmp_path / "in_memory.csv"
+    written = export_chunks_to_csv(iter(chunks), str(streamed), progress_every=2)
+    export_to_csv(whole, str(in_memory))
+
+    assert written == 5
+    assert streamed.read_text() == in_memory.read_text()
+    assert list(pd.read_csv(streamed).columns) == ENTRY_COLUMNS
+
+
+def test_appended_csv_matches_single_export(tmp_path):
+    appended = tmp_path / "appended.csv"
+    single = tmp_path / "single.csv"
+    export_chunks_to_csv([_chunk(0, 3)], str(appended))
+    export_chunks_to_csv([_chunk(3, 2)], str(appended), append=True)
+    export_chunks_to_csv([_chunk(0, 3), _chunk(3, 2)], str(single))
+
+    assert appended.read_text() == single.read_text()
+
+
+def test_parquet_dataset_is_partitioned_by_date_and_bank(tmp_path):
+    pytest.importorskip("pyarrow")
+    day = 86_400
+    out = tmp_path / "dataset"
+
+    written = export_chunks_to_parquet(
+        [_chunk(0, 4, step=day), _chunk(4, 4, step=day)], str(out), partition_by_bank=True
+    )
+
+    assert written == 8
+    assert sorted(p.name for p in out.iterdir())[:2] == ["txn_date=2025-01-01", "txn_date=2025-01-02"]
+    assert {p.name for p in (out / "txn_date=2025-01-01").iterdir()} == {"bank=0"}
+
+    df = read_parquet_slice(str(out), "2025-01-03", "2025-01-05", banks=["0"])
+    assert sorted(df["transaction_id"]) == ["2", "4"]
+    assert df["is_laundering"].dtype == bool
+    assert str(df["payment_type"].dtype) == "category"
+    assert str(df["timestamp"].dtype).startswith("datetime64")
+
+
+def test_excel_export_rolls_over_to_new_sheets(tmp_path):
+    out = tmp_path / "out.xlsx"
+
+    written = export_chunks_to_excel([_chunk(0, 3), _chunk(3, 4)], str(out), max_rows_per_sheet=3)
+
+    sheets = pd.read_excel(out, sheet_name=None)
+    assert written == 7
+    assert list(sheets) == ["transactions", "transactions_2", "transactions_3"]
+    assert [len(df) for df in sheets.values()] == [3, 3, 1]
+    combined = pd.concat(sheets.values())
+    assert combined["transaction_id"].astype(str).tolist() == [str(i) for i in range(7)]
+    assert list(combined.columns) == ENTRY_COLUMNS
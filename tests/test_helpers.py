@@ -1,10 +1,18 @@
 import os
+import random
 import sys
+from datetime import datetime
 from types import SimpleNamespace
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from utils.helpers import split_transaction
+import numpy as np
+
+from utils.helpers import (
+    split_transaction,
+    generate_transaction_timestamp,
+    generate_transaction_timestamps,
+)
 
 
 def test_split_transaction_amounts_are_absolute():
@@ -40,3 +48,63 @@ def test_split_transaction_amounts_are_absolute():
     )
 
     assert all(e["amount"] >= 0 for e in entries)
+
+
+def test_transaction_timestamps_fall_inside_business_hours():
+    random.seed(0)
+    start = datetime(2025, 1, 3, 16, 30)
+    end = datetime(2025, 1, 7, 9, 15)
+
+    for _ in range(500):
+        ts = generate_transaction_timestamp(start, end, entity_type="Company")
+        assert start <= ts <= end
+        assert ts.weekday() < 5 and 8 <= ts.hour < 17
+
+    is_company = np.array([True, False] * 500)
+    batch = generate_transaction_timestamps(start, end, is_company, np.random.default_rng(0))
+    hours = (batch - batch.astype("datetime64[D]")).astype("timedelta64[h]").astype(int)
+    assert ((hours >= 8) & (hours < 17))[is_company].all()
+    assert ((hours >= 8) & (hours < 20))[~is_company].all()
+    assert (batch >= np.datetime64(start)).all() and (batch <= np.datetime64(end)).all()
+
+
+def test_post_dates_skip_weekends_and_rule_based_holidays():
+    from utils.business_calendar import us_federal_holidays, business_calendar
+    from utils.helpers import generate_post_dates
+
+    assert datetime(2027, 11, 25).date() in us_federal_holidays(2027)  # Thanksgiving
+    assert datetime(2028, 6, 19).date() in us_federal_holidays(2028)  # Juneteenth
+    assert datetime(2020, 6, 19).date() not in us_federal_holidays(2020)  # before Juneteenth
+    assert datetime(2022, 12, 26).date() in us_federal_holidays(2022)  # Christmas observed
+
+    # Friday evening before a Monday holiday (MLK Day 2026-01-19)
+    ts = np.array(["2026-01-16T18:30:00"] * 200 + ["2027-07-02T10:00:00"] * 200,
+                  dtype="datetime64[s]")
+    posts = generate_post_dates(ts, np.random.default_rng(0))
+    calendar = business_calendar(2026, 2027)
+
+    assert (posts > ts).all()
+    assert calendar.is_business_day(posts).all()
+    assert ((posts - ts) <= np.timedelta64(4, "D")).all()
+    assert not (posts[:200].astype("datetime64[D]") == np.datetime64("2026-01-19")).any()
+
+    # Thursday evening before Friday 2020-06-19, a business day before 2021
+    ts = np.array(["2020-06-18T18:30:00"] * 200, dtype="datetime64[s]")
+    posts = generate_post_dates(ts, np.random.default_rng(0))
+    assert (posts.astype("datetime64[D]") == np.datetime64("2020-06-19")).any()
+    assert business_calendar(2020, 2020).is_business_day(posts).all()
+
+
+def test_faker_pool_hands_out_pregenerated_values():
+    from utils.helpers import FakerPool
+
+    pool = FakerPool(size=4)
+    names = [pool.name() for _ in range(20)]
+    addresses = [pool.address() for _ in range(20)]
+
+    # Once a pool is built no further Faker calls are made
+    pool.faker = None
+    assert set(names) <= set(pool._values["name"])
+    assert len(pool._values["name"]) == 4
+    assert all("\n" not in a for a in addresses)
+    assert pool.name() in pool._values["name"]
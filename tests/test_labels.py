@@ -68,3 +68,71 @@ def test_flag_laundering_accounts_updates_entries():
 
     for acct in accounts:
         assert acct.launderer is True
+
+
+def test_flag_laundering_accounts_uses_ownership_index():
+    from generator.entities import OwnershipIndex
+
+    acct_a = SimpleNamespace(id="A", owner_id="E1", launderer=False)
+    acct_b = SimpleNamespace(id="B", owner_id="E2", launderer=False)
+    owner_1 = SimpleNamespace(id="E1", accounts=[acct_a], launderer=False)
+    owner_2 = SimpleNamespace(id="E2", accounts=[acct_b], launderer=False)
+    index = OwnershipIndex([owner_1, owner_2], [acct_a, acct_b])
+
+    entries = [{"account_id": "A", "is_laundering": True, "direction": "debit"}]
+    flag_laundering_accounts(entries, [acct_a, acct_b], index=index)
+
+    assert index.owner("A") is owner_1
+    assert index.accounts_of(owner_2) == [acct_b]
+    assert list(index.owner_rows([acct_b, acct_a])) == [1, 0]
+    assert owner_1.launderer is True
+    assert owner_2.launderer is False
+
+
+def test_flag_laundering_accounts_on_store_and_tables():
+    import random
+
+    from generator.entities import generate_entities
+    from utils.entry_store import EntryStore
+
+    random.seed(0)
+    data = generate_entities(n_banks=1, n_individuals=3, n_companies=2)
+    accounts = data["accounts"]
+    first, other = accounts[0], accounts[len(accounts) - 1]
+    store = EntryStore.from_rows([
+        {"account_id": first.id, "counterparty": other.id, "is_laundering": True, "laundering_account": "No", "amount": 1.0},
+        {"account_id": other.id, "counterparty": first.id, "is_laundering": False, "laundering_account": "No", "amount": 1.0},
+        {"account_id": first.id, "counterparty": None, "is_laundering": False, "laundering_account": "No", "amount": 1.0},
+    ])
+    for acct in accounts:
+        acct.launderer = False
+    for ent in data["entities"]:
+        ent.launderer = False
+
+    flag_laundering_accounts(store, accounts, index=data["index"])
+
+    assert store.column("laundering_account") == ["Yes", "No", "Yes"]
+    assert [a.id for a in accounts if a.launderer] == [first.id]
+    assert [e.id for e in data["entities"] if e.launderer] == [first.owner_id]
+
+
+def test_taint_labels_respects_hops_and_window():
+    import numpy as np
+
+    from generator.labels import taint_labels
+
+    # A launders at t=0, then A -> B -> C -> D, one debit entry per transfer;
+    # B -> C happens in the same second as A -> B but is listed first
+    times = np.array([0, 10, 10, 30])
+    accounts = np.array([0, 1, 0, 2])
+    counterparties = np.array([9, 2, 1, 3])
+    debits = np.ones(4, dtype=bool)
+    labels = np.array([True, False, False, False])
+
+    assert taint_labels(times, accounts, counterparties, debits, labels, 10).tolist() == [True] * 4
+    assert taint_labels(times, accounts, counterparties, debits, labels, 10,
+                        max_hops=2).tolist() == [True, True, True, False]
+    assert taint_labels(times, accounts, counterparties, debits, labels, 10,
+                        window=15).tolist() == [True, True, True, False]
+    # The labels are returned; the inputs are left alone
+    assert labels.tolist() == [True, False, False, False]
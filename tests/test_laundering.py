@@ -1,7 +1,9 @@
 import random
-from datetime import timedelta
+from datetime import datetime, timedelta
 import unittest
+from unittest import mock
 
+from generator import laundering as laundering_module
 from generator.entities import generate_entities
 from generator.transactions import generate_legit_transactions
 from generator.laundering import generate_laundering_chains
@@ -48,6 +50,66 @@ class LaunderingTests(unittest.TestCase):
                 any(e["account_id"] == acct.id and not e["is_laundering"] for e in legit)
             )
 
+    def _staggered_history(self):
+        """A world where half the entities only have history after the window.
+
+        Entities with history in the window only have it on their first
+        account.
+        """
+        random.seed(0)
+        data = generate_entities(n_banks=1, n_individuals=8, n_companies=8)
+        start, end = datetime(2025, 1, 6), datetime(2025, 1, 10)
+        min_start = {}
+        for i, entity in enumerate(data["entities"]):
+            if i % 2:
+                min_start.update({a.id: end + timedelta(days=3) for a in entity.accounts})
+            else:
+                min_start[entity.accounts[0].id] = start
+        return data, start, end, min_start
+
+    def test_chains_only_use_intermediaries_with_history_in_window(self):
+        data, start, end, min_start = self._staggered_history()
+        picked = []
+        get_intermediaries = laundering_module.get_intermediaries
+
+        def spy(*args, **kwargs):
+            result = get_intermediaries(*args, **kwargs)
+            picked.extend(result or [])
+            return result
+
+        with mock.patch.object(laundering_module, "get_intermediaries", spy):
+            generate_laundering_chains(
+                entities=data["entities"],
+                accounts=data["accounts"],
+                known_accounts={a.id for a in data["accounts"]},
+                start_date=start,
+                end_date=end,
+                n_chains=40,
+                min_start_time=min_start,
+            )
+
+        # Intermediaries whose history starts after the window cannot take
+        # any transfer, which used to drop their chains
+        self.assertTrue(picked)
+        for entity in picked:
+            self.assertTrue(any(min_start.get(a.id, end) <= end for a in entity.accounts))
+
+    def test_chain_entries_only_touch_accounts_with_history(self):
+        data, start, end, min_start = self._staggered_history()
+        laundering = generate_laundering_chains(
+            entities=data["entities"],
+            accounts=data["accounts"],
+            known_accounts={a.id for a in data["accounts"]},
+            start_date=start,
+            end_date=end,
+            n_chains=40,
+            min_start_time=min_start,
+        )
+
+        touched = {e["account_id"] for e in laundering}
+        self.assertTrue(touched)
+        self.assertTrue(all(acct_id in min_start and min_start[acct_id] <= end for acct_id in touched))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,154 @@
+import os
+import random
+import re
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+import yaml
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from generator.entities import generate_entities
+from generator.parallel import ShardPool, legit_shard, legit_tasks, pattern_context, pattern_shard, pattern_tasks
+from utils.helpers import fake_pool, CHECK_COUNTERS, check_number_start, next_check_offset
+
+
+@pytest.fixture
+def seeded_fake_pool():
+    """Configure the in-process pool the way main does for a seeded run."""
+    saved = (fake_pool.size, fake_pool.seed, fake_pool._values)
+    fake_pool.resize(50)
+    fake_pool.reseed(5)
+    yield fake_pool
+    fake_pool.size, fake_pool.seed, fake_pool._values = saved
+
+
+def _context():
+    random.seed(0)
+    data = generate_entities(n_banks=2, n_individuals=10, n_companies=6)
+    return {
+        "accounts": data["accounts"],
+        "entities": data["entities"],
+        "index": data["index"],
+        "known_accounts": {a.id for a in data["accounts"]},
+        "faker_pool_size": 50,
+        "faker_pool_seed": 5,
+    }
+
+
+def _run(context, workers):
+    tasks = legit_tasks(250, 100, seed=123, start_date="2025-01-01", end_date="2025-01-31")
+    CHECK_COUNTERS.clear()
+    with ShardPool(context, workers=workers) as pool:
+        return list(pool.map(legit_shard, tasks))
+
+
+def _check_numbers(rows):
+    """Return each payor's check numbers in output order."""
+    numbers = {}
+    for row in rows:
+        if str(row["payment_type"]).lower() == "check" and row["direction"] == "debit":
+            number = re.search(r", (\d{4,}), ", row["source_description"]).group(1)
+            numbers.setdefault(row["account_id"], []).append(int(number))
+    return numbers
+
+
+def test_legit_tasks_use_fixed_size_shards():
+    tasks = legit_tasks(250, 100, seed=1, start_date="2025-01-01", end_date="2025-01-31")
+    assert [t["n"] for t in tasks] == [100, 100, 50]
+    assert len({t["seed"] for t in tasks}) == 3
+
+
+def test_legit_engine_is_built_once_per_context(monkeypatch):
+    import generator.parallel as parallel
+
+    builds = []
+    build = parallel.legit_engine
+    monkeypatch.setattr(parallel, "legit_engine", lambda *a: builds.append(1) or build(*a))
+
+    context = _context()
+    shards = _run(context, workers=1)
+    assert len(shards) == 3 and sum(map(len, shards)) >= 250
+    assert len(builds) == 1 and "legit_engine" in context
+
+
+def test_shards_match_across_worker_counts(seeded_fake_pool):
+    context = _context()
+    state = random.getstate()
+
+    serial = _run(context, workers=1)
+    assert random.getstate() == state
+    parallel = _run(context, workers=2)
+
+    assert len(serial) == len(parallel) == 3
+    for a, b in zip(serial, parallel):
+        assert a.to_frame().equals(b.to_frame())
+    CHECK_COUNTERS.clear()
+
+
+def test_check_numbers_continue_across_shards_and_appends(tmp_path):
+    import pandas as pd
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    output, world = str(tmp_path / "out.csv"), str(tmp_path / "world.pkl")
+    common = ["--seed", "3", "--individuals", "6", "--companies", "4", "--legit_txns", "600",
+              "--chunk_size", "100", "--laundering_chains", "0", "--world", world]
+    subprocess.run([sys.executable, "main.py", *common, "--format", "csv", "--output", output,
+                    "--start_date", "2025-01-01", "--end_date", "2025-01-31"], cwd=root, check=True,
+                   capture_output=True)
+    first = _check_numbers(pd.read_csv(output).to_dict("records"))
+    subprocess.run([sys.executable, "main.py", *common, "--append",
+                    "--start_date", "2025-02-01", "--end_date", "2025-02-28"], cwd=root, check=True,
+                   capture_output=True)
+    both = _check_numbers(pd.read_csv(output).to_dict("records"))
+
+    assert first and any(len(both[p]) > len(first[p]) for p in first)
+    # Each shard issues from its own range, so numbers only ever increase
+    for numbers in both.values():
+        assert numbers == sorted(set(numbers))
+
+
+def test_shards_issue_checks_from_their_reserved_ranges():
+    tasks = legit_tasks(250, 100, seed=1, start_date="2025-01-01", end_date="2025-01-31", check_offset=7)
+    assert [t["check_offset"] for t in tasks] == [7, 107, 207]
+
+    context = _context()
+    CHECK_COUNTERS.clear()
+    with ShardPool(context) as pool:
+        shards = [_check_numbers(store.to_frame().to_dict("records")) for store in pool.map(legit_shard, tasks)]
+    # Within a shard a payor's checks are consecutive; later shards start above earlier ones
+    last = {}
+    for task, numbers in zip(tasks, shards):
+        for payor, issued in numbers.items():
+            assert issued == list(range(issued[0], issued[0] + len(issued)))
+            assert issued[0] >= check_number_start(payor) + task["check_offset"]
+            assert issued[0] > last.get(payor, 0)
+            last[payor] = issued[-1]
+    assert CHECK_COUNTERS == last
+    assert next_check_offset() >= 207 + 1
+    CHECK_COUNTERS.clear()
+
+
+def test_pattern_tasks_share_accounts_through_the_context(seeded_fake_pool):
+    with open(os.path.join(os.path.dirname(__file__), "..", "config", "patterns.yaml")) as f:
+        config = yaml.safe_load(f)
+    context = _context()
+    accounts = list(context["accounts"])
+    shared = pattern_context(accounts, {a.id: datetime(2025, 1, 2) for a in accounts[:8]})
+    tasks = pattern_tasks(config, seed=7)
+    assert len(tasks) == sum(p["instances"] for p in config["patterns"])
+    assert all(set(task) == {"pattern", "seed"} for task in tasks)
+
+    results = []
+    for workers in (1, 2):
+        CHECK_COUNTERS.clear()
+        with ShardPool(dict(context), workers=workers) as pool:
+            pool.share(**shared)
+            results.append([store.to_frame() for store in pool.map(pattern_shard, tasks)])
+    assert all(a.equals(b) for a, b in zip(*results))
+    ids = {a.id for a in accounts[:8]}
+    assert any(len(frame) for frame in results[0])
+    assert all(set(frame["account_id"]) & ids for frame in results[0] if len(frame))
+    CHECK_COUNTERS.clear()
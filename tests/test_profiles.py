@@ -0,0 +1,31 @@
+import os
+import shutil
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from generator.profiles import ProfileBook
+
+WORKBOOK = os.path.join(os.path.dirname(__file__), "..", "agents", "agent_profiles.xlsx")
+
+
+def test_profile_book_caches_parsed_sheets(tmp_path):
+    path = tmp_path / "profiles.xlsx"
+    shutil.copy(WORKBOOK, path)
+    cache = tmp_path / "cache"
+
+    parsed = ProfileBook(str(path), cache_dir=str(cache)).frames
+    assert set(parsed) == {"banks", "People", "Companies1", "Combined_Data"}
+    assert parsed["People"].equals(pd.read_excel(path, sheet_name="People"))
+
+    cached = ProfileBook(str(path), cache_dir=str(cache)).frames
+    for name, df in parsed.items():
+        assert cached[name].equals(df)
+
+    # A newer workbook gets its own cache entry
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    ProfileBook(str(path), cache_dir=str(cache)).frames
+    assert len(list(cache.glob("*.sheets"))) == 2
@@ -0,0 +1,402 @@
+import os
+import random
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from generator.entities import generate_entities
+import numpy as np
+import pandas as pd
+
+import generator.transactions as transactions_module
+from generator.profiles import ProfileBook
+from generator.transactions import (
+    generate_legit_transactions,
+    generate_profile_transactions,
+    MerchantIndex,
+    ProfileAccount,
+    ProfileAccountRegistry,
+    get_payroll_dates,
+    _expand_payer_patterns,
+    _payroll_plan,
+    _cash_deposit_plan,
+    _split_cash_deposits,
+    _append_transfers,
+    _draw_legit_batch,
+    legit_engine,
+)
+from generator.entities import OwnershipIndex
+from utils.entry_store import EntryStore
+from utils.helpers import CHECK_COUNTERS, describe_transaction, split_transaction
+
+
+def _world(seed=0):
+    random.seed(seed)
+    data = generate_entities(n_banks=2, n_individuals=15, n_companies=10)
+    return data["accounts"], data["entities"]
+
+
+def test_legit_batches_respect_visibility_and_known_accounts():
+    accounts, entities = _world()
+    known = {a.id for a in accounts[::2]}
+    owners = {a.id: next(e for e in entities if e.id == a.owner_id) for a in accounts}
+
+    store = generate_legit_transactions(
+        accounts=accounts,
+        entities=entities,
+        n=300,
+        known_accounts=known,
+        batch_size=64,
+    )
+
+    assert len(store) > 0
+    for entry in store:
+        assert entry["account_id"] in known
+        visibility = owners[entry["account_id"]].visibility
+        if entry["direction"] == "debit":
+            assert visibility in ("sender", "both")
+        else:
+            assert visibility in ("receiver", "both")
+
+
+def test_legit_generation_is_reproducible_from_random_seed():
+    accounts, entities = _world()
+    known = {a.id for a in accounts}
+
+    random.seed(42)
+    first = generate_legit_transactions(accounts, entities, n=50, known_accounts=known)
+    random.seed(42)
+    second = generate_legit_transactions(accounts, entities, n=50, known_accounts=known)
+
+    assert first.column("account_id") == second.column("account_id")
+    assert first.column("timestamp") == second.column("timestamp")
+    assert first.column("amount") == second.column("amount")
+
+
+def test_legit_generation_produces_requested_count_with_sparse_known_accounts():
+    accounts, entities = _world(seed=3)
+    known = {accounts[0].id, accounts[1].id}
+
+    store = generate_legit_transactions(
+        accounts, entities, n=40, known_accounts=known, batch_size=16
+    )
+
+    # Parts of a split ATM withdrawal share their transaction's id prefix
+    assert len({txn_id.split("-")[0] for txn_id in store.column("transaction_id")}) == 40
+
+
+def test_transfers_written_column_wise_match_split_transaction():
+    accounts, entities = _world()
+    known = {a.id for a in accounts[::2]}
+    engine = legit_engine(accounts, OwnershipIndex(entities), known)
+    tables = engine["tables"]
+    batch = _draw_legit_batch(tables, engine["pools"], engine["known_mask"], 400, np.random.default_rng(0))
+    rows = np.flatnonzero(~batch["is_cash"])
+    timestamps = np.datetime64("2025-01-06T09:00:00", "s").astype(np.int64) + 3600 * np.arange(400)
+    post_dates = timestamps + 86400
+    txn_ids = [f"t{i}" for i in range(400)]
+
+    # Start every payor's checks at the same number in both runs
+    CHECK_COUNTERS.clear()
+    CHECK_COUNTERS.update({a.id: 1000 for a in accounts})
+    bulk = EntryStore()
+    _append_transfers(
+        bulk, accounts, batch["primary"][rows], batch["target"][rows],
+        (tables["pt_names"], batch["key"][rows]), batch["amount"][rows], timestamps[rows],
+        post_dates[rows], [txn_ids[r] for r in rows.tolist()], engine["known_mask"],
+        np.random.default_rng(1), purposes=tables["purposes"][batch["purpose"][rows]],
+    )
+
+    CHECK_COUNTERS.update({a.id: 1000 for a in accounts})
+    expected = EntryStore()
+    for row in rows.tolist():
+        payment_type = tables["pt_names"][batch["key"][row]]
+        purpose = tables["purposes"][batch["purpose"][row]]
+        src = accounts[batch["primary"][row]]
+        split_transaction(
+            txn_id=txn_ids[row],
+            timestamp=int(timestamps[row]),
+            src=src,
+            tgt=accounts[batch["target"][row]],
+            amount=float(batch["amount"][row]),
+            currency="USD",
+            payment_type=payment_type,
+            is_laundering=False,
+            source_description=describe_transaction(payment_type, purpose) if payment_type != "ACH" else "",
+            transaction_type="Expense",
+            known_accounts=known,
+            post_date=int(post_dates[row]),
+            store=expected,
+        )
+    CHECK_COUNTERS.clear()
+
+    got, want = bulk.to_frame(), expected.to_frame()
+    assert len(got) == len(want) > 0
+    assert set(got["payment_type"]) == {"ACH", "Wire", "Check", "POS", "fee"}
+    # Exchange rates come from the batch generator instead of ``random``
+    strip = lambda details: details and {k: v for k, v in details.items() if k != "exchange_rate"}
+    assert got["wire_details"].map(strip).tolist() == want["wire_details"].map(strip).tolist()
+    for col in got.columns.drop("wire_details"):
+        assert got[col].astype(object).tolist() == want[col].astype(object).tolist(), col
+
+
+def test_profile_transfers_written_column_wise_match_split_transaction():
+    accounts = [
+        ProfileAccount(
+            f"A{i}", f"E{i}", owner_type, owner_name=f"Name {i}", routing_number="021000021",
+            credit_card_number=f"4000{i}", debit_card_number=f"5000{i}", receiving_method="Square",
+        )
+        for i, owner_type in enumerate(["Person", "Company", "Merchant", "Merchant"])
+    ]
+    known = {"A0", "A1", "A2"}
+    payment_types = ["ccard", "debit", "pos", "p2p", "check", "ach", "credit"]
+    rows = [(s, t, pt) for s in (0, 1) for t in (2, 3) for pt in payment_types]
+    src, tgt, kinds = (list(col) for col in zip(*rows))
+    n = len(rows)
+    amounts = np.round(np.linspace(5, 900, n), 2)
+    timestamps = np.datetime64("2025-01-06T09:00:00", "s").astype(np.int64) + 3600 * np.arange(n)
+    purposes = np.array(["Dining Out", "Retail Goods"] * (n // 2), dtype=object)
+    txn_ids = [f"t{i}" for i in range(n)]
+    names, codes = np.unique(kinds, return_inverse=True)
+
+    CHECK_COUNTERS.clear()
+    CHECK_COUNTERS.update({a.id: 1000 for a in accounts})
+    bulk = EntryStore()
+    _append_transfers(
+        bulk, accounts, np.array(src), np.array(tgt), (names.tolist(), codes), amounts,
+        timestamps, timestamps + 86400, txn_ids, [a.id in known for a in accounts],
+        np.random.default_rng(0), purposes=purposes, check_types=purposes,
+    )
+
+    CHECK_COUNTERS.update({a.id: 1000 for a in accounts})
+    expected = EntryStore()
+    for i in range(n):
+        split_transaction(
+            txn_id=txn_ids[i],
+            timestamp=int(timestamps[i]),
+            src=accounts[src[i]],
+            tgt=accounts[tgt[i]],
+            amount=float(amounts[i]),
+            currency="USD",
+            payment_type=kinds[i],
+            is_laundering=False,
+            source_description=describe_transaction(kinds[i], purposes[i]) if kinds[i] != "ach" else "",
+            transaction_type=purposes[i] if kinds[i] == "check" else None,
+            known_accounts=known,
+            post_date=int(timestamps[i]) + 86400,
+            store=expected,
+        )
+    CHECK_COUNTERS.clear()
+
+    got, want = bulk.to_frame(), expected.to_frame()
+    assert len(got) == len(want) > 0
+    for col in got.columns:
+        assert got[col].astype(object).tolist() == want[col].astype(object).tolist(), col
+
+
+def test_merchant_index_matches_naics_prefixes():
+    merchants = pd.DataFrame({
+        "entity_id": ["M1", "M2", "M3"],
+        "naics_code": [722511.0, 722513.0, 445110.0],
+        "accepted_payment_methods": ["pos, c_check", None, "cash"],
+        "payment_probabilities": ["0.25, 0.75", None, "0.5, 0.5"],
+    })
+    index = MerchantIndex(merchants)
+
+    assert index.lookup("7225") == [0, 1]
+    assert index.lookup("445110.0") == [2]
+    assert index.lookup("9999") == []
+    assert index.payment_options[0] == (["pos", "check"], [0.25, 1.0])
+    # Weights that do not line up with the types are ignored
+    assert index.payment_options[2] == (["cash"], None)
+
+
+def test_payer_patterns_expand_to_one_row_per_transaction():
+    merchants = pd.DataFrame({"entity_id": ["M1", "M2"], "naics_code": [722511, 445110]})
+    payers = pd.DataFrame({
+        "merchant_patterns": ["722, 445, 999", None, "445,,722"],
+        "merchant_frequency": ["2, 0.4, 3", "1", "1.6, x"],
+    }, index=[10, 11, 12])
+
+    plan = _expand_payer_patterns(payers, MerchantIndex(merchants))
+
+    # 999 matches no merchant, payer 1 has no patterns and "x" is not a number
+    assert plan["payer"].tolist() == [0, 0, 0, 2, 2]
+    assert plan["code"].tolist() == ["722", "722", "445", "445", "445"]
+
+
+def test_profile_account_registry_interns_accounts():
+    profile_df = pd.DataFrame({
+        "entity_id": ["P1", "M1"],
+        "type": ["person", "merchant"],
+        "name": ["Pat", "Shop"],
+        "bank": [513, 211],
+        "account_number": [123.0, None],
+    })
+    registry = ProfileAccountRegistry(
+        profile_df,
+        bank_lookup={"513": {"name": "Bank A", "routing_number": "111"}},
+        card_numbers={"P1": {"credit": "VSXXXX XXXX XXXX 1234"}},
+    )
+
+    payer = registry.get("P1")
+    merchant = registry.get("M1")
+    assert registry.get("P1") is payer
+    assert (payer.id, payer.owner_type, payer.bank_name) == ("123.0", "Person", "Bank A")
+    assert payer.credit_card_number == "VSXXXX XXXX XXXX 1234"
+    assert (merchant.id, merchant.owner_type, merchant.credit_card_number) == ("M1", "Merchant", None)
+
+
+def test_payroll_dates_follow_pay_frequency():
+    start, end = datetime(2025, 1, 1), datetime(2025, 1, 31)
+    assert [d.day for d in get_payroll_dates(start, end)] == [6, 20]
+    assert [d.day for d in get_payroll_dates(start, end, "weekly")] == [6, 13, 20, 27]
+    # Biweekly Mondays stay on the same cycle whatever the window start
+    assert [d.day for d in get_payroll_dates(start, end, "biweekly")] == [13, 27]
+    assert [d.day for d in get_payroll_dates(datetime(2025, 1, 20), end, "biweekly")] == [27]
+
+
+def test_payroll_plan_pays_each_employee_per_pay_date():
+    profile_df = pd.DataFrame({
+        "entity_id": ["C1", "C2", "E1", "E2", "E3"],
+        "type": ["company", "company", "person", "person", "person"],
+        "employer": [None, None, "C1", "C2", "missing"],
+        "transaction_scaler": [None, None, 1.0, 2.0, 1.0],
+        "pay_frequency": [None, "weekly", None, None, None],
+    })
+    plan = _payroll_plan(profile_df, datetime(2025, 1, 1), datetime(2025, 1, 31),
+                         "semimonthly", np.random.default_rng(0))
+
+    assert plan["employee"].count("E1") == 2
+    assert plan["employee"].count("E2") == 4
+    assert "E3" not in plan["employee"]
+    e1 = plan["amount"][np.array(plan["employee"]) == "E1"]
+    e2 = plan["amount"][np.array(plan["employee"]) == "E2"]
+    assert ((e1 >= 4500) & (e1 <= 5500)).all()
+    # Weekly paychecks carry 24/52 of a semimonthly one, times the scaler
+    assert ((e2 >= 2 * 4500 * 24 / 52) & (e2 <= 2 * 5500 * 24 / 52)).all()
+    hours = (plan["timestamp"] - plan["timestamp"].astype("datetime64[D]")).astype(int) // 3600
+    assert ((hours >= 8) & (hours < 17)).all()
+
+
+def test_payroll_entries_debit_the_company_and_credit_the_employee():
+    profile_df = pd.DataFrame({
+        "entity_id": ["C1", "E1", "E2"],
+        "type": ["company", "person", "person"],
+        "name": ["Acme", "Ann", "Bob"],
+        "address": ["1 Main St", "", ""],
+        "account_number": ["100", "200", None],
+        "employer": [None, "C1", "C1"],
+        "bank": ["B1"] * 3,
+        "naics_code": [None] * 3,
+        "merchant_patterns": [None] * 3,
+        "merchant_frequency": [None] * 3,
+    })
+    random.seed(0)
+    store = generate_profile_transactions(profile_df, "2025-01-01", "2025-01-31")
+    frame = store.to_frame()
+
+    # Two paychecks each; only the company and Ann have known accounts
+    debits = frame[frame["direction"] == "debit"]
+    credits = frame[frame["direction"] == "credit"]
+    assert (frame["payment_type"] == "ach").all()
+    assert sorted(debits["source_description"]) == ["ACH Payroll Ann - 200"] * 2 + ["ACH Payroll Bob - E2"] * 2
+    assert (debits["account_id"] == "100").all()
+    assert credits["source_description"].tolist() == ["ACH Direct Dep Payroll Acme - 1 Main St"] * 2
+    assert (credits["account_id"] == "200").all()
+    # Each credit directly follows the debit of the same paycheck
+    for i in np.flatnonzero(frame["direction"] == "credit"):
+        assert frame["entry_id"][i - 1] == frame["transaction_id"][i] + "-D"
+
+
+def test_cash_deposits_carry_all_held_cash():
+    day = int(np.datetime64("2025-01-06T00:00:00", "s").astype(np.int64))  # Monday
+    hour = 3600
+    merchants = [0, 0, 1, 0, 1]
+    amounts = [300.0, 450.0, 1200.0, 80.0, 25.0]
+    times = [day + 9 * hour, day + 15 * hour, day + 10 * hour, day + 86400 + 11 * hour, day + 4 * 86400]
+    end = datetime(2025, 1, 31)
+
+    daily = _cash_deposit_plan(merchants, amounts, times, end, "daily", np.random.default_rng(0))
+    assert daily["merchant"].tolist() == [0, 0, 1, 1]
+    assert daily["amount"].tolist() == [750.0, 80.0, 1200.0, 25.0]
+    delay = daily["timestamp"].astype(np.int64) - np.array([times[1], times[3], times[2], times[4]])
+    assert (delay >= 1800).all()
+    # Deposits land in banking hours; ones made after hours roll to the next morning
+    deposited = daily["timestamp"]
+    hours = (deposited - deposited.astype("datetime64[D]")).astype(int) // 3600
+    weekday = (deposited.astype("datetime64[D]").astype(np.int64) + 3) % 7
+    assert ((hours >= 8) & (hours < 17) & (weekday < 5)).all()
+    assert deposited[3] >= np.datetime64("2025-01-10T08:00:00")
+    assert deposited[3] < np.datetime64("2025-01-10T09:00:00")
+
+    saturday = _cash_deposit_plan([0], [40.0], [day + 5 * 86400 + 12 * hour], end, "daily",
+                                  np.random.default_rng(0))
+    assert str(saturday["timestamp"][0].astype("datetime64[D]")) == "2025-01-13"
+    # No banking window is left before ``end``, so the cash is not deposited
+    late = _cash_deposit_plan([0, 1], [40.0, 60.0], [day + 10 * hour, day + 24 * 86400 + 16 * hour + 3000],
+                              end, "daily", np.random.default_rng(0))
+    assert late["merchant"].tolist() == [0] and late["amount"].tolist() == [40.0]
+    assert _cash_deposit_plan([1], [60.0], [day + 24 * 86400 + 16 * hour + 3000], end, "daily",
+                              np.random.default_rng(0)) is None
+
+    weekly = _cash_deposit_plan(merchants, amounts, times, end, "weekly", np.random.default_rng(0))
+    assert weekly["amount"].tolist() == [830.0, 1225.0]
+    assert weekly["amount"].sum() == sum(amounts)
+    assert _cash_deposit_plan([], [], [], end, "daily", np.random.default_rng(0)) is None
+
+
+def test_cash_deposits_split_into_atm_and_teller_entries():
+    totals = [2.71, 480.0, 1234.56, 34080.69]
+    split = _split_cash_deposits(totals, np.random.default_rng(3))
+    amounts, atm = split["amount"], split["atm"]
+
+    sums = np.bincount(split["deposit"], weights=amounts, minlength=len(totals))
+    assert np.allclose(sums, totals, atol=1e-9)
+    assert (amounts > 0).all()
+    assert (amounts[atm] <= 500).all() and (amounts[atm] % 20 == 0).all()
+    assert (amounts[~atm] <= 5000).all()
+    # Coins always go to the teller
+    assert not atm[split["deposit"] == 0].any()
+    assert (np.bincount(split["deposit"]) >= [1, 1, 1, 7]).all()
+
+
+def test_settlement_deposits_match_held_cash_per_merchant(tmp_path, monkeypatch):
+    workbook = os.path.join(os.path.dirname(__file__), "..", "agents", "agent_profiles.xlsx")
+    profile_df = ProfileBook(workbook, cache_dir=str(tmp_path)).sheet("Combined_Data")
+    store = EntryStore()
+    seen = {}
+
+    def plan(merchants, amounts, timestamps, *args):
+        # Settlement deposits are the last entries written
+        planned = _cash_deposit_plan(merchants, amounts, timestamps, *args)
+        seen.update(merchants=list(merchants), amounts=list(amounts), timestamps=list(timestamps),
+                    planned=planned, first=len(store))
+        return planned
+
+    monkeypatch.setattr(transactions_module, "_cash_deposit_plan", plan)
+    random.seed(0)
+    generate_profile_transactions(profile_df, "2025-01-01", "2025-01-31", store=store)
+
+    records = MerchantIndex(profile_df[profile_df["type"] == "merchant"].copy()).records
+    account = lambda pos: str(records[pos]["account_number"])
+    planned, held, held_early = {}, {}, {}
+    for pos, amount in zip(seen["planned"]["merchant"].tolist(), seen["planned"]["amount"].tolist()):
+        planned[account(pos)] = planned.get(account(pos), 0.0) + round(amount, 2)
+    # Cash taken before the last banking day always finds a window
+    cutoff = np.datetime64("2025-01-29", "s").astype(np.int64)
+    for pos, amount, ts in zip(seen["merchants"], seen["amounts"], seen["timestamps"]):
+        held[account(pos)] = held.get(account(pos), 0.0) + amount
+        if ts < cutoff:
+            held_early[account(pos)] = held_early.get(account(pos), 0.0) + amount
+    deposits = store.to_frame().iloc[seen["first"]:]
+    deposited = deposits.groupby(deposits["account_id"].astype(str), observed=True)["amount"].sum()
+
+    assert planned and (deposits["direction"] == "credit").all()
+    assert set(deposits["channel"]) == {"ATM", "Teller"}
+    assert set(deposited.index) == set(planned)
+    for acct, amount in planned.items():
+        # Entries add up to the deposit to the cent; nothing is rounded to notes
+        assert abs(deposited[acct] - amount) < 1e-6
+        assert held_early.get(acct, 0.0) - 0.01 <= amount <= held[acct] + 0.01
@@ -0,0 +1,116 @@
+import os
+import random
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from generator.entities import generate_entities
+from generator.labels import propagate_laundering
+from generator.world import (
+    new_world,
+    save_world,
+    load_world,
+    snapshot_key,
+    save_entities_snapshot,
+    load_entities_snapshot,
+    taint_settings,
+)
+import pytest
+from utils.helpers import CHECK_COUNTERS
+
+
+def _entry(ts, acct, counterparty, direction, laundering=False):
+    return {"timestamp": ts, "account_id": acct, "counterparty": counterparty,
+            "direction": direction, "is_laundering": laundering}
+
+
+def test_world_round_trip_restores_state(tmp_path):
+    random.seed(0)
+    data = generate_entities(n_banks=2, n_individuals=3, n_companies=2)
+    world = new_world(data, {data["accounts"][0].id}, seed=5)
+    world["end_date"] = "2025-01-31"
+    CHECK_COUNTERS.clear()
+    CHECK_COUNTERS["payor"] = 1234
+    path = tmp_path / "world.pkl"
+    save_world(world, str(path))
+    CHECK_COUNTERS.clear()
+
+    loaded = load_world(str(path))
+
+    assert CHECK_COUNTERS == {"payor": 1234}
+    assert loaded["seed"] == 5 and loaded["end_date"] == "2025-01-31"
+    assert [a.id for a in loaded["entities"]["accounts"]] == [a.id for a in data["accounts"]]
+    # Ownership still resolves on the unpickled objects
+    acct = loaded["entities"]["accounts"][0]
+    assert loaded["entities"]["index"].owner(acct).id == acct.owner_id
+    CHECK_COUNTERS.clear()
+
+
+def test_taint_state_carries_across_windows():
+    world = new_world({}, set())
+    propagate_laundering(
+        [_entry("2025-01-05 10:00:00", "A", "B", "debit", laundering=True)],
+        state=world["taint"],
+    )
+    later = propagate_laundering(
+        [_entry("2025-02-03 10:00:00", "B", "C", "debit")],
+        state=world["taint"],
+    )
+
+    assert later[0]["is_laundering"]
+    assert world["taint"]["tainted"] == {"A", "B", "C"}
+
+
+def test_appended_windows_keep_the_world_taint_settings():
+    world = new_world({}, set())
+    world.update(propagate_laundering=True, taint_max_hops=3, taint_window_days=None)
+
+    # Omitted settings default to the world's, including taint tracking itself
+    assert taint_settings(world) == {
+        "propagate_laundering": True, "taint_max_hops": 3, "taint_window_days": None,
+    }
+    assert taint_settings(world, propagate_laundering=True, taint_max_hops=3)["taint_max_hops"] == 3
+    with pytest.raises(ValueError, match="taint_max_hops"):
+        taint_settings(world, taint_max_hops=5)
+    with pytest.raises(ValueError, match="taint_window_days"):
+        taint_settings(world, taint_window_days=7)
+
+    # Earlier windows without taint tracking cannot be continued with it
+    world["propagate_laundering"] = False
+    assert taint_settings(world)["propagate_laundering"] is False
+    with pytest.raises(ValueError, match="propagate_laundering"):
+        taint_settings(world, propagate_laundering=True)
+
+
+def test_entity_snapshot_is_keyed_on_parameters(tmp_path):
+    random.seed(0)
+    data = generate_entities(n_banks=2, n_individuals=3, n_companies=2)
+    path = str(tmp_path / "entities.pkl")
+    key = snapshot_key(banks=2, individuals=3, companies=2, seed=1)
+    save_entities_snapshot(path, key, data)
+
+    loaded = load_entities_snapshot(path, key)
+    assert [e.id for e in loaded["entities"]] == [e.id for e in data["entities"]]
+    assert load_entities_snapshot(path, snapshot_key(banks=2, individuals=3, companies=2, seed=2)) is None
+    assert load_entities_snapshot(str(tmp_path / "missing.pkl"), key) is None
+
+
+def test_world_cache_keeps_agent_profile_population(tmp_path):
+    from argparse import Namespace
+
+    from generator.profiles import ProfileBook
+    from main import load_or_generate_entities
+
+    workbook = os.path.join(os.path.dirname(__file__), "..", "agents", "agent_profiles.xlsx")
+    profiles = ProfileBook(workbook, cache_dir=str(tmp_path / "profiles"))
+    args = Namespace(world_cache=str(tmp_path / "entities.pkl"), agent_profiles=workbook,
+                     banks=2, individuals=5, companies=3, seed=1)
+    people = set(profiles.sheet("People")["entity_id"].astype(str))
+
+    random.seed(0)
+    data = load_or_generate_entities(args, profiles)
+    cached = load_or_generate_entities(args, profiles)
+
+    individuals = [e.id for e in data["individuals"]]
+    assert individuals and set(individuals) <= people
+    assert [e.id for e in cached["entities"]] == [e.id for e in data["entities"]]
@@ -0,0 +1,153 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+# Posting happens between these hours on business days
+POSTING_START_HOUR = 8
+POSTING_END_HOUR = 17
+# Latest calendar-day offset between a transaction and its posting
+MAX_POST_DAYS = 3
+
+
+def _nth_weekday(year, month, weekday, n):
+    """Return the ``n``-th ``weekday`` (Monday == 0) of a month; ``n=-1`` is the last."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    nxt = date(year + (month == 12), month % 12 + 1, 1)
+    last = nxt - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def us_federal_holidays(year: int) -> list[date]:
+    """Return the observed US federal (Federal Reserve) holidays for ``year``.
+
+    Fixed-date holidays falling on a Sunday are observed the following
+    Monday; those falling on a Saturday are not moved, matching the
+    Federal Reserve's banking schedule.
+    """
+    fixed = [
+        date(year, 1, 1),    # New Year's Day
+        date(year, 7, 4),    # Independence Day
+        date(year, 11, 11),  # Veterans Day
+        date(year, 12, 25),  # Christmas Day
+    ]
+    if year >= 2021:
+        fixed.append(date(year, 6, 19))  # Juneteenth, a federal holiday since 2021
+    floating = [
+        _nth_weekday(year, 1, 0, 3),   # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),   # Washington's Birthday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _nth_weekday(year, 9, 0, 1),   # Labor Day
+        _nth_weekday(year, 10, 0, 2),  # Columbus Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving Day
+    ]
+    observed = [d + timedelta(days=1) if d.weekday() == 6 else d for d in fixed]
+    return sorted(observed + floating)
+
+
+class BusinessCalendar:
+    """US banking calendar covering ``first_year`` through ``last_year``.
+
+    Wraps a ``numpy.busdaycalendar`` so posting dates for whole arrays of
+    transaction timestamps are computed in a handful of vector operations.
+    """
+
+    def __init__(self, first_year: int, last_year: int):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.holidays = np.array(
+            [d for y in range(first_year, last_year + 1) for d in us_federal_holidays(y)],
+            dtype="datetime64[D]",
+        )
+        self.busdaycal = np.busdaycalendar(weekmask="1111100", holidays=self.holidays)
+
+    def covers(self, first_year: int, last_year: int) -> bool:
+        return self.first_year <= first_year and last_year <= self.last_year
+
+    def is_holiday(self, dt) -> bool:
+        day = np.datetime64(dt, "D")
+        return bool(np.isin(day, self.holidays))
+
+    def is_business_day(self, dates) -> np.ndarray:
+        return np.is_busday(np.asarray(dates, dtype="datetime64[D]"), busdaycal=self.busdaycal)
+
+    def roll_forward(self, dates) -> np.ndarray:
+        """Move each date to the next business day when it is not one already."""
+        return np.busday_offset(
+            np.asarray(dates, dtype="datetime64[D]"), 0, roll="forward", busdaycal=self.busdaycal
+        )
+
+    def post_dates_from_uniform(self, timestamps, u_day, u_time) -> np.ndarray:
+        """Return posting times for ``timestamps`` from two uniform draws per row.
+
+        A calendar offset of 0-3 days is chosen and rolled forward to a
+        business day; offsets that roll past the three-day window, or a
+        same-day posting after banking hours, are not eligible. The posting
+        time is uniform over the banking hours left on the chosen day.
+        Rows with no eligible day post at 09:00 on the next business day.
+        """
+        ts = np.asarray(timestamps, dtype="datetime64[s]")
+        day = ts.astype("datetime64[D]")
+        tod = (ts - day).astype(np.int64)
+        open_s = POSTING_START_HOUR * 3600
+        close_s = POSTING_END_HOUR * 3600
+
+        offsets = np.arange(MAX_POST_DAYS + 1)
+        rolled = self.roll_forward(day[:, None] + offsets[None, :])
+        lag = (rolled - day[:, None]).astype(np.int64)
+        same_day = lag == 0
+        valid = (lag <= MAX_POST_DAYS) & ~(same_day & (tod[:, None] >= close_s - 1))
+
+        counts = valid.sum(axis=1)
+        pick = np.minimum((np.asarray(u_day) * counts).astype(np.int64), np.maximum(counts - 1, 0))
+        # Index of the ``pick``-th eligible offset in each row
+        col = (np.cumsum(valid, axis=1) <= pick[:, None]).sum(axis=1)
+        col = np.minimum(col, MAX_POST_DAYS)
+        post_day = rolled[np.arange(len(ts)), col]
+
+        # Same-day postings start strictly after the transaction
+        lo = np.where(post_day == day, np.maximum(tod + 1, open_s), open_s)
+        seconds = lo + (np.asarray(u_time) * (close_s - lo)).astype(np.int64)
+        post = post_day.astype("datetime64[s]") + seconds.astype("timedelta64[s]")
+
+        fallback = counts == 0
+        if fallback.any():
+            next_day = self.roll_forward(day[fallback] + 1)
+            post[fallback] = next_day.astype("datetime64[s]") + np.timedelta64(9 * 3600, "s")
+        return post
+
+    def post_dates(self, timestamps, rng: np.random.Generator) -> np.ndarray:
+        """Vectorised posting times for an array of ``datetime64`` timestamps."""
+        n = len(timestamps)
+        return self.post_dates_from_uniform(timestamps, rng.random(n), rng.random(n))
+
+
+_CALENDAR = None
+
+
+def business_calendar(first_year: int, last_year: int | None = None) -> BusinessCalendar:
+    """Return the shared calendar, widening it when the year range grows.
+
+    One calendar is reused for the whole run; it is only rebuilt when a
+    timestamp falls outside the years it already covers. The following
+    year is always included so year-end postings see January holidays.
+    """
+    global _CALENDAR
+    last_year = (first_year if last_year is None else last_year) + 1
+    if _CALENDAR is None or not _CALENDAR.covers(first_year, last_year):
+        if _CALENDAR is not None:
+            first_year = min(first_year, _CALENDAR.first_year)
+            last_year = max(last_year, _CALENDAR.last_year)
+        _CALENDAR = BusinessCalendar(first_year, last_year)
+    return _CALENDAR
+
+
+def calendar_for(timestamps) -> BusinessCalendar:
+    """Return the shared calendar covering every value in ``timestamps``."""
+    years = np.asarray(timestamps, dtype="datetime64[Y]")
+    if not len(years):
+        return business_calendar(datetime.now().year)
+    first = int(years.min().astype(np.int64)) + 1970
+    last = int(years.max().astype(np.int64)) + 1970
+    return business_calendar(first, last)
@@ -0,0 +1,463 @@
+from array import array
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Column order used when entries are exported
+ENTRY_COLUMNS = [
+    "transaction_id",
+    "entry_id",
+    "timestamp",
+    "account_id",
+    "counterparty",
+    "amount",
+    "direction",
+    "currency",
+    "bank_name",
+    "owner_name",
+    "type",
+    "bank",
+    "laundering_account",
+    "payment_type",
+    "is_laundering",
+    "source_description",
+    "post_date",
+    "wire_details",
+    "atm_id",
+    "atm_location",
+    "channel",
+]
+
+# Integer-coded columns and the vocabulary each one is encoded against.
+# ``account_id`` and ``counterparty`` share a vocabulary so that the codes
+# can be compared directly. Coded columns become ``Categorical`` columns in
+# ``to_frame`` and dictionary arrays in ``to_arrow``.
+CODED_COLUMNS = {
+    "account_id": "account",
+    "counterparty": "account",
+    "payment_type": "payment_type",
+    "direction": "direction",
+    "currency": "currency",
+    "bank_name": "bank_name",
+    "owner_name": "owner_name",
+    "type": "type",
+    "bank": "bank",
+    "laundering_account": "laundering_account",
+    "channel": "channel",
+}
+
+FLOAT_COLUMNS = ("amount",)
+BOOL_COLUMNS = ("is_laundering",)
+# Stored as int64 seconds since the Unix epoch; formatted only on export
+TIME_COLUMNS = ("timestamp", "post_date")
+
+EPOCH = datetime(1970, 1, 1)
+# Missing times use the same bit pattern as ``numpy.datetime64("NaT")``
+NAT = np.iinfo(np.int64).min
+
+
+def to_epoch(value) -> int:
+    """Return ``value`` (str, datetime, datetime64 or int) as epoch seconds."""
+    if value is None:
+        return NAT
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return (value.replace(microsecond=0) - EPOCH) // timedelta(seconds=1)
+    return int(np.datetime64(value, "s").astype(np.int64))
+
+
+def from_epoch(value):
+    """Return epoch seconds as a ``datetime`` (``None`` for missing values)."""
+    if value == NAT:
+        return None
+    return EPOCH + timedelta(seconds=int(value))
+
+
+class Vocabulary:
+    """Assign stable integer codes to values. ``None`` is always code -1."""
+
+    def __init__(self, values=None):
+        self.values = []
+        self.codes = {}
+        for value in values or []:
+            self.encode(value)
+
+    def encode(self, value) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def decode(self, code):
+        return None if code < 0 else self.values[code]
+
+    def decode_array(self, codes: np.ndarray) -> np.ndarray:
+        """Return an object array of values for ``codes``."""
+        lookup = np.empty(len(self.values) + 1, dtype=object)
+        lookup[:-1] = self.values
+        lookup[-1] = None
+        # -1 indexes the trailing ``None`` slot
+        return lookup[codes]
+
+    def categorical(self, codes: np.ndarray) -> pd.Categorical:
+        """Return ``codes`` as a ``pandas.Categorical`` over the vocabulary.
+
+        Missing values (NaN) cannot be categories, so they are coded as -1.
+        """
+        categories = pd.Index(self.values, dtype=object)
+        null = categories.isna()
+        if null.any():
+            # The trailing slot maps -1 to itself
+            remap = np.full(len(categories) + 1, -1, dtype=np.int32)
+            remap[:-1][~null] = np.arange(len(categories) - null.sum(), dtype=np.int32)
+            codes = remap[codes]
+            categories = categories[~null]
+        return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories))
+
+    def __len__(self):
+        return len(self.values)
+
+
+class EntryStore:
+    """Columnar container for debit/credit entries.
+
+    Numeric and coded columns live in typed ``array.array`` buffers so that
+    millions of entries cost a few bytes per field instead of a dictionary
+    per row.  ``to_frame`` wraps those buffers with ``numpy.frombuffer`` so
+    the conversion to pandas does not copy them.  Note that numpy views pin
+    the underlying buffers: drop them before appending more entries.
+
+    Iterating a store (or indexing it) yields row dictionaries for callers
+    that still expect the historical list-of-dicts interface.
+    """
+
+    def __init__(self):
+        self.vocabularies = {name: Vocabulary() for name in set(CODED_COLUMNS.values())}
+        self._columns = {}
+        for col in ENTRY_COLUMNS:
+            if col in CODED_COLUMNS:
+                self._columns[col] = array("i")
+            elif col in FLOAT_COLUMNS:
+                self._columns[col] = array("d")
+            elif col in BOOL_COLUMNS:
+                self._columns[col] = array("b")
+            elif col in TIME_COLUMNS:
+                self._columns[col] = array("q")
+            else:
+                self._columns[col] = []
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a store from an iterable of entry dictionaries."""
+        store = cls()
+        for row in rows:
+            store.append_row(row)
+        return store
+
+    def vocabulary(self, column: str) -> Vocabulary:
+        return self.vocabularies[CODED_COLUMNS[column]]
+
+    def append(
+        self,
+        transaction_id,
+        entry_id,
+        timestamp,
+        account_id,
+        counterparty,
+        amount,
+        direction,
+        currency,
+        bank_name,
+        owner_name,
+        type,
+        bank,
+        laundering_account,
+        payment_type,
+        is_laundering,
+        source_description,
+        post_date,
+        wire_details=None,
+        atm_id=None,
+        atm_location=None,
+        channel=None,
+    ):
+        """Append a single entry without building an intermediate dict."""
+        cols = self._columns
+        vocabs = self.vocabularies
+        accounts = vocabs["account"]
+        cols["transaction_id"].append(transaction_id)
+        cols["entry_id"].append(entry_id)
+        cols["timestamp"].append(to_epoch(timestamp))
+        cols["account_id"].append(accounts.encode(account_id))
+        cols["counterparty"].append(accounts.encode(counterparty))
+        cols["amount"].append(amount)
+        cols["direction"].append(vocabs["direction"].encode(direction))
+        cols["currency"].append(vocabs["currency"].encode(currency))
+        cols["bank_name"].append(vocabs["bank_name"].encode(bank_name))
+        cols["owner_name"].append(vocabs["owner_name"].encode(owner_name))
+        cols["type"].append(vocabs["type"].encode(type))
+        cols["bank"].append(vocabs["bank"].encode(bank))
+        cols["laundering_account"].append(vocabs["laundering_account"].encode(laundering_account))
+        cols["payment_type"].append(vocabs["payment_type"].encode(payment_type))
+        cols["is_laundering"].append(bool(is_laundering))
+        cols["source_description"].append(source_description)
+        cols["post_date"].append(to_epoch(post_date))
+        cols["wire_details"].append(wire_details)
+        cols["atm_id"].append(atm_id)
+        cols["atm_location"].append(atm_location)
+        cols["channel"].append(vocabs["channel"].encode(channel))
+
+    def append_row(self, row: dict):
+        """Append an entry given as a dictionary.
+
+        Missing fields become ``None``, except ``amount`` (0.0) and
+        ``is_laundering`` (``False``), which have no missing value.
+        """
+        values = {col: row.get(col) for col in ENTRY_COLUMNS}
+        if values["amount"] is None:
+            values["amount"] = 0.0
+        self.append(**values)
+
+    def append_columns(self, size: int, **columns):
+        """Append ``size`` entries given column by column.
+
+        Each value is either a scalar shared by every entry or a sequence of
+        ``size`` values; time columns take int64 epoch seconds or
+        ``datetime64`` arrays. Coded columns may also be given as a
+        ``(values, codes)`` pair, the values and an integer array indexing
+        them (-1 for ``None``), so a large block is encoded with one lookup
+        per distinct value. Omitted columns get the same defaults as in
+        ``append_row``.
+        """
+        unknown = set(columns) - set(ENTRY_COLUMNS)
+        if unknown:
+            raise KeyError(f"Unknown entry columns: {sorted(unknown)}")
+        for col in ENTRY_COLUMNS:
+            value = columns.get(col)
+            dst = self._columns[col]
+            if col in CODED_COLUMNS:
+                vocab = self.vocabulary(col)
+                if isinstance(value, tuple):
+                    values, codes = value
+                    mapping = np.array([vocab.encode(v) for v in values] + [-1], dtype=np.int32)
+                    codes = mapping[np.asarray(codes, dtype=np.int64)]
+                elif value is None or isinstance(value, str):
+                    codes = np.full(size, vocab.encode(value), dtype=np.int32)
+                else:
+                    codes = np.array([vocab.encode(v) for v in value], dtype=np.int32)
+                dst.frombytes(codes.tobytes())
+            elif col in FLOAT_COLUMNS:
+                value = np.asarray(0.0 if value is None else value, dtype=np.float64)
+                dst.frombytes(np.broadcast_to(value, size).tobytes())
+            elif col in BOOL_COLUMNS:
+                value = np.asarray(False if value is None else value, dtype=np.bool_)
+                dst.frombytes(np.broadcast_to(value, size).tobytes())
+            elif col in TIME_COLUMNS:
+                if value is None:
+                    value = NAT
+                value = np.asarray(value)
+                if value.dtype.kind == "M":
+                    value = value.astype("datetime64[s]")
+                dst.frombytes(np.broadcast_to(value.astype(np.int64), size).tobytes())
+            elif value is None or isinstance(value, (str, dict)):
+                dst.extend([value] * size)
+            else:
+                dst.extend(value)
+
+    def extend(self, other):
+        """Append every entry from another store or an iterable of dicts."""
+        if not isinstance(other, EntryStore):
+            for row in other:
+                self.append_row(row)
+            return
+        for col in ENTRY_COLUMNS:
+            src = other._columns[col]
+            if col in CODED_COLUMNS:
+                mapping = np.array(
+                    [self.vocabulary(col).encode(v) for v in other.vocabulary(col).values] + [-1],
+                    dtype=np.int32,
+                )
+                codes = mapping[np.frombuffer(src, dtype=np.int32)]
+                self._columns[col].frombytes(codes.tobytes())
+            else:
+                self._columns[col].extend(src)
+
+    def take(self, indices) -> "EntryStore":
+        """Return a new store holding the rows at ``indices`` in that order."""
+        indices = np.asarray(indices, dtype=np.int64)
+        out = EntryStore()
+        out.vocabularies = {
+            name: Vocabulary(vocab.values) for name, vocab in self.vocabularies.items()
+        }
+        for col in ENTRY_COLUMNS:
+            src = self._columns[col]
+            if isinstance(src, array):
+                out._columns[col].frombytes(self.array(col)[indices].tobytes())
+            else:
+                out._columns[col] = [src[i] for i in indices]
+        return out
+
+    def array(self, column: str) -> np.ndarray:
+        """Return a zero-copy numpy view of a numeric, boolean or coded column.
+
+        Time columns are returned as int64 epoch seconds; see ``datetimes``.
+        """
+        src = self._columns[column]
+        if column in CODED_COLUMNS:
+            return np.frombuffer(src, dtype=np.int32)
+        if column in FLOAT_COLUMNS:
+            return np.frombuffer(src, dtype=np.float64)
+        if column in BOOL_COLUMNS:
+            return np.frombuffer(src, dtype=np.bool_)
+        if column in TIME_COLUMNS:
+            return np.frombuffer(src, dtype=np.int64)
+        raise KeyError(f"{column} is not stored as a typed array")
+
+    def datetimes(self, column: str) -> np.ndarray:
+        """Return a zero-copy ``datetime64[s]`` view of a time column."""
+        return self.array(column).view("datetime64[s]")
+
+    def column(self, column: str) -> list:
+        """Return the decoded values of ``column`` as a list."""
+        src = self._columns[column]
+        if column in CODED_COLUMNS:
+            return self.vocabulary(column).decode_array(self.array(column)).tolist()
+        if column in BOOL_COLUMNS:
+            return [bool(v) for v in src]
+        if column in TIME_COLUMNS:
+            return [from_epoch(v) for v in src]
+        return list(src)
+
+    def get(self, index: int, column: str):
+        value = self._columns[column][index]
+        if column in CODED_COLUMNS:
+            return self.vocabulary(column).decode(value)
+        if column in BOOL_COLUMNS:
+            return bool(value)
+        if column in TIME_COLUMNS:
+            return from_epoch(value)
+        return value
+
+    def set(self, index: int, column: str, value):
+        if column in CODED_COLUMNS:
+            value = self.vocabulary(column).encode(value)
+        elif column in BOOL_COLUMNS:
+            value = bool(value)
+        elif column in TIME_COLUMNS:
+            value = to_epoch(value)
+        self._columns[column][index] = value
+
+    def fill(self, column: str, rows, value):
+        """Set ``column`` to ``value`` at ``rows`` (indices or a boolean mask)."""
+        if column in CODED_COLUMNS:
+            value = self.vocabulary(column).encode(value)
+        elif column in BOOL_COLUMNS:
+            value = bool(value)
+        elif column in TIME_COLUMNS:
+            value = to_epoch(value)
+        src = self._columns[column]
+        if isinstance(src, array):
+            self.array(column)[rows] = value
+            return
+        rows = np.asarray(rows)
+        for i in (np.flatnonzero(rows) if rows.dtype == bool else rows).tolist():
+            src[i] = value
+
+    def row(self, index: int) -> dict:
+        return {col: self.get(index, col) for col in ENTRY_COLUMNS}
+
+    def __len__(self):
+        return len(self._columns["transaction_id"])
+
+    def __getitem__(self, index: int) -> dict:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("entry index out of range")
+        return self.row(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the entries as a DataFrame, sharing the typed buffers.
+
+        Coded columns come back as ``Categorical`` over their vocabulary and
+        time columns as ``datetime64[s]``; string formatting is left to the
+        exporters.
+        """
+        data = {}
+        for col in ENTRY_COLUMNS:
+            src = self._columns[col]
+            if col in CODED_COLUMNS:
+                data[col] = self.vocabulary(col).categorical(self.array(col))
+            elif col in TIME_COLUMNS:
+                data[col] = self.datetimes(col)
+            elif isinstance(src, array):
+                data[col] = self.array(col)
+            else:
+                data[col] = pd.Series(src, dtype=object)
+        return pd.DataFrame(data, columns=ENTRY_COLUMNS, copy=False)
+
+    def to_arrow(self):
+        """Return the entries as a ``pyarrow.Table`` (requires pyarrow).
+
+        Coded columns become dictionary arrays over their vocabulary, time
+        columns ``timestamp[s]`` and labels booleans; see ``arrow_schema``.
+        """
+        import pyarrow as pa
+
+        arrays = []
+        for col in ENTRY_COLUMNS:
+            src = self._columns[col]
+            if col in CODED_COLUMNS:
+                values = _arrow_strings(self.vocabulary(col).values)
+                codes = self.array(col)
+                indices = pa.array(codes, mask=codes < 0)
+                arrays.append(pa.DictionaryArray.from_arrays(indices, values))
+            elif col in TIME_COLUMNS:
+                arrays.append(pa.array(self.datetimes(col)))
+            elif isinstance(src, array):
+                arrays.append(pa.array(self.array(col)))
+            else:
+                arrays.append(_arrow_strings(src))
+        return pa.Table.from_arrays(arrays, schema=arrow_schema())
+
+
+def _arrow_strings(values):
+    """Return ``values`` as a pyarrow string array, stringifying non-text values."""
+    import pyarrow as pa
+
+    try:
+        return pa.array(values, type=pa.string())
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def arrow_schema():
+    """Return the ``pyarrow.Schema`` produced by ``EntryStore.to_arrow``."""
+    import pyarrow as pa
+
+    fields = []
+    for col in ENTRY_COLUMNS:
+        if col in CODED_COLUMNS:
+            dtype = pa.dictionary(pa.int32(), pa.string())
+        elif col in TIME_COLUMNS:
+            dtype = pa.timestamp("s")
+        elif col in FLOAT_COLUMNS:
+            dtype = pa.float64()
+        elif col in BOOL_COLUMNS:
+            dtype = pa.bool_()
+        else:
+            dtype = pa.string()
+        fields.append(pa.field(col, dtype))
+    return pa.schema(fields)
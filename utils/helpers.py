@@ -1,26 +1,130 @@
-import uuid
 import random
+import zlib
+from functools import lru_cache
 from datetime import datetime, timedelta, date
+import numpy as np
 from faker import Faker
 
+from utils.entry_store import EntryStore, NAT, to_epoch, from_epoch
+from utils.business_calendar import business_calendar, calendar_for
+
 fake = Faker()
 
+DEFAULT_FAKER_POOL_SIZE = 5000
+
+
+class FakerPool:
+    """Pre-generated Faker values handed out without per-call Faker work.
+
+    Each kind of value (``name``, ``company``, ``address``) is generated in
+    one batch of ``size`` values the first time it is requested; after that
+    a draw is a single ``random.randrange`` into the list. Addresses are
+    stored on one line.
+
+    When ``seed`` is set each kind is generated from its own seed, so the
+    pool contents do not depend on when or in which process it is built.
+    """
+
+    KINDS = ("name", "company", "address")
+
+    def __init__(self, size: int = DEFAULT_FAKER_POOL_SIZE, faker: Faker | None = None,
+                 seed: int | None = None):
+        self.faker = faker or Faker()
+        self.seed = seed
+        self.resize(size)
+
+    def resize(self, size: int):
+        """Set the pool size, discarding any values generated so far."""
+        if size < 1:
+            raise ValueError("Faker pool size must be at least 1")
+        self.size = size
+        self._values = {}
+
+    def reseed(self, seed: int | None):
+        """Set the pool seed, discarding any values generated so far."""
+        self.seed = seed
+        self._values = {}
+
+    def _pool(self, kind: str) -> list[str]:
+        values = self._values.get(kind)
+        if values is None:
+            if self.seed is not None:
+                self.faker.seed_instance(self.seed + self.KINDS.index(kind))
+            make = getattr(self.faker, kind)
+            values = [make() for _ in range(self.size)]
+            if kind == "address":
+                values = [v.replace("\n", ", ") for v in values]
+            self._values[kind] = values
+        return values
+
+    def _draw(self, kind: str) -> str:
+        values = self._pool(kind)
+        return values[random.randrange(len(values))]
+
+    def name(self) -> str:
+        return self._draw("name")
+
+    def company(self) -> str:
+        return self._draw("company")
+
+    def address(self) -> str:
+        return self._draw("address")
+
+
+fake_pool = FakerPool()
+
 # Track check numbers issued per payor account
 CHECK_COUNTERS: dict[str, int] = {}
+# Offset of the check-number range the running shard issues from, added to
+# the first number of every payor it writes checks for (see
+# ``generator.parallel``)
+CHECK_RANGE = {"offset": 0}
+
+def check_number_start(payor_id: str) -> int:
+    """Return the 4-digit number ``payor_id``'s checks start from.
+
+    The number is derived from the id instead of drawn, so every shard
+    starts a payor's checks at the same place.
+    """
+    return 1000 + zlib.crc32(str(payor_id).encode()) % 9000
 
 def next_check_number(payor_id: str) -> int:
-    """Return the next sequential 4-digit check number for ``payor_id``."""
+    """Return the next sequential check number for ``payor_id``."""
     current = CHECK_COUNTERS.get(payor_id)
     if current is None:
-        current = random.randint(1000, 9999)
+        current = check_number_start(payor_id) + CHECK_RANGE["offset"]
     else:
         current += 1
     CHECK_COUNTERS[payor_id] = current
     return current
 
+def next_check_offset() -> int:
+    """Return the lowest ``CHECK_RANGE`` offset above every check issued so far."""
+    return max(
+        (last - check_number_start(payor) + 1 for payor, last in CHECK_COUNTERS.items()),
+        default=0,
+    )
+
+# Dedicated stream for identifiers so they can be seeded (see utils.rng)
+# without disturbing the draws that shape the data itself
+ID_RNG = random.Random()
+
 def generate_uuid(length=12):
-    """Generate a short unique ID (default 12 characters)."""
-    return str(uuid.uuid4()).replace('-', '')[:length]
+    """Generate a short unique hex ID (default 12 characters)."""
+    return f"{ID_RNG.getrandbits(128):032x}"[:length]
+
+def generate_uuids(n: int, length=12) -> list[str]:
+    """Generate ``n`` short unique IDs in one call (see ``generate_uuid``)."""
+    bits = ID_RNG.getrandbits
+    return [f"{bits(128):032x}"[:length] for _ in range(n)]
+
+def numpy_rng() -> np.random.Generator:
+    """Return a NumPy generator seeded from the stdlib ``random`` state.
+
+    Seeding ``random`` therefore also makes the vectorized generators
+    reproducible.
+    """
+    return np.random.default_rng(random.getrandbits(64))
 
 def generate_card_number() -> str:
     """Return a masked Visa or MasterCard number.
@@ -37,6 +141,18 @@ def parse_date(date_str):
     """Parse a date string like '2025-01-01' into a datetime object."""
     return datetime.strptime(date_str, "%Y-%m-%d")
 
+def format_timestamps(values) -> np.ndarray:
+    """Format an array of ``datetime64`` values as ``YYYY-MM-DD HH:MM:SS`` strings.
+
+    Missing values (``NaT``) become ``None`` in the returned object array.
+    """
+    values = np.asarray(values, dtype="datetime64[s]")
+    if not values.size:
+        return np.empty(values.shape, dtype=object)
+    text = np.char.replace(np.datetime_as_string(values, unit="s"), "T", " ").astype(object)
+    text[np.isnat(values)] = None
+    return text
+
 def random_timestamp(start_date, end_date):
     """Generate a random timestamp between two datetime objects."""
     delta = end_date - start_date
@@ -44,15 +160,43 @@ def random_timestamp(start_date, end_date):
     return start_date + timedelta(seconds=random_seconds)
 
 
-def earliest_timestamps_by_account(entries: list[dict]) -> dict[str, datetime]:
-    """Return the earliest timestamp observed for each account."""
+def earliest_timestamps_by_account(entries, mins=None) -> dict[str, datetime]:
+    """Return the earliest timestamp observed for each account.
+
+    ``entries`` may be a list of entry dicts or an ``EntryStore``. Passing the
+    result of a previous call as ``mins`` folds ``entries`` into it, so the
+    map can be built one chunk at a time.
+    """
+    if mins is not None:
+        for acct, ts in earliest_timestamps_by_account(entries).items():
+            current = mins.get(acct)
+            if current is None or ts < current:
+                mins[acct] = ts
+        return mins
+
+    if isinstance(entries, EntryStore):
+        codes = entries.array("account_id")
+        times = entries.array("timestamp")
+        keep = (codes >= 0) & (times != NAT)
+        codes, times = codes[keep], times[keep]
+        order = np.lexsort((times, codes))
+        codes, times = codes[order], times[order]
+        first = np.ones(len(codes), dtype=bool)
+        first[1:] = codes[1:] != codes[:-1]
+        accounts = entries.vocabulary("account_id").decode_array(codes[first])
+        return {
+            acct: from_epoch(ts)
+            for acct, ts in zip(accounts.tolist(), times[first].tolist())
+        }
+
     mins: dict[str, datetime] = {}
     for e in entries:
         acct = e.get("account_id")
-        ts_str = e.get("timestamp")
-        if not acct or not ts_str:
+        ts = e.get("timestamp")
+        if not acct or ts is None or ts == "":
             continue
-        ts = datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S")
+        if not isinstance(ts, datetime):
+            ts = from_epoch(to_epoch(ts))
         current = mins.get(acct)
         if current is None or ts < current:
             mins[acct] = ts
@@ -62,42 +206,58 @@ def safe_sample(population, k):
     """Safely sample k items from a list, even if the list is smaller than k."""
     return random.sample(population, min(k, len(population)))
 
+# Broad NAICS code prefixes and the purchase categories they map to
+NAICS_PURPOSES = [
+    (("11",), ["Agricultural Purchase", "Farm Supply", "Crop Service"]),
+    (("21",), ["Mining Service", "Resource Extraction", "Mineral Purchase"]),
+    (("22",), ["Utility Payment", "Utility Service"]),
+    (("23",), ["Construction Service", "Building Project", "Renovation"]),
+    (("31", "32", "33"), ["Manufacturing Purchase", "Industrial Goods", "Factory Service"]),
+    (("42",), ["Wholesale Purchase", "Bulk Goods", "Wholesale Distribution"]),
+    (("722",), ["Restaurant Meal", "Dining Out", "Food Service"]),
+    (("445",), ["Grocery Purchase", "Food Shopping", "Supermarket Visit"]),
+    (("44", "45"), ["Retail Purchase", "Shopping Trip", "Retail Goods"]),
+    (("611",), ["Educational Service", "Tuition Payment", "Course Enrollment"]),
+    (("62",), ["Medical Payment", "Healthcare Expense", "Medical Service"]),
+    (("52",), ["Financial Service Fee", "Banking Charge"]),
+    (("53",), ["Real Estate Payment", "Property Management Fee"]),
+    (("54",), ["Professional Service Fee", "Consulting Expense"]),
+    (("56",), ["Administrative Service", "Office Expense"]),
+    (("61",), ["Educational Expense", "Training Course"]),
+    (("71",), ["Entertainment Expense", "Leisure Activity"]),
+    (("72",), ["Travel Expense", "Lodging Cost"]),
+    (("81",), ["Repair Service", "Maintenance Cost"]),
+    (("92",), ["Public Administration Fee", "Government Service"]),
+    (("99",), ["Miscellaneous Expense", "Other Services"]),
+]
+
+@lru_cache(maxsize=None)
+def _purpose_options(code: str):
+    for prefixes, options in NAICS_PURPOSES:
+        if code.startswith(prefixes):
+            return options
+    return None
+
 def suggest_transaction_type(naics_code: str | int | None, payor_type: str | None) -> str:
     """Return a suggested transaction purpose based on ``naics_code``.
     
     This helper maps broad NAICS code prefixes to human readable purchase categories.
     """
-    code = str(naics_code or "")
-
-    mapping = [
-        (("11",), ["Agricultural Purchase", "Farm Supply", "Crop Service"]),
-        (("21",), ["Mining Service", "Resource Extraction", "Mineral Purchase"]),
-        (("22",), ["Utility Payment", "Utility Service"]),
-        (("23",), ["Construction Service", "Building Project", "Renovation"]),
-        (("31", "32", "33"), ["Manufacturing Purchase", "Industrial Goods", "Factory Service"]),
-        (("42",), ["Wholesale Purchase", "Bulk Goods", "Wholesale Distribution"]),
-        (("722",), ["Restaurant Meal", "Dining Out", "Food Service"]),
-        (("445",), ["Grocery Purchase", "Food Shopping", "Supermarket Visit"]),
-        (("44", "45"), ["Retail Purchase", "Shopping Trip", "Retail Goods"]),
-        (("611",), ["Educational Service", "Tuition Payment", "Course Enrollment"]),
-        (("62",), ["Medical Payment", "Healthcare Expense", "Medical Service"]),
-        (("52",), ["Financial Service Fee", "Banking Charge"]),
-        (("53",), ["Real Estate Payment", "Property Management Fee"]),
-        (("54",), ["Professional Service Fee", "Consulting Expense"]),
-        (("56",), ["Administrative Service", "Office Expense"]),
-        (("61",), ["Educational Expense", "Training Course"]),
-        (("71",), ["Entertainment Expense", "Leisure Activity"]),
-        (("72",), ["Travel Expense", "Lodging Cost"]),
-        (("81",), ["Repair Service", "Maintenance Cost"]),
-        (("92",), ["Public Administration Fee", "Government Service"]),
-        (("99",), ["Miscellaneous Expense", "Other Services"]),
-    ]
-
-    for prefixes, options in mapping:
-        if any(code.startswith(p) for p in prefixes):
-            return random.choice(options)
-
-    return "Expense"
+    options = _purpose_options(str(naics_code or ""))
+    if options is None:
+        return "Expense"
+    return random.choice(options)
+
+def suggest_transaction_types(naics_codes, rng: np.random.Generator) -> np.ndarray:
+    """Return one ``suggest_transaction_type`` purpose per code, drawn with ``rng``."""
+    codes = np.array([str(code or "") for code in naics_codes], dtype=object)
+    purposes = np.full(len(codes), "Expense", dtype=object)
+    for code in dict.fromkeys(codes.tolist()):
+        options = _purpose_options(code)
+        if options is not None:
+            rows = np.flatnonzero(codes == code)
+            purposes[rows] = np.asarray(options, dtype=object)[rng.integers(0, len(options), size=len(rows))]
+    return purposes
 
 def to_datetime(value):
     """
@@ -133,22 +293,93 @@ def split_transaction(
     atm_id=None,
     atm_location=None,
     channel="ATM",
+    store=None,
 ):
-    """Split a transaction into debit and credit entries."""
+    """Split a transaction into debit and credit entries.
+
+    When ``store`` (an :class:`~utils.entry_store.EntryStore`) is given the
+    entries are appended to it directly and the number of entries written is
+    returned. Otherwise a list of entry dictionaries is returned.
+    """
     known_accounts = known_accounts or set()
-    rows = []
+    rows = [] if store is None else None
+    written = 0
     amount = abs(amount)
 
+    def emit(acct, suffix, counterparty, amt, direction, ptype, description, details, cash):
+        nonlocal written
+        written += 1
+        laundering_account = "Yes" if getattr(acct, "launderer", False) else "No"
+        if store is not None:
+            store.append(
+                txn_id,
+                f"{txn_id}-{suffix}",
+                timestamp,
+                acct.id,
+                counterparty,
+                amt,
+                direction,
+                currency,
+                acct.bank_name,
+                acct.owner_name,
+                acct.owner_type,
+                acct.bank_code,
+                laundering_account,
+                ptype,
+                is_laundering,
+                description,
+                post_date,
+                details,
+                atm_id if cash else None,
+                atm_location if cash else None,
+                channel if cash else None,
+            )
+            return
+        row = {
+            "transaction_id": txn_id,
+            "entry_id": f"{txn_id}-{suffix}",
+            "timestamp": timestamp,
+            "account_id": acct.id,
+            "counterparty": counterparty,
+            "amount": amt,
+            "direction": direction,
+            "currency": currency,
+            "bank_name": acct.bank_name,
+            "owner_name": acct.owner_name,
+            "type": acct.owner_type,
+            "bank": acct.bank_code,
+            "laundering_account": laundering_account,
+            "payment_type": ptype,
+            "is_laundering": is_laundering,
+            "source_description": description,
+            "post_date": post_date,
+        }
+        if cash:
+            row["atm_id"] = atm_id
+            row["atm_location"] = atm_location
+        row["wire_details"] = details
+        if cash:
+            row["channel"] = channel
+        rows.append(row)
+
+    def result():
+        return rows if store is None else written
+
     src_known = src is not None and hasattr(src, "id") and src.id in known_accounts
     tgt_known = tgt is not None and hasattr(tgt, "id") and tgt.id in known_accounts
 
-    src_name = getattr(src, "owner_name", fake.name()) if src is not None else ""
+    if src is None:
+        src_name = ""
+    elif hasattr(src, "owner_name"):
+        src_name = src.owner_name
+    else:
+        src_name = fake_pool.name()
     tgt_name = getattr(tgt, "owner_name", None)
     if not tgt_name:
         if hasattr(tgt, "owner_type") and tgt.owner_type in ["Company", "Merchant"]:
-            tgt_name = fake.company()
+            tgt_name = fake_pool.company()
         else:
-            tgt_name = fake.name()
+            tgt_name = fake_pool.name()
 
     credit_description = source_description or f"{payment_type.upper()} - {tgt_name}"
     debit_description = source_description or f"{payment_type.upper()} - {tgt_name}"
@@ -162,7 +393,7 @@ def split_transaction(
         card_num = getattr(src, "credit_card_number", None)
         if pt_lower in debit_aliases:
             card_num = getattr(src, "debit_card_number", card_num)
-        date_str = timestamp.split(" ")[0]
+        date_str = from_epoch(to_epoch(timestamp)).strftime("%Y-%m-%d")
         method = getattr(tgt, "receiving_method", "")
         debit_description = f"{method} - {tgt_name}, {card_num}, {date_str}, {abs(amount):.2f}"
         credit_description = f"{method} - {src_name}, {card_num}, {date_str}, {abs(amount):.2f}"
@@ -212,8 +443,8 @@ def split_transaction(
         if atm_id is None:
             atm_id = generate_uuid(8)
         if atm_location is None:
-            atm_name = fake.company()
-            atm_address = fake.address().replace("\n", ", ")
+            atm_name = fake_pool.company()
+            atm_address = fake_pool.address()
             atm_location = f"{atm_name} ({atm_address})"
 
         credit_description = f"CASH - Deposit at {atm_location}"
@@ -224,182 +455,39 @@ def split_transaction(
         # Deposit: src is None
         if src is None and tgt is not None:
             if tgt_known:
-                rows.append({
-                    "transaction_id": txn_id,
-                    "entry_id": txn_id + "-C",
-                    "timestamp": timestamp,
-                    "account_id": tgt.id,
-                    "counterparty": placeholder_cp,
-                    "amount": amount,
-                    "direction": "credit",
-                    "currency": currency,
-                    "bank_name": tgt.bank_name,
-                    "owner_name": tgt.owner_name,
-                    "type": tgt.owner_type,
-                    "bank": tgt.bank_code,
-                    "laundering_account": "Yes" if getattr(tgt, "launderer", False) else "No",
-                    "payment_type": payment_type,
-                    "is_laundering": is_laundering,
-                    "source_description": credit_description,
-                    "post_date": post_date,
-                    "atm_id": atm_id,
-                    "atm_location": atm_location,
-                    "wire_details": wire_details,
-                    "channel": channel
-                })
-            return rows
+                emit(tgt, "C", placeholder_cp, amount, "credit", payment_type,
+                     credit_description, wire_details, True)
+            return result()
 
         # Withdrawal: tgt is None
         if tgt is None and src is not None:
             if src_known:
-                rows.append({
-                    "transaction_id": txn_id,
-                    "entry_id": txn_id + "-D",
-                    "timestamp": timestamp,
-                    "account_id": src.id,
-                    "counterparty": placeholder_cp,
-                    "amount": amount,
-                    "direction": "debit",
-                    "currency": currency,
-                    "bank_name": src.bank_name,
-                    "owner_name": src.owner_name,
-                    "type": src.owner_type,
-                    "bank": src.bank,
-                    "laundering_account": "Yes" if getattr(src, "launderer", False) else "No",
-                    "payment_type": payment_type,
-                    "is_laundering": is_laundering,
-                    "source_description": debit_description,
-                    "post_date": post_date,
-                    "atm_id": atm_id,
-                    "atm_location": atm_location,
-                    "wire_details": wire_details,
-                    "channel": channel
-                })
-            return rows
+                emit(src, "D", placeholder_cp, amount, "debit", payment_type,
+                     debit_description, wire_details, True)
+            return result()
 
         # Traditional cash transfer between two accounts (rare)
         if src_known:
-            rows.append({
-                "transaction_id": txn_id,
-                "entry_id": txn_id + "-D",
-                "timestamp": timestamp,
-                "account_id": src.id,
-                "counterparty": tgt.id if tgt else placeholder_cp,
-                "amount": amount,
-                "direction": "debit",
-                "currency": currency,
-                "bank_name": src.bank_name,
-                "owner_name": src.owner_name,
-                "type": src.owner_type,
-                "bank": src.bank_code,
-                "laundering_account": "Yes" if getattr(src, "launderer", False) else "No",
-                "payment_type": payment_type,
-                "is_laundering": is_laundering,
-                "source_description": debit_description,
-                "post_date": post_date,
-                "atm_id": atm_id,
-                "atm_location": atm_location,
-                "wire_details": wire_details,
-                "channel": channel
-            })
-
+            emit(src, "D", tgt.id if tgt else placeholder_cp, amount, "debit", payment_type,
+                 debit_description, wire_details, True)
         if tgt_known:
-            rows.append({
-                "transaction_id": txn_id,
-                "entry_id": txn_id + "-C",
-                "timestamp": timestamp,
-                "account_id": tgt.id,
-                "counterparty": src.id if src else placeholder_cp,
-                "amount": amount,
-                "direction": "credit",
-                "currency": currency,
-                "bank_name": tgt.bank_name,
-                "owner_name": tgt.owner_name,
-                "type": tgt.owner_type,
-                "bank": tgt.bank_code,
-                "laundering_account": "Yes" if getattr(tgt, "launderer", False) else "No",
-                "payment_type": payment_type,
-                "is_laundering": is_laundering,
-                "source_description": credit_description,
-                "post_date": post_date,
-                "atm_id": atm_id,
-                "atm_location": atm_location,
-                "wire_details": wire_details,
-                "channel": channel
-            })
-
-        return rows
+            emit(tgt, "C", src.id if src else placeholder_cp, amount, "credit", payment_type,
+                 credit_description, wire_details, True)
+        return result()
 
     # Non-cash transactions
     if src_known:
-        rows.append({
-            "transaction_id": txn_id,
-            "entry_id": txn_id + "-D",
-            "timestamp": timestamp,
-            "account_id": src.id,
-            "counterparty": tgt.id,
-            "amount": amount,
-            "direction": "debit",
-            "currency": currency,
-            "bank_name": src.bank_name,
-            "owner_name": src.owner_name,
-            "type": src.owner_type,
-            "bank": src.bank,
-            "laundering_account": "Yes" if getattr(src, "launderer", False) else "No",
-            "payment_type": payment_type,
-            "is_laundering": is_laundering,
-            "source_description": debit_description,
-            "post_date": post_date,
-            "wire_details": wire_details
-        })
+        emit(src, "D", tgt.id, amount, "debit", payment_type,
+             debit_description, wire_details, False)
 
     if tgt_known:
-        rows.append({
-            "transaction_id": txn_id,
-            "entry_id": txn_id + "-C",
-            "timestamp": timestamp,
-            "account_id": tgt.id,
-            "counterparty": src.id if src else "",
-            "amount": amount,
-            "direction": "credit",
-            "currency": currency,
-            "bank_name": tgt.bank_name,
-            "owner_name": tgt.owner_name,
-            "type": tgt.owner_type,
-            "bank": tgt.bank,
-            "laundering_account": "Yes" if getattr(tgt, "launderer", False) else "No",
-            "payment_type": payment_type,
-            "is_laundering": is_laundering,
-            "source_description": credit_description,
-            "post_date": post_date,
-            "wire_details": wire_details
-        })
+        emit(tgt, "C", src.id if src else "", amount, "credit", payment_type,
+             credit_description, wire_details, False)
 
     if payment_type.lower() == "wire" and src_known:
-        rows.append({
-            "transaction_id": txn_id,
-            "entry_id": txn_id + "-F",
-            "timestamp": timestamp,
-            "account_id": src.id,
-            "counterparty": "",
-            "amount": 25.0,
-            "direction": "debit",
-            "currency": currency,
-            "bank_name": src.bank_name,
-            "owner_name": src.owner_name,
-            "type": src.owner_type,
-            "bank": src.bank_code,
-            "laundering_account": "Yes" if getattr(src, "launderer", False) else "No",
-            "payment_type": "fee",
-            "is_laundering": is_laundering,
-            "source_description": "Wire Transfer Fee",
-            "post_date": post_date,
-            "wire_details": None
-        })
+        emit(src, "F", "", 25.0, "debit", "fee", "Wire Transfer Fee", None, False)
 
-
-
-    return rows
+    return result()
 
 
 def generate_timestamp(start_date, end_date):
@@ -414,99 +502,154 @@ def generate_timestamp(start_date, end_date):
     return start_date + timedelta(seconds=random_seconds)
 
 def describe_transaction(payment_type, purpose=None):
-    company = fake.company()
-    name = fake.name()
-    address = fake.address().replace("\n", ", ")
-
     if payment_type == "ach":
-        return f"ACH - {purpose} from {company} ({address})"
+        return f"ACH - {purpose} from {fake_pool.company()} ({fake_pool.address()})"
     elif payment_type == "cash":
         direction = "Deposit" if purpose == "Deposit" else "Withdrawal"
-        return f"CASH - {direction} at {company} ATM ({address})"
+        return f"CASH - {direction} at {fake_pool.company()} ATM ({fake_pool.address()})"
     elif payment_type == "wire":
-        return f"WIRE - {purpose} via {company} Bank"
+        return f"WIRE - {purpose} via {fake_pool.company()} Bank"
     elif payment_type == "credit_card":
-        return f"CREDIT CARD - {purpose} charged to account at {company}"
+        return f"CREDIT CARD - {purpose} charged to account at {fake_pool.company()}"
     elif payment_type == "check":
-        return f"CHECK - {purpose} written by {name}"
+        return f"CHECK - {purpose} written by {fake_pool.name()}"
 
     return f"{payment_type.upper()} - {purpose or 'Transaction'}"
 
 
 def is_us_federal_holiday(dt: datetime) -> bool:
-    """Return True if the given date falls on a US federal holiday (2025)."""
-    holidays_2025 = {
-        (1, 1),   # New Year's Day
-        (1, 20),  # Martin Luther King Jr. Day
-        (2, 17),  # Washington's Birthday
-        (5, 26),  # Memorial Day
-        (7, 4),   # Independence Day
-        (9, 1),   # Labor Day
-        (10, 13), # Columbus Day
-        (11, 11), # Veterans Day
-        (11, 27), # Thanksgiving Day
-        (12, 25), # Christmas Day
-    }
-    return (dt.month, dt.day) in holidays_2025
+    """Return True if the given date is an observed US federal holiday."""
+    return business_calendar(dt.year).is_holiday(dt)
 
 
 def generate_post_date(transaction_dt: datetime) -> datetime:
     """Return a posting datetime after ``transaction_dt`` within business hours."""
+    calendar = business_calendar(transaction_dt.year)
+    post = calendar.post_dates_from_uniform(
+        np.array([transaction_dt], dtype="datetime64[s]"),
+        np.array([random.random()]),
+        np.array([random.random()]),
+    )
+    return post[0].astype(datetime)
 
-    for _ in range(100):
-        # Try an offset between 0 and 3 days
-        post_dt = transaction_dt + timedelta(days=random.randint(0, 3))
 
-        # If the tentative date falls on a weekend, move to the following Monday
-        if post_dt.weekday() >= 5:
-            post_dt += timedelta(days=7 - post_dt.weekday())
+def generate_post_dates(timestamps, rng: np.random.Generator) -> np.ndarray:
+    """Vectorized ``generate_post_date`` for an array of ``datetime64`` values."""
+    return calendar_for(timestamps).post_dates(timestamps, rng)
 
-        # Skip US federal holidays
-        while is_us_federal_holiday(post_dt):
-            post_dt += timedelta(days=1)
 
-        # Ensure we don't exceed the three-day window
-        if (post_dt - transaction_dt).days > 3:
-            continue
+# Business-hour windows as (first hour, end hour, weekdays only)
+BUSINESS_HOURS = {
+    "Company": (8, 17, True),
+    "Person": (8, 20, False),
+}
 
-        # Choose a posting time within banking hours
-        start_hour = 8
-        if post_dt.date() == transaction_dt.date():
-            start_hour = max(start_hour, transaction_dt.hour)
-        if start_hour >= 17:
-            # No business hours remaining on this day
-            continue
-        hour = random.randint(start_hour, 16)
-        minute = random.randint(0, 59)
-        second = random.randint(0, 59)
-        post_dt = post_dt.replace(hour=hour, minute=minute, second=second, microsecond=0)
 
-        # Verify ordering
-        if post_dt > transaction_dt:
-            return post_dt
+class BusinessHoursSampler:
+    """Draw timestamps uniformly from the business-hour intervals of a range.
+
+    The valid intervals between ``start_dt`` and ``end_dt`` are built once;
+    each draw then maps a single uniform offset into them, so every sample
+    lands inside business hours without redrawing. When the range contains
+    no business hours at all the whole range is used instead.
+    """
 
-    # Fallback: next business day at 09:00
-    post_dt = transaction_dt + timedelta(days=1)
-    post_dt = post_dt.replace(hour=9, minute=0, second=0, microsecond=0)
-    while post_dt.weekday() >= 5 or is_us_federal_holiday(post_dt):
-        post_dt += timedelta(days=1)
-    return post_dt
+    def __init__(self, start_dt: datetime, end_dt: datetime,
+                 entity_type: str | None = None):
+        first_hour, end_hour, weekdays_only = BUSINESS_HOURS.get(
+            entity_type, BUSINESS_HOURS["Person"]
+        )
+        self.start_dt = start_dt
+        span = max(int((end_dt - start_dt).total_seconds()), 0)
+
+        base = np.datetime64(start_dt, "us")
+        days = np.arange(
+            base.astype("datetime64[D]"),
+            np.datetime64(end_dt, "D") + 1,
+            dtype="datetime64[D]",
+        )
+        if weekdays_only:
+            # 1970-01-01 was a Thursday, so shift by 3 to make Monday == 0
+            days = days[(days.astype(np.int64) + 3) % 7 < 5]
+        micros = np.timedelta64(1_000_000, "us")
+        lo = days + np.timedelta64(first_hour, "h") - base
+        hi = days + np.timedelta64(end_hour, "h") - base
+        # Whole-second offsets from ``start_dt``: [lo, hi) clipped to [0, span]
+        lo = np.maximum(-(-lo // micros), 0)
+        hi = np.minimum(-(-hi // micros), span + 1)
+        keep = hi > lo
+        if not keep.any():
+            lo, hi = np.array([0]), np.array([span + 1])
+            keep = np.array([True])
+
+        self.offsets = lo[keep].astype(np.int64)
+        self.cdf = np.cumsum(hi[keep] - lo[keep]).astype(np.int64)
+        self.total = int(self.cdf[-1])
+
+    def roll_forward(self, seconds) -> np.ndarray:
+        """Move offsets from ``start_dt`` forward into business hours.
+
+        Offsets inside an interval are kept; the others move to the start
+        of the next interval, or come back as -1 when none is left.
+        """
+        seconds = np.asarray(seconds, dtype=np.int64)
+        ends = self.offsets + np.diff(self.cdf, prepend=0)
+        idx = np.searchsorted(ends, seconds, side="right")
+        rolled = np.maximum(seconds, self.offsets[np.minimum(idx, len(ends) - 1)])
+        return np.where(idx < len(ends), rolled, -1)
+
+    def _seconds(self, draws):
+        idx = np.searchsorted(self.cdf, draws, side="right")
+        prior = np.where(idx > 0, self.cdf[idx - 1], 0)
+        return self.offsets[idx] + (draws - prior)
+
+    def draw(self) -> datetime:
+        """Return one timestamp using the ``random`` module."""
+        seconds = int(self._seconds(np.int64(random.randrange(self.total))))
+        return self.start_dt + timedelta(seconds=seconds)
+
+    def draw_many(self, size: int, rng: np.random.Generator) -> np.ndarray:
+        """Return ``size`` timestamps as ``datetime64[s]``."""
+        seconds = self._seconds(rng.integers(0, self.total, size=size))
+        return np.datetime64(self.start_dt, "s") + seconds.astype("timedelta64[s]")
+
+
+@lru_cache(maxsize=256)
+def business_hours_sampler(start_dt: datetime, end_dt: datetime,
+                           entity_type: str | None = None) -> BusinessHoursSampler:
+    """Return a cached :class:`BusinessHoursSampler` for the given range."""
+    if entity_type not in BUSINESS_HOURS:
+        entity_type = "Person"
+    return BusinessHoursSampler(start_dt, end_dt, entity_type)
 
 
 def generate_transaction_timestamp(start_dt: datetime, end_dt: datetime,
                                    entity_type: str | None = None,
                                    override_hours: bool = False) -> datetime:
     """Generate a transaction timestamp honoring business hour rules."""
-    for _ in range(100):
-        ts = random_timestamp(start_dt, end_dt)
-        if override_hours:
-            return ts
-
-        if entity_type == "Company":
-            if ts.weekday() < 5 and 8 <= ts.hour < 17:
-                return ts
-        else:  # Person or other
-            if 8 <= ts.hour < 20:
-                return ts
-
-    return ts  # fallback if conditions not met
+    if override_hours:
+        return random_timestamp(start_dt, end_dt)
+    return business_hours_sampler(start_dt, end_dt, entity_type).draw()
+
+
+def generate_transaction_timestamps(start_dt: datetime, end_dt: datetime,
+                                    is_company, rng: np.random.Generator,
+                                    override_hours: bool = False) -> np.ndarray:
+    """Vectorized ``generate_transaction_timestamp`` for a block of rows.
+
+    ``is_company`` is a boolean array selecting the Company business-hour
+    rule per row; the others use the Person rule. Returns ``datetime64[s]``.
+    """
+    is_company = np.asarray(is_company, dtype=bool)
+    if override_hours:
+        start = np.datetime64(start_dt, "s")
+        span = int((end_dt - start_dt).total_seconds())
+        return start + rng.integers(0, span + 1, size=len(is_company)).astype("timedelta64[s]")
+
+    ts = np.empty(len(is_company), dtype="datetime64[s]")
+    for entity_type, mask in (("Company", is_company), ("Person", ~is_company)):
+        count = int(mask.sum())
+        if count:
+            sampler = business_hours_sampler(start_dt, end_dt, entity_type)
+            ts[mask] = sampler.draw_many(count, rng)
+    return ts
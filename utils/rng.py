@@ -0,0 +1,60 @@
+import random
+import zlib
+
+import numpy as np
+
+from utils import helpers
+
+# Root seed set by ``--seed``; ``None`` keeps the historical unseeded runs
+_ROOT_SEED = None
+
+
+def set_root_seed(seed: int | None, salt: int | None = None):
+    """Set the seed every stage stream is derived from (``None`` to unseed).
+
+    ``salt`` is mixed into the root entropy; appended windows pass their
+    start date so they do not replay the streams of the first run.
+    """
+    global _ROOT_SEED
+    _ROOT_SEED = seed if seed is None or salt is None else [seed, salt]
+
+
+def stage_seed(stage: str, shard: int = 0) -> int:
+    """Return a 64-bit seed for ``stage`` (and ``shard``) of the run.
+
+    Seeds come from ``SeedSequence(root, spawn_key=(stage, shard))``, so
+    each stage's stream is independent of the others and of how much
+    randomness earlier stages consumed. Without a root seed a fresh seed
+    is drawn from ``random``.
+    """
+    if _ROOT_SEED is None:
+        return random.getrandbits(64)
+    seq = np.random.SeedSequence(_ROOT_SEED, spawn_key=(zlib.crc32(stage.encode()), shard))
+    return int(seq.generate_state(1, dtype=np.uint64)[0])
+
+
+def reseed(seed: int):
+    """Seed ``random``, the ID stream and the shared Faker from ``seed``."""
+    random.seed(seed)
+    helpers.ID_RNG.seed(seed ^ 0x5EED)
+    helpers.fake.seed_instance(seed)
+    helpers.fake.unique.clear()
+
+
+def seed_stage(stage: str, shard: int = 0):
+    """Reseed the global streams for ``stage`` when a root seed is set."""
+    if _ROOT_SEED is not None:
+        reseed(stage_seed(stage, shard))
+
+
+def get_state():
+    """Capture the state of every stream ``reseed`` touches."""
+    return (random.getstate(), helpers.ID_RNG.getstate(), helpers.fake.random.getstate())
+
+
+def set_state(state):
+    """Restore streams captured by ``get_state``."""
+    py_state, id_state, faker_state = state
+    random.setstate(py_state)
+    helpers.ID_RNG.setstate(id_state)
+    helpers.fake.random.setstate(faker_state)